@@ -7,11 +7,12 @@
 # TODO: Do some timings and tidy up logic in adjustment function
 ###############################################################################
 
-import datetime
+import numpy as np
 from enum import Enum
-from .FinDate import FinDate
+from .FinDate import FinDate, weekDay, excelSerial, dateFromExcelSerial
+from .FinDateArray import FinDateArray
 from .FinError import FinError
-from numba import njit, jit, int64, boolean
+from numba import njit, jit, int64, int8, boolean
 
 easterMondayDay = [98, 90, 103, 95, 114, 106, 91, 111, 102, 87,
                    107, 99, 83, 103, 95, 115, 99, 91, 111, 96, 87,
@@ -67,6 +68,278 @@ class FinDateGenRuleTypes(Enum):
     BACKWARD = 2
 
 ###############################################################################
+# The business day bitmap of each calendar type is only built once and is then
+# shared by all FinCalendar objects of that type. It is extended a whole year
+# at a time as dates outside the range already covered are requested.
+###############################################################################
+
+gCalendarIndices = {}
+
+###############################################################################
+
+
+@njit(int64(int64, int8[:], int64, int64), fastmath=True, cache=True)
+def _adjustSerial(serial, isBusDay, startSerial, convention):
+    ''' Adjust an Excel serial date using a business day bitmap that starts
+    on the date startSerial. The convention is the value of the
+    FinBusDayAdjustTypes enum. '''
+
+    if convention == 1:  # NONE
+        return serial
+
+    n = len(isBusDay)
+    i = serial - startSerial
+
+    if convention == 2 or convention == 3:  # FOLLOWING
+        j = i
+        while j < n - 1 and isBusDay[j] == 0:
+            j += 1
+
+        if convention == 3:  # MODIFIED
+            _, m, _ = dateFromExcelSerial(startSerial + j)
+            _, mStart, _ = dateFromExcelSerial(serial)
+            if m != mStart:
+                j = i
+                while j > 0 and isBusDay[j] == 0:
+                    j -= 1
+
+    else:  # PRECEDING
+        j = i
+        while j > 0 and isBusDay[j] == 0:
+            j -= 1
+
+        if convention == 5:  # MODIFIED
+            _, m, _ = dateFromExcelSerial(startSerial + j)
+            _, mStart, _ = dateFromExcelSerial(serial)
+            if m != mStart:
+                j = i
+                while j < n - 1 and isBusDay[j] == 0:
+                    j += 1
+
+    return startSerial + j
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _adjustSerials(serials, isBusDay, startSerial, convention):
+    ''' Adjust an array of Excel serial dates using the business day bitmap
+    of a calendar. '''
+
+    n = len(serials)
+    result = np.empty(n, dtype=np.int32)
+    for i in range(0, n):
+        result[i] = _adjustSerial(serials[i], isBusDay, startSerial, convention)
+    return result
+
+###############################################################################
+
+
+@njit(int64(int64, int64, int64[:], int64), fastmath=True, cache=True)
+def _addBusinessDaysSerial(serial, numDays, cumBusDays, startSerial):
+    ''' Move an Excel serial date on by a number of business days using the
+    cumulative business day count of a calendar. The target is the business
+    day at which the count reaches the count at the start date plus numDays
+    and it is found by a binary search. '''
+
+    i = serial - startSerial
+
+    if numDays > 0:
+        target = cumBusDays[i + 1] + numDays
+        j = np.searchsorted(cumBusDays, target, side='left') - 1
+    elif numDays < 0:
+        target = cumBusDays[i] + numDays
+        j = np.searchsorted(cumBusDays, target, side='right') - 1
+    else:
+        j = i
+
+    return startSerial + j
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _addBusinessDaysSerials(serials, numDays, cumBusDays, startSerial):
+    ''' Move each of an array of Excel serial dates on by the corresponding
+    number of business days in the numDays array. '''
+
+    n = len(serials)
+    result = np.empty(n, dtype=np.int32)
+    for i in range(0, n):
+        result[i] = _addBusinessDaysSerial(serials[i], numDays[i],
+                                           cumBusDays, startSerial)
+    return result
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _businessDaysBetweenSerials(startSerials, endSerials, cumBusDays,
+                                startSerial):
+    ''' Count the business days after each start date up to and including
+    the corresponding end date. The count is negative if the end date is
+    before the start date. '''
+
+    n = len(startSerials)
+    result = np.empty(n, dtype=np.int64)
+    for i in range(0, n):
+        i1 = startSerials[i] - startSerial
+        i2 = endSerials[i] - startSerial
+        result[i] = cumBusDays[i2 + 1] - cumBusDays[i1 + 1]
+    return result
+
+###############################################################################
+
+
+class FinCalendarIndex():
+    ''' Holds a bitmap of the business days of a calendar over a contiguous
+    range of whole years together with the cumulative number of business days
+    from the start of the range. Entry i of the bitmap refers to the Excel
+    serial date startSerial + i and cumBusDays[i] is the number of business
+    days strictly before it. A bytes copy of the bitmap is also kept as
+    looking up a single date in it from Python is much faster than indexing
+    the NumPy array. '''
+
+    def __init__(self,
+                 calendar):
+        ''' Create an empty index for the calendar. The holiday rules of the
+        calendar are only applied when a year is added to the index. '''
+
+        self._calendar = calendar
+        self._startYear = None
+        self._endYear = None
+        self._startSerial = 0
+        self._isBusDay = np.zeros(0, dtype=np.int8)
+        self._busDayBytes = bytes()
+        self._cumBusDays = np.zeros(1, dtype=np.int64)
+
+    ###########################################################################
+
+    def _yearBitmap(self,
+                    year: int):
+        ''' Apply the calendar holiday rules to every day in a year. '''
+
+        startSerial = excelSerial(1, 1, year)
+        endSerial = excelSerial(1, 1, year + 1)
+        bitmap = np.zeros(endSerial - startSerial, dtype=np.int8)
+
+        for i in range(0, endSerial - startSerial):
+            serial = startSerial + i
+
+            # The 29 Feb 1900 that Excel includes is not a real date
+            if serial == 60:
+                continue
+
+            d, m, y = dateFromExcelSerial(serial)
+            wd = weekDay(serial)
+            if self._calendar._isBusinessDayRule(d, m, y, wd, i + 1):
+                bitmap[i] = 1
+
+        return bitmap
+
+    ###########################################################################
+
+    def coverYears(self,
+                   startYear: int,
+                   endYear: int):
+        ''' Extend the index so that it covers all of the years from the
+        start year to the end year inclusive. '''
+
+        if self._startYear is not None:
+            if startYear >= self._startYear and endYear <= self._endYear:
+                return
+
+        startYear = max(startYear, 1900)
+
+        if self._startYear is None:
+            self._startYear = startYear
+            self._endYear = startYear - 1
+            self._startSerial = excelSerial(1, 1, startYear)
+
+        if startYear >= self._startYear and endYear <= self._endYear:
+            return
+
+        bitmaps = []
+
+        for year in range(startYear, self._startYear):
+            bitmaps.append(self._yearBitmap(year))
+
+        bitmaps.append(self._isBusDay)
+
+        for year in range(self._endYear + 1, endYear + 1):
+            bitmaps.append(self._yearBitmap(year))
+
+        self._startYear = min(startYear, self._startYear)
+        self._endYear = max(endYear, self._endYear)
+        self._startSerial = excelSerial(1, 1, self._startYear)
+        self._isBusDay = np.concatenate(bitmaps)
+        self._busDayBytes = self._isBusDay.tobytes()
+        self._cumBusDays = np.zeros(len(self._isBusDay) + 1, dtype=np.int64)
+        self._cumBusDays[1:] = np.cumsum(self._isBusDay)
+
+    ###########################################################################
+
+    def coverSerials(self,
+                     minSerial: int,
+                     maxSerial: int,
+                     numExtraYears: int = 1):
+        ''' Extend the index to cover all dates between two Excel serial dates
+        with some extra years on either side so that holiday adjustments that
+        cross a year end stay inside the index. '''
+
+        _, _, y1 = dateFromExcelSerial(minSerial)
+        _, _, y2 = dateFromExcelSerial(maxSerial)
+        self.coverYears(y1 - numExtraYears, y2 + numExtraYears)
+
+    ###########################################################################
+
+    def addBusinessDays(self,
+                        serials: np.ndarray,
+                        numDays):
+        ''' Return an array of Excel serial dates that are numDays business
+        days after each of the serial dates. The number of days can be an
+        integer or an integer array with one entry per date. '''
+
+        serials = np.asarray(serials, dtype=np.int64)
+        numDays = np.broadcast_to(np.asarray(numDays, dtype=np.int64),
+                                  serials.shape)
+
+        if len(serials) == 0:
+            return np.zeros(0, dtype=np.int32)
+
+        # Allow about 200 business days per year when sizing the index
+        numYears = int(np.max(np.abs(numDays))) // 200 + 1
+        self.coverSerials(int(np.min(serials)), int(np.max(serials)),
+                          numYears)
+
+        return _addBusinessDaysSerials(serials, numDays,
+                                       self._cumBusDays, self._startSerial)
+
+    ###########################################################################
+
+    def businessDaysBetween(self,
+                            startSerials: np.ndarray,
+                            endSerials: np.ndarray):
+        ''' Return the number of business days after each start serial date
+        up to and including the corresponding end serial date. '''
+
+        startSerials = np.asarray(startSerials, dtype=np.int64)
+        endSerials = np.asarray(endSerials, dtype=np.int64)
+
+        if startSerials.shape != endSerials.shape:
+            raise FinError("Start and end dates must have the same length.")
+
+        if len(startSerials) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        minSerial = min(np.min(startSerials), np.min(endSerials))
+        maxSerial = max(np.max(startSerials), np.max(endSerials))
+        self.coverSerials(int(minSerial), int(maxSerial))
+
+        return _businessDaysBetweenSerials(startSerials, endSerials,
+                                           self._cumBusDays, self._startSerial)
+
+###############################################################################
 
 
 class FinCalendar(object):
@@ -86,6 +359,26 @@ class FinCalendar(object):
                 str(calendarType))
 
         self._type = calendarType
+        self._index = None
+
+    ###########################################################################
+
+    def _calendarIndex(self):
+        ''' Return the business day index shared by all calendars of this
+        type, creating it if this is the first time it has been used. '''
+
+        if self._index is None:
+
+            if self._type not in gCalendarIndices:
+
+                if self._type == FinCalendarTypes.JAPAN:
+                    print("Do not use this calendar as it has not been tested.")
+
+                gCalendarIndices[self._type] = FinCalendarIndex(self)
+
+            self._index = gCalendarIndices[self._type]
+
+        return self._index
 
     ###########################################################################
 
@@ -101,104 +394,138 @@ class FinCalendar(object):
         if busDayConventionType == FinBusDayAdjustTypes.NONE:
             return dt
 
-        elif busDayConventionType == FinBusDayAdjustTypes.FOLLOWING:
-
-            # step forward until we find a business day
-            while self.isBusinessDay(dt) is False:
-                dt = dt.addDays(1)
+        index = self._calendarIndex()
+        index.coverYears(dt._y - 1, dt._y + 1)
 
+        if index._busDayBytes[dt._excelDate - index._startSerial] == 1:
             return dt
 
-        elif busDayConventionType == FinBusDayAdjustTypes.MODIFIED_FOLLOWING:
+        serial = _adjustSerial(dt._excelDate,
+                               index._isBusDay,
+                               index._startSerial,
+                               busDayConventionType.value)
 
-            d_start = dt._d
-            m_start = dt._m
-            y_start = dt._y
+        d, m, y = dateFromExcelSerial(serial)
+        return FinDate(d, m, y)
 
-            # step forward until we find a business day
-            while self.isBusinessDay(dt) is False:
-                dt = dt.addDays(1)
+###############################################################################
 
-            # if the business day is in a different month look back
-            # for previous first business day one day at a time
-            # I could speed this up by starting it at initial date
-            if dt._m != m_start:
-                dt = FinDate(d_start, m_start, y_start)
-                while self.isBusinessDay(dt) is False:
-                    dt = dt.addDays(-1)
+    def adjustDates(self,
+                    dates,
+                    busDayConventionType: FinBusDayAdjustTypes):
+        ''' Adjust a FinDateArray or a NumPy array of Excel serial dates
+        according to the specified business day convention. The result is of
+        the same type as the dates passed in. '''
 
-            return dt
+        if type(busDayConventionType) != FinBusDayAdjustTypes:
+            raise FinError("Invalid type passed. Need FinBusDayConventionType")
 
-        elif busDayConventionType == FinBusDayAdjustTypes.PRECEDING:
+        if isinstance(dates, FinDateArray):
+            serials = dates._excelDates
+        else:
+            serials = np.asarray(dates)
+
+        if len(serials) == 0 or \
+           busDayConventionType == FinBusDayAdjustTypes.NONE:
+            adjustedSerials = serials.astype(np.int32)
+        else:
+            index = self._calendarIndex()
+            index.coverSerials(int(np.min(serials)), int(np.max(serials)))
+            adjustedSerials = _adjustSerials(serials,
+                                             index._isBusDay,
+                                             index._startSerial,
+                                             busDayConventionType.value)
 
-            # if the business day is in the next month look back
-            # for previous first business day one day at a time
-            while self.isBusinessDay(dt) is False:
-                dt = dt.addDays(-1)
+        if isinstance(dates, FinDateArray):
+            return FinDateArray(adjustedSerials)
 
-            return dt
+        return adjustedSerials
 
-        elif busDayConventionType == FinBusDayAdjustTypes.MODIFIED_PRECEDING:
+###############################################################################
+
+    def addBusinessDays(self,
+                        startDate: FinDate,
+                        numDays: int):
+        ''' Returns a new date that is numDays business days after FinDate.
+        All holidays in the chosen calendar are assumed not business days. '''
 
-            d_start = dt._d
-            m_start = dt._m
-            y_start = dt._y
+        if isinstance(numDays, int) is False:
+            raise FinError("Num days must be an integer")
 
-            # step backward until we find a business day
-            while self.isBusinessDay(dt) is False:
-                dt = dt.addDays(-1)
+        if numDays == 0:
+            return FinDate(startDate._d, startDate._m, startDate._y)
 
-            # if the business day is in a different month look forward
-            # for previous first business day one day at a time
-            # I could speed this up by starting it at initial date
-            if dt._m != m_start:
-                dt = FinDate(d_start, m_start, y_start)
-                while self.isBusinessDay(dt) is False:
-                    dt = dt.addDays(+1)
+        # Allow about 200 business days per year when sizing the index
+        numYears = abs(numDays) // 200 + 1
 
-            return dt
+        index = self._calendarIndex()
+        if numDays > 0:
+            index.coverYears(startDate._y - 1, startDate._y + numYears)
         else:
-            raise FinError("Unknown adjustment convention" +
-                           str(busDayConventionType))
+            index.coverYears(startDate._y - numYears, startDate._y + 1)
+
+        serial = _addBusinessDaysSerial(startDate._excelDate, numDays,
+                                        index._cumBusDays, index._startSerial)
 
-        return dt
+        d, m, y = dateFromExcelSerial(serial)
+        return FinDate(d, m, y)
 
 ###############################################################################
 
-    def addBusinessDays(self,
-                        startDate: FinDate,
-                        numDays: int):
-        ''' Returns a new date that is numDays business days after FinDate. 
-        All holidays in the chosen calendar are assumed not business days. '''
+    def businessDaysBetween(self,
+                            startDate: FinDate,
+                            endDate: FinDate):
+        ''' Returns the number of business days after the start date up to
+        and including the end date so that if the end date is a business day
+        then adding this number of business days to the start date gives the
+        end date. It is negative if the end date is before the start date. '''
 
-        # TODO: REMOVE DATETIME DEPENDENCE HERE
+        index = self._calendarIndex()
+        index.coverYears(min(startDate._y, endDate._y) - 1,
+                         max(startDate._y, endDate._y) + 1)
 
-        if isinstance(numDays, int) is False:
-            raise FinError("Num days must be an integer")
+        i1 = startDate._excelDate - index._startSerial
+        i2 = endDate._excelDate - index._startSerial
+        return int(index._cumBusDays[i2 + 1] - index._cumBusDays[i1 + 1])
+
+###############################################################################
+
+    def addBusinessDaysToDates(self,
+                               dates,
+                               numDays):
+        ''' Adds a number of business days to each of a FinDateArray or a
+        NumPy array of Excel serial dates. The number of days can be an integer
+        or an array with one entry per date. The result is of the same type as
+        the dates passed in. '''
+
+        if isinstance(dates, FinDateArray):
+            serials = dates._excelDates
+        else:
+            serials = dates
+
+        newSerials = self._calendarIndex().addBusinessDays(serials, numDays)
+
+        if isinstance(dates, FinDateArray):
+            return FinDateArray(newSerials)
+
+        return newSerials
 
-        dt = datetime.date(startDate._y, startDate._m, startDate._d)
-        d = dt.day
-        m = dt.month
-        y = dt.year
-        newDt = FinDate(d, m, y)
+###############################################################################
 
-        s = +1
-        if numDays < 0:
-            numDays = -1 * numDays
-            s = -1
+    def businessDaysBetweenDates(self,
+                                 startDates,
+                                 endDates):
+        ''' Returns an array of the number of business days between each of
+        the start dates and the corresponding end date. The dates can be
+        FinDateArrays or NumPy arrays of Excel serial dates. '''
 
-        while numDays > 0:
-            dt = dt + s * datetime.timedelta(days=1)
-            d = dt.day
-            m = dt.month
-            y = dt.year
-            newDt = FinDate(d, m, y)
+        if isinstance(startDates, FinDateArray):
+            startDates = startDates._excelDates
 
-            if self.isBusinessDay(newDt) is True:
-#                print("BUS DAY: ", newDt, numDays)
-                numDays -= 1
+        if isinstance(endDates, FinDateArray):
+            endDates = endDates._excelDates
 
-        return newDt
+        return self._calendarIndex().businessDaysBetween(startDates, endDates)
 
 ###############################################################################
 
@@ -207,13 +534,21 @@ class FinCalendar(object):
         ''' Determines if a date is a business day according to the specified
         calendar. If it is it returns True, otherwise False. '''
 
-        y = dt._y
-        m = dt._m
-        d = dt._d
+        index = self._calendarIndex()
+        index.coverYears(dt._y, dt._y)
+        return index._busDayBytes[dt._excelDate - index._startSerial] == 1
+
+###############################################################################
 
-        startDate = FinDate(1, 1, y)
-        dd = dt._excelDate - startDate._excelDate + 1
-        weekday = dt._weekday
+    def _isBusinessDayRule(self,
+                           d: int,
+                           m: int,
+                           y: int,
+                           weekday: int,
+                           dd: int):
+        ''' Applies the holiday rules of the calendar to a date given by its
+        day, month, year, weekday and day of the year. This is only called to
+        build the business day bitmap of the calendar index. '''
 
         em = easterMondayDay[y - 1901]
 
@@ -221,7 +556,7 @@ class FinCalendar(object):
             # Every day is a business day when there are no holidays
             return True
 
-        if dt.isWeekend():
+        if weekday == FinDate.SAT or weekday == FinDate.SUN:
             # If calendar is not NONE, every weekend is not a business date
             return False
 
@@ -276,8 +611,6 @@ class FinCalendar(object):
         if self._type == FinCalendarTypes.JAPAN:
             ''' This is not exact NEEDS DEBUGGING '''
 
-            print("Do not use this calendar as it has not been tested.")
-
             if m == 1 and d == 1:  # new years day
                 return False
 
@@ -320,7 +653,7 @@ class FinCalendar(object):
             if md._weekday == FinDate.SUN:
                 md = md.addDays(1)
 
-            if dt == md:  # Mountain Day
+            if m == md._m and d == md._d:  # Mountain Day
                 return False
 
             # Respect for aged
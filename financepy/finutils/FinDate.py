@@ -64,91 +64,95 @@ def parse_date(dateStr, dateFormat):
     dt_obj = datetime.datetime.strptime(dateStr, dateFormat)
     return dt_obj.day, dt_obj.month, dt_obj.year
 ###############################################################################
-# CREATE DATE COUNTER
+# DATE COUNTER
 ###############################################################################
 
-
-gDateCounterList = None
+# These are only used to spot dates entered in the order y, m, d
 gStartYear = 1900
 gEndYear = 2100
 
+###############################################################################
 
-def calculateList():
-    ''' Calculate list of dates so that we can do quick lookup to get the
-    number of dates since 1 Jan 1900 (inclusive) BUT TAKING INTO ACCOUNT THE
-    FACT THAT EXCEL MISTAKENLY CALLS 1900 A LEAP YEAR. For us, agreement with
-    Excel is more important than this leap year error and in any case, we will
-    not usually be calculating day differences with start dates before 28 Feb
-    1900. Note that Excel inherited this "BUG" from LOTUS 1-2-3. '''
-
-    dayCounter = 0
-    maxDays = 0
-    global gDateCounterList
-    global gStartYear
-    global gEndYear
+@njit(fastmath=True, cache=True)
+def weekDay(dayCount):
+    weekday = (dayCount+5) % 7
+    return weekday
 
-#    print("Calculating list between", gStartYear, "and", gEndYear)
+###############################################################################
+# Closed-form conversion between a civil date and its Excel serial day number.
+# The day count is the number of days since 1 Jan 1900 (inclusive) BUT TAKING
+# INTO ACCOUNT THE FACT THAT EXCEL MISTAKENLY CALLS 1900 A LEAP YEAR. For us,
+# agreement with Excel is more important than this leap year error and in any
+# case, we will not usually be calculating day differences with start dates
+# before 28 Feb 1900. Note that Excel inherited this "BUG" from LOTUS 1-2-3.
+# The cost of the conversion does not depend on the date and no table needs
+# to be built so the functions can also be called from Numba functions that
+# process arrays of dates.
+###############################################################################
 
-    gDateCounterList = []
+gExcelEpochOffset = 25569  # Days from 30 Dec 1899 to 1 Jan 1970
 
-    idx = -1  # the first element will be idx=0
 
-    for yy in range(1900, gEndYear+1):
+@njit(int64(int64, int64, int64), fastmath=True, cache=True)
+def excelSerial(d, m, y):
+    ''' Return the Excel serial day number of the date with day of month d,
+    month m and year y using the days-from-civil algorithm of H. Hinnant. '''
 
-        # DO NOT CHANGE THIS FOR AGREEMENT WITH EXCEL WHICH ASSUMES THAT 1900
-        # WAS A LEAP YEAR AND THAT 29 FEB 1900 ACTUALLY HAPPENED. A LOTUS BUG.
-        if yy == 1900:
-            leapYear = True
-        else:
-            leapYear = isLeapYear(yy)
+    if m <= 2:
+        y = y - 1
 
-        for mm in range(1, 13):
+    era = y // 400
+    yoe = y - era * 400
 
-            if leapYear is True:
-                maxDays = monthDaysLeapYear[mm-1]
-            else:
-                maxDays = monthDaysNotLeapYear[mm-1]
+    if m > 2:
+        mp = m - 3
+    else:
+        mp = m + 9
 
-            for _ in range(1, maxDays+1):
-                idx += 1
-                dayCounter += 1
-                if yy >= gStartYear:
-                    gDateCounterList.append(dayCounter)
+    doy = (153 * mp + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    daysSinceEpoch = era * 146097 + doe - 719468
 
-            for _ in range(maxDays, 31):
-                idx += 1
-                if yy >= gStartYear:
-                    gDateCounterList.append(-999)
+    serial = daysSinceEpoch + gExcelEpochOffset
 
+    # Dates before the phantom 29 Feb 1900 are one day less in Excel
+    if serial < 61:
+        serial = serial - 1
 
-##############################################################################
-# The index in these functions is not the excel date index used as the 
-# internal representation of the date but the index of that date in the
-# padded date object used to store the dates in a way that allows for a
-# quick lookup. Do not confuse them as you will find they are out by months
-##############################################################################
+    return serial
 
-@njit(fastmath=True, cache=True)
-def dateIndex(d, m, y):
-    idx = (y-gStartYear) * 12 * 31 + (m-1) * 31 + (d-1)
-    return idx
+###############################################################################
 
 
 @njit(fastmath=True, cache=True)
-def dateFromIndex(idx):
-    ''' Reverse mapping from index to date. Take care with numba as it can do
-    weird rounding on the integer. Seems OK now. '''
-    y = int(gStartYear + idx/12/31)
-    m = 1 + int((idx - (y-gStartYear) * 12 * 31) / 31)
-    d = 1 + idx - (y-gStartYear) * 12 * 31 - (m-1) * 31
-    return (d, m, y)
+def dateFromExcelSerial(serial):
+    ''' Inverse of excelSerial. Returns the tuple (d, m, y) for an Excel
+    serial day number. Serial 60 maps to the phantom 29 Feb 1900. '''
+
+    if serial == 60:
+        return (29, 2, 1900)
+
+    if serial < 60:
+        serial = serial + 1
+
+    z = serial - gExcelEpochOffset + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    y = yoe + era * 400
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    d = doy - (153 * mp + 2) // 5 + 1
+
+    if mp < 10:
+        m = mp + 3
+    else:
+        m = mp - 9
 
-###############################################################################
+    if m <= 2:
+        y = y + 1
 
-@njit(fastmath=True, cache=True)
-def weekDay(dayCount):
-    weekday = (dayCount+5) % 7
-    return weekday
+    return (d, m, y)
 
 ###############################################################################
 
@@ -177,9 +181,6 @@ class FinDate():
         start_date = FinDate(1, 1, 2018)
         '''
 
-        global gStartYear
-        global gEndYear
-
         if isinstance(args[0], str):
            d, m, y = parse_date(args[0], args[1])
         else:
@@ -191,25 +192,11 @@ class FinDate():
             y = d
             d = tmp
 
-        if gDateCounterList is None:
-            calculateList()
-
         if y < 1900:
             raise FinError("Year cannot be before 1900")
 
-        # Resize date list dynamically if required
-        if y < gStartYear:
-            gStartYear = y
-            calculateList()
-
-        if y > gEndYear:
-            gEndYear = y
-            calculateList()
-
-        if y < gStartYear or y > gEndYear:
-            raise FinError(
-                "Date: year " + str(y) + " should be " + str(gStartYear) +
-                " to " + str(gEndYear))
+        if m < 1 or m > 12:
+            raise FinError("Date: Month " + str(m) + " not valid.")
 
         if d < 1:
             raise FinError("Date: Leap year. Day not valid.")
@@ -239,8 +226,7 @@ class FinDate():
         ''' Update internal representation of date as number of days since the
         1st Jan 1900. This is same as Excel convention. '''
 
-        idx = dateIndex(self._d, self._m, self._y)
-        daysSinceFirstJan1900 = gDateCounterList[idx]
+        daysSinceFirstJan1900 = excelSerial(self._d, self._m, self._y)
         wd = weekDay(daysSinceFirstJan1900)
         self._excelDate = daysSinceFirstJan1900
         self._weekday = wd
@@ -292,18 +278,7 @@ class FinDate():
         ''' Returns a new date that is numDays after the FinDate. I also make
         it possible to go backwards a number of days. '''
 
-        idx = dateIndex(self._d, self._m, self._y)
-
-        step = +1
-        if numDays < 0:
-            step = -1
-
-        while numDays != 0:
-            idx += step
-            if gDateCounterList[idx] > 0:
-                numDays -= step
-
-        (d, m, y) = dateFromIndex(idx)
+        (d, m, y) = dateFromExcelSerial(self._excelDate + numDays)
         newDt = FinDate(d, m, y)
         return newDt
 
@@ -0,0 +1,342 @@
+##############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+##############################################################################
+
+import numpy as np
+from numba import njit
+
+from .FinDate import FinDate, excelSerial, dateFromExcelSerial
+from .FinDate import isLeapYear, monthDaysLeapYear, monthDaysNotLeapYear
+from .FinError import FinError
+
+###############################################################################
+# These Numba functions do the date arithmetic on arrays of Excel serial day
+# numbers so that no FinDate objects need to be created along the way.
+###############################################################################
+
+gMonthDaysNotLeapYear = np.array(monthDaysNotLeapYear, dtype=np.int64)
+gMonthDaysLeapYear = np.array(monthDaysLeapYear, dtype=np.int64)
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _serialsFromDMY(d, m, y):
+    ''' Convert arrays of day, month and year into Excel serial numbers. '''
+
+    n = len(d)
+    serials = np.empty(n, dtype=np.int32)
+    for i in range(0, n):
+        serials[i] = excelSerial(d[i], m[i], y[i])
+    return serials
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _dmyFromSerials(serials):
+    ''' Convert an array of Excel serial numbers into arrays of day, month and
+    year. '''
+
+    n = len(serials)
+    d = np.empty(n, dtype=np.int32)
+    m = np.empty(n, dtype=np.int32)
+    y = np.empty(n, dtype=np.int32)
+
+    for i in range(0, n):
+        dd, mm, yy = dateFromExcelSerial(serials[i])
+        d[i] = dd
+        m[i] = mm
+        y[i] = yy
+
+    return d, m, y
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _addMonths(serials, numMonths):
+    ''' Add a number of months to each date in an array of Excel serials. If
+    the day of the month does not exist in the new month then the date is set
+    to the last day of that month as is done in FinDate.addMonths. '''
+
+    n = len(serials)
+    result = np.empty(n, dtype=np.int32)
+
+    for i in range(0, n):
+
+        d, m, y = dateFromExcelSerial(serials[i])
+
+        m = m + numMonths
+
+        while m > 12:
+            m = m - 12
+            y += 1
+
+        while m < 1:
+            m = m + 12
+            y -= 1
+
+        if isLeapYear(y):
+            maxDays = gMonthDaysLeapYear[m - 1]
+        else:
+            maxDays = gMonthDaysNotLeapYear[m - 1]
+
+        if d > maxDays:
+            d = maxDays
+
+        result[i] = excelSerial(d, m, y)
+
+    return result
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _weekdays(serials):
+    ''' Day of the week for each Excel serial where Monday is zero. '''
+
+    n = len(serials)
+    weekdays = np.empty(n, dtype=np.int32)
+    for i in range(0, n):
+        weekdays[i] = (serials[i] + 5) % 7
+    return weekdays
+
+###############################################################################
+
+
+def _parseTenor(tenor: str):
+    ''' Split a tenor string such as 3M into a number of days or months in the
+    same way as FinDate.addTenor. Returns a tuple of the number of periods and
+    the day or month step size for each period. '''
+
+    if isinstance(tenor, str) is False:
+        raise FinError("Tenor must be a string e.g. '5Y'")
+
+    tenor = tenor.upper()
+
+    if tenor == "ON" or tenor == "TN":
+        return (1, 1, 0)
+    elif tenor[-1] == "D":
+        return (int(tenor[0:-1]), 1, 0)
+    elif tenor[-1] == "W":
+        return (int(tenor[0:-1]), 7, 0)
+    elif tenor[-1] == "M":
+        return (int(tenor[0:-1]), 0, 1)
+    elif tenor[-1] == "Y":
+        return (int(tenor[0:-1]), 0, 12)
+    else:
+        raise FinError("Unknown tenor type in " + tenor)
+
+###############################################################################
+
+
+class FinDateArray():
+    ''' A vector of dates stored as a contiguous NumPy int32 array of Excel
+    serial day numbers, the same day count as is used internally by FinDate.
+    Date arithmetic and comparisons are performed on the whole array at once
+    using Numba so that large schedules and portfolios of dates can be
+    processed without creating a FinDate object for every element. '''
+
+    def __init__(self,
+                 dates):
+        ''' Create a FinDateArray from a list of FinDates, another
+        FinDateArray or a NumPy array of integer Excel serial numbers. '''
+
+        if isinstance(dates, FinDateArray):
+            self._excelDates = dates._excelDates.copy()
+        elif isinstance(dates, np.ndarray):
+            if np.issubdtype(dates.dtype, np.integer) is False:
+                raise FinError("Date array must contain integer serials.")
+            self._excelDates = np.ascontiguousarray(dates, dtype=np.int32)
+        elif isinstance(dates, list):
+            n = len(dates)
+            self._excelDates = np.empty(n, dtype=np.int32)
+            for i in range(0, n):
+                if isinstance(dates[i], FinDate) is False:
+                    raise FinError("List must only contain FinDates.")
+                self._excelDates[i] = dates[i]._excelDate
+        else:
+            raise FinError("Unknown input type " + str(type(dates)))
+
+        if self._excelDates.ndim != 1:
+            raise FinError("Date array must be one-dimensional.")
+
+        if len(self._excelDates) > 0:
+            if np.min(self._excelDates) < 1:
+                raise FinError("Dates cannot be before 1 Jan 1900.")
+
+    ###########################################################################
+
+    def excelDates(self):
+        ''' Return the underlying int32 array of Excel serial numbers. '''
+        return self._excelDates
+
+    ###########################################################################
+
+    def dmy(self):
+        ''' Return a tuple of arrays of the day, month and year. '''
+        return _dmyFromSerials(self._excelDates)
+
+    ###########################################################################
+
+    def weekday(self):
+        ''' Return an array of the weekday of each date, Monday is zero. '''
+        return _weekdays(self._excelDates)
+
+    ###########################################################################
+
+    def isWeekend(self):
+        ''' Return a boolean array which is True if the date is a weekend. '''
+        return self.weekday() >= FinDate.SAT
+
+    ###########################################################################
+
+    def addDays(self,
+                numDays: int = 1):
+        ''' Return a new FinDateArray with every date moved on by numDays.
+        The number of days can also be an array with one entry per date. '''
+        newDates = self._excelDates + numDays
+        return FinDateArray(newDates.astype(np.int32))
+
+    ###########################################################################
+
+    def addMonths(self,
+                  numMonths: int):
+        ''' Return a new FinDateArray with every date moved on by numMonths.
+        Dates that would fall after the end of the month are set to the last
+        day of the month. '''
+
+        if int(numMonths) != numMonths:
+            raise FinError("Must only pass integers or float integers.")
+
+        newDates = _addMonths(self._excelDates, int(numMonths))
+        return FinDateArray(newDates)
+
+    ###########################################################################
+
+    def addYears(self,
+                 numYears: int):
+        ''' Return a new FinDateArray with every date moved on by a whole
+        number of years. '''
+
+        if int(numYears) != numYears:
+            raise FinError("Must only pass integers or float integers.")
+
+        return self.addMonths(int(numYears) * 12)
+
+    ###########################################################################
+
+    def addTenor(self,
+                 tenor: str):
+        ''' Return a new FinDateArray of dates that follow each date by a
+        period given by the tenor which is a string consisting of a number and
+        a letter, the letter being d, w, m , y for day, week, month or year.
+        The result matches FinDate.addTenor so month and year tenors are added
+        one month or one year at a time. The dates are not holiday adjusted. '''
+
+        numPeriods, daysStep, monthsStep = _parseTenor(tenor)
+
+        if daysStep > 0:
+            return self.addDays(numPeriods * daysStep)
+
+        newDates = self._excelDates
+        for _ in range(0, numPeriods):
+            newDates = _addMonths(newDates, monthsStep)
+
+        return FinDateArray(newDates)
+
+    ###########################################################################
+
+    def toList(self):
+        ''' Convert the date array into a list of FinDate objects. '''
+
+        d, m, y = self.dmy()
+        dateList = []
+        for i in range(0, len(self._excelDates)):
+            dateList.append(FinDate(int(d[i]), int(m[i]), int(y[i])))
+        return dateList
+
+    ###########################################################################
+
+    def _otherSerials(self, other):
+        ''' Return the serial number or numbers of the other operand. '''
+
+        if isinstance(other, FinDateArray):
+            if len(other) != len(self):
+                raise FinError("Date arrays do not have the same length.")
+            return other._excelDates
+        elif isinstance(other, FinDate):
+            return other._excelDate
+        else:
+            raise FinError("Can only compare with a FinDate or FinDateArray")
+
+    ###########################################################################
+
+    def __sub__(self, other):
+        ''' Number of days between the dates as an integer array. '''
+        return self._excelDates - self._otherSerials(other)
+
+    ###########################################################################
+
+    def __lt__(self, other):
+        return self._excelDates < self._otherSerials(other)
+
+    ###########################################################################
+
+    def __gt__(self, other):
+        return self._excelDates > self._otherSerials(other)
+
+    ###########################################################################
+
+    def __le__(self, other):
+        return self._excelDates <= self._otherSerials(other)
+
+    ###########################################################################
+
+    def __ge__(self, other):
+        return self._excelDates >= self._otherSerials(other)
+
+    ###########################################################################
+
+    def __eq__(self, other):
+        return self._excelDates == self._otherSerials(other)
+
+    ###########################################################################
+
+    def __ne__(self, other):
+        return self._excelDates != self._otherSerials(other)
+
+    ###########################################################################
+
+    def __len__(self):
+        return len(self._excelDates)
+
+    ###########################################################################
+
+    def __getitem__(self, index):
+        ''' Return a FinDate for an integer index or a FinDateArray for a
+        slice or a mask. '''
+
+        if isinstance(index, (int, np.integer)):
+            d, m, y = dateFromExcelSerial(int(self._excelDates[index]))
+            return FinDate(d, m, y)
+
+        return FinDateArray(self._excelDates[index])
+
+    ###########################################################################
+
+    def __repr__(self):
+        ''' Returns a string listing each of the dates. '''
+        s = "FinDateArray(["
+        s += ", ".join([str(dt) for dt in self.toList()])
+        s += "])"
+        return s
+
+    ###########################################################################
+
+    def _print(self):
+        ''' Simple print function for backward compatibility. '''
+        print(self)
+
+###############################################################################
@@ -2,8 +2,12 @@
 # Copyright (C) 2018, 2019, 2020 Dominic O'Kane
 ##############################################################################
 
+import numpy as np
+from numba import njit
+
 from .FinDate import FinDate, monthDaysLeapYear, monthDaysNotLeapYear, datediff
-from .FinDate import isLeapYear
+from .FinDate import isLeapYear, excelSerial, dateFromExcelSerial
+from .FinDateArray import FinDateArray
 from .FinError import FinError
 from .FinFrequency import FinFrequencyTypes, FinFrequency
 
@@ -57,6 +61,174 @@ class FinDayCountTypes(Enum):
 ###############################################################################
 
 
+@njit(fastmath=True, cache=True)
+def _isLastDayOfFeb(d, m, y):
+    ''' Return True if the date is the last day of February. '''
+
+    if m != 2:
+        return False
+
+    if isLeapYear(y):
+        return d == 29
+
+    return d == 28
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _yearFracs(dccType, serials1, serials2, serials3, hasDate3, freq,
+               isTerminationDate):
+    ''' Calculate the year fraction between each pair of Excel serial dates
+    in serials1 and serials2 for the day count type given by the value of the
+    FinDayCountTypes enum. The third dates are the end of the coupon periods
+    and are only used if hasDate3 is True. The logic follows that of the
+    FinDayCount yearFrac function. '''
+
+    n = len(serials1)
+    accFactors = np.empty(n)
+
+    for i in range(0, n):
+
+        s1 = serials1[i]
+        s2 = serials2[i]
+        s3 = serials3[i]
+
+        d1, m1, y1 = dateFromExcelSerial(s1)
+        d2, m2, y2 = dateFromExcelSerial(s2)
+
+        if dccType == 1:  # THIRTY_360_BOND
+
+            if d1 == 31:
+                d1 = 30
+
+            if d2 == 31 and d1 == 30:
+                d2 = 30
+
+            num = 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+            accFactors[i] = num / 360
+
+        elif dccType == 2:  # THIRTY_E_360
+
+            if d1 == 31:
+                d1 = 30
+
+            if d2 == 31:
+                d2 = 30
+
+            num = 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+            accFactors[i] = num / 360
+
+        elif dccType == 3:  # THIRTY_E_360_ISDA
+
+            lastDayOfFeb1 = _isLastDayOfFeb(d1, m1, y1)
+            lastDayOfFeb2 = _isLastDayOfFeb(d2, m2, y2)
+
+            if d1 == 31:
+                d1 = 30
+
+            if lastDayOfFeb1:
+                d1 = 30
+
+            if d2 == 31:
+                d2 = 30
+
+            if lastDayOfFeb2 and not isTerminationDate[i]:
+                d2 = 30
+
+            num = 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+            accFactors[i] = num / 360
+
+        elif dccType == 4:  # THIRTY_E_PLUS_360
+
+            if d1 == 31:
+                d1 = 30
+
+            if d2 == 31:
+                m2 = m2 + 1
+                d2 = 1
+
+            num = 360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)
+            accFactors[i] = num / 360
+
+        elif dccType == 5:  # ACT_ACT_ISDA
+
+            if isLeapYear(y1):
+                denom1 = 366
+            else:
+                denom1 = 365
+
+            if isLeapYear(y2):
+                denom2 = 366
+            else:
+                denom2 = 365
+
+            if y1 == y2:
+                accFactors[i] = (s2 - s1) / denom1
+            else:
+                daysYear1 = excelSerial(1, 1, y1 + 1) - s1
+                daysYear2 = s2 - excelSerial(1, 1, y2)
+                accFactor1 = daysYear1 / denom1
+                accFactor2 = daysYear2 / denom2
+                yearDiff = y2 - y1 - 1.0
+                accFactors[i] = accFactor1 + accFactor2 + yearDiff
+
+        elif dccType == 6:  # ACT_ACT_ICMA
+
+            accFactors[i] = (s2 - s1) / (freq * (s3 - s1))
+
+        elif dccType == 7:  # ACT_365F
+
+            accFactors[i] = (s2 - s1) / 365
+
+        elif dccType == 8:  # ACT_360
+
+            accFactors[i] = (s2 - s1) / 360
+
+        elif dccType == 9:  # ACT_365L
+
+            if hasDate3:
+                _, _, y3 = dateFromExcelSerial(s3)
+            else:
+                y3 = y2
+
+            den = 365
+
+            if isLeapYear(y1):
+                feb29 = excelSerial(29, 2, y1)
+            elif isLeapYear(y3):
+                feb29 = excelSerial(29, 2, y3)
+            else:
+                feb29 = 1
+
+            if freq == 1:
+                if feb29 > s1 and feb29 <= s3:
+                    den = 366
+            else:
+                if isLeapYear(y3):
+                    den = 366
+
+            accFactors[i] = (s2 - s1) / den
+
+    return accFactors
+
+###############################################################################
+
+
+def _toSerials(dates):
+    ''' Convert a FinDateArray, a list of FinDates or an array of Excel
+    serial dates into an int64 NumPy array. '''
+
+    if isinstance(dates, FinDateArray):
+        return dates._excelDates.astype(np.int64)
+    elif isinstance(dates, list):
+        return FinDateArray(dates)._excelDates.astype(np.int64)
+    else:
+        return np.asarray(dates, dtype=np.int64)
+
+###############################################################################
+
+
 class FinDayCount(object):
     ''' Calculate the fractional day count between two dates according to a
     specified day count convention. '''
@@ -149,7 +321,7 @@ class FinDayCount(object):
                 d1 = 30
 
             lastDayOfFeb1 = isLastDayOfFeb(dt1)
-            if lastDayOfFeb1 is True:
+            if lastDayOfFeb1:
                 d1 = 30
 
             if d2 == 31:
@@ -271,6 +443,53 @@ class FinDayCount(object):
             raise FinError(str(self._type) +
                            " is not one of FinDayCountTypes")
 
+###############################################################################
+
+    def yearFracs(self,
+                  startDates,
+                  endDates,
+                  periodEndDates=None,
+                  frequencyType: FinFrequencyTypes = FinFrequencyTypes.ANNUAL,
+                  isTerminationDate=False):
+        ''' Calculate the year fractions between arrays of start and end dates
+        in one call. The dates can be FinDateArrays, lists of FinDates or NumPy
+        arrays of Excel serial dates. The period end dates play the role of
+        dt3 in yearFrac and must be supplied for ACT_ACT_ICMA. The termination
+        flag can be a bool or a boolean array with one entry per date. Returns
+        a NumPy array of the accrual factors. '''
+
+        serials1 = _toSerials(startDates)
+        serials2 = _toSerials(endDates)
+
+        if serials1.shape != serials2.shape:
+            raise FinError("Start and end dates must have the same length.")
+
+        if periodEndDates is None:
+            serials3 = serials2
+            hasDate3 = False
+        else:
+            serials3 = _toSerials(periodEndDates)
+            hasDate3 = True
+
+            if serials3.shape != serials1.shape:
+                raise FinError("Period end dates must have the same length.")
+
+        freq = FinFrequency(frequencyType)
+
+        if self._type == FinDayCountTypes.ACT_ACT_ICMA:
+            if hasDate3 is False or freq is None:
+                raise FinError("ACT_ACT_ICMA requires three dates and a freq")
+
+        if self._type == FinDayCountTypes.ACT_365L:
+            if hasDate3 is False and freq == 1:
+                raise FinError("ACT_365L annual requires period end dates")
+
+        isTerminationDate = np.broadcast_to(
+            np.asarray(isTerminationDate, dtype=np.bool_), serials1.shape)
+
+        return _yearFracs(self._type.value, serials1, serials2, serials3,
+                          hasDate3, freq, isTerminationDate)
+
 ###############################################################################
 
     def __repr__(self):
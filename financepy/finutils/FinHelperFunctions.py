@@ -4,9 +4,11 @@
 
 import sys
 import numpy as np
+from enum import Enum
 from numba import njit, float64
 from typing import Union
 from .FinDate import FinDate
+from .FinDateArray import FinDateArray
 from .FinGlobalVariables import gDaysInYear, gSmall
 from .FinError import FinError
 from .FinDayCount import FinDayCountTypes, FinDayCount
@@ -65,7 +67,9 @@ def timesFromDates(dt: FinDate,
     ''' If a single date is passed in then return the year from valuation date
     but if a whole vector of dates is passed in then convert to a vector of
     times from the valuation date. The output is always a numpy vector of times
-    which has only one element if the input is only one date. '''
+    which has only one element if the input is only one date. A FinDateArray
+    or a NumPy array of integer Excel serial dates is converted to times in a
+    single vectorised operation. '''
 
     if isinstance(valuationDate, FinDate) is False:
         raise FinError("Valuation date is not a FinDate")
@@ -97,6 +101,22 @@ def timesFromDates(dt: FinDate,
 
         return np.array(times)
 
+    elif isinstance(dt, FinDateArray) or \
+        (isinstance(dt, np.ndarray) and np.issubdtype(dt.dtype, np.integer)):
+
+        if isinstance(dt, FinDateArray):
+            serials = dt._excelDates
+        else:
+            serials = dt
+
+        if dcCounter is None:
+            times = (serials - valuationDate._excelDate) / gDaysInYear
+        else:
+            startSerials = np.full(len(serials), valuationDate._excelDate)
+            times = dcCounter.yearFracs(startSerials, serials)
+
+        return times
+
     elif isinstance(dt, np.ndarray):
         raise FinError("You passed an ndarray instead of dates.")
     else:
@@ -359,7 +379,10 @@ def toUsableType(t):
 @njit(float64(float64, float64[:], float64[:]), fastmath=True, cache=True)
 def uniformToDefaultTime(u, t, v):
     ''' Fast mapping of a uniform random variable to a default time given a
-    survival probability curve. '''
+    survival probability curve. The survival probabilities do not increase
+    and so the interval containing u is found by a bisection search. If u
+    is below the last survival probability the default time is extrapolated
+    using the average hazard rate to the last grid time. '''
 
     if u == 0.0:
         return 99999.0
@@ -368,12 +391,23 @@ def uniformToDefaultTime(u, t, v):
         return 0.0
 
     numPoints = len(v)
-    index = 0
 
-    for i in range(1, numPoints):
-        if u <= v[i - 1] and u > v[i]:
-            index = i
-            break
+    # Find the first grid point after the first whose survival probability
+    # is below u. This interval then has v[index - 1] >= u > v[index].
+    lo = 1
+    hi = numPoints
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if v[mid] < u:
+            hi = mid
+        else:
+            lo = mid + 1
+
+    if lo == numPoints:
+        index = 0
+    else:
+        index = lo
 
     if index == numPoints + 1:
         t1 = t[numPoints - 1]
@@ -439,21 +473,103 @@ def accruedTree(gridTimes: np.ndarray,
 ###############################################################################
 
 
+class FinArgumentCheckTypes(Enum):
+    STRICT = 1  # Check the argument types on every call
+    FIRST_CALL_ONLY = 2  # Only check the first call to each function
+    OFF = 3  # Do not check argument types at all
+
+###############################################################################
+# The argument check mode applies to every call to checkArgumentTypes. The
+# usable types of each function's annotations are only worked out once and
+# are then stored in a dictionary keyed on the function.
+###############################################################################
+
+gArgumentCheckType = FinArgumentCheckTypes.STRICT
+gArgumentValidators = {}
+gCheckedFunctions = set()
+
+###############################################################################
+
+
+def setArgumentCheckType(argumentCheckType: FinArgumentCheckTypes):
+    ''' Set how checkArgumentTypes validates the arguments of functions. Use
+    OFF or FIRST_CALL_ONLY in production batch runs where the inputs have
+    already been validated and the cost of checking them matters. '''
+
+    global gArgumentCheckType
+
+    if argumentCheckType not in FinArgumentCheckTypes:
+        raise FinError("Need to pass a FinArgumentCheckTypes.")
+
+    gArgumentCheckType = argumentCheckType
+    gCheckedFunctions.clear()
+
+###############################################################################
+
+
+def getArgumentCheckType():
+    ''' Return the current argument check mode. '''
+    return gArgumentCheckType
+
+###############################################################################
+
+
+def _argumentValidator(func):
+    ''' Return a tuple of the argument names of a function together with the
+    types that can be passed to isinstance, building it on the first call. '''
+
+    key = getattr(func, "__func__", func)
+    validator = gArgumentValidators.get(key)
+
+    if validator is None:
+        validator = tuple((valueName, toUsableType(annotationType))
+                          for valueName, annotationType
+                          in func.__annotations__.items())
+        gArgumentValidators[key] = validator
+
+    return validator
+
+###############################################################################
+
+
+def _typeName(usableType):
+    ''' Name of a type or of a tuple of types for use in error messages. '''
+
+    if isinstance(usableType, tuple):
+        return " or ".join(_typeName(t) for t in usableType)
+
+    return usableType.__name__
+
+###############################################################################
+
+
 def checkArgumentTypes(func, values):
     ''' Check that all values passed into a function are of the same type
     as the function annotations. If a value has not been annotated, it
-    will not be checked. '''
-    for valueName, annotationType in func.__annotations__.items():
+    will not be checked. How often the check is done depends on the argument
+    check mode which is set using setArgumentCheckType. '''
+
+    if gArgumentCheckType == FinArgumentCheckTypes.OFF:
+        return
+
+    if gArgumentCheckType == FinArgumentCheckTypes.FIRST_CALL_ONLY:
+        key = getattr(func, "__func__", func)
+        if key in gCheckedFunctions:
+            return
+
+    for valueName, usableType in _argumentValidator(func):
         value = values[valueName]
-        usableType = toUsableType(annotationType)
         if(not isinstance(value, usableType)):
 
             print("==>", value, type(value), usableType,
                   isinstance(value, usableType))
             s = f"In {func.__module__}.{func.__name__}:\n"
             s += f"Mismatched Types: expected a "
-            s += f"{valueName} of type '{usableType.__name__}', however"
+            s += f"{valueName} of type '{_typeName(usableType)}', however"
             s += f" a value of type '{type(value).__name__}' was given."
             raise FinError(s)
 
+    if gArgumentCheckType == FinArgumentCheckTypes.FIRST_CALL_ONLY:
+        gCheckedFunctions.add(key)
+
 ###############################################################################
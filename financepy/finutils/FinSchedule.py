@@ -3,6 +3,9 @@
 ##############################################################################
 
 
+import numpy as np
+from collections import OrderedDict
+
 from .FinError import FinError
 from .FinDate import FinDate
 from .FinCalendar import (FinCalendar, FinCalendarTypes)
@@ -14,6 +17,130 @@ from .FinHelperFunctions import checkArgumentTypes
 ###############################################################################
 
 
+class FinScheduleCache():
+    ''' A least recently used cache of generated schedules. Trades that are
+    booked on the same terms share the same schedule so it only needs to be
+    generated once. Each entry holds a tuple of the FinDates and a read-only
+    NumPy array of their Excel serial dates which are shared by every object
+    that uses the schedule. The number of hits and misses is recorded. '''
+
+    def __init__(self,
+                 maxSize: int = 10000):
+        ''' Create an empty cache that holds up to maxSize schedules. '''
+
+        if maxSize < 0:
+            raise FinError("Cache size cannot be negative.")
+
+        self._maxSize = maxSize
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    ###########################################################################
+
+    def get(self,
+            key):
+        ''' Return the tuple of schedule dates stored for the key or None if
+        the schedule has not been generated before. '''
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    ###########################################################################
+
+    def getSerials(self,
+                   key):
+        ''' Return the read-only array of Excel serial dates stored for the
+        key or None if the schedule is not in the cache. This does not change
+        the hit and miss counts. '''
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        return entry[1]
+
+    ###########################################################################
+
+    def add(self,
+            key,
+            dates: list):
+        ''' Store the schedule dates for the key, removing the least recently
+        used schedule if the cache is full. '''
+
+        if self._maxSize == 0:
+            return
+
+        dates = tuple(dates)
+        serials = np.array([dt._excelDate for dt in dates], dtype=np.int32)
+        serials.flags.writeable = False
+
+        self._entries[key] = (dates, serials)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._maxSize:
+            self._entries.popitem(last=False)
+
+    ###########################################################################
+
+    def setMaxSize(self,
+                   maxSize: int):
+        ''' Change the maximum number of schedules held in the cache. '''
+
+        if maxSize < 0:
+            raise FinError("Cache size cannot be negative.")
+
+        self._maxSize = maxSize
+
+        while len(self._entries) > self._maxSize:
+            self._entries.popitem(last=False)
+
+    ###########################################################################
+
+    def clear(self):
+        ''' Remove all schedules from the cache and reset the counters. '''
+
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+    ###########################################################################
+
+    def __len__(self):
+        return len(self._entries)
+
+    ###########################################################################
+
+    def __repr__(self):
+        s = labelToString("MAX SIZE", self._maxSize)
+        s += labelToString("SIZE", len(self._entries))
+        s += labelToString("HITS", self._hits)
+        s += labelToString("MISSES", self._misses, "")
+        return s
+
+    ###########################################################################
+
+    def _print(self):
+        print(self)
+
+###############################################################################
+# Schedules generated by FinSchedule and by the CDS contracts all share this
+# cache. The keys start with a label for the type of schedule.
+###############################################################################
+
+gScheduleCache = FinScheduleCache()
+
+###############################################################################
+
+
 class FinSchedule(object):
     ''' A Schedule is a vector of dates generated according to ISDA standard
     rules which starts on the next date after the start date and runs up to
@@ -46,8 +173,23 @@ class FinSchedule(object):
         self._adjustTerminationDate = adjustTerminationDate
         
         self._adjustedDates = None
-        
-        self._generate()
+
+        self._key = ("SCHEDULE",
+                     startDate._excelDate,
+                     endDate._excelDate,
+                     frequencyType,
+                     calendarType,
+                     busDayAdjustType,
+                     dateGenRuleType,
+                     adjustTerminationDate)
+
+        cachedDates = gScheduleCache.get(self._key)
+
+        if cachedDates is None:
+            self._generate()
+            gScheduleCache.add(self._key, self._adjustedDates)
+        else:
+            self._adjustedDates = list(cachedDates)
 
 ###############################################################################
 
@@ -59,6 +201,21 @@ class FinSchedule(object):
 
         return self._adjustedDates
 
+###############################################################################
+
+    def scheduleSerials(self):
+        ''' Returns a read-only array of the Excel serial dates of the
+        schedule. The array is shared by all schedules with the same terms. '''
+
+        serials = gScheduleCache.getSerials(self._key)
+
+        if serials is None:
+            serials = np.array([dt._excelDate for dt in self._adjustedDates],
+                               dtype=np.int32)
+            serials.flags.writeable = False
+
+        return serials
+
 ###############################################################################
 
     def _generate(self):
@@ -1,5 +1,6 @@
 from .FinCalendar import *
 from .FinDate import *
+from .FinDateArray import *
 from .FinDayCount import *
 from .FinFrequency import *
 from .FinGlobalVariables import *
@@ -0,0 +1,283 @@
+##############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+##############################################################################
+
+from enum import Enum
+from math import exp, log
+
+import numpy as np
+from numba import int64, float64, boolean
+from numba.experimental import jitclass
+
+from .FinInterpolate import _findIndex
+from ...finutils.FinGlobalVariables import gSmall
+from ...finutils.FinFrequency import FinFrequency
+
+###############################################################################
+
+
+class FinCompiledCurveTypes(Enum):
+    INTERPOLATED = 1
+    FLAT = 2
+    NELSON_SIEGEL = 3
+    NELSON_SIEGEL_SVENSSON = 4
+    PIECEWISE_FLAT = 5
+    PIECEWISE_LINEAR = 6
+    POLYNOMIAL = 7
+
+###############################################################################
+
+gINTERPOLATED = FinCompiledCurveTypes.INTERPOLATED.value
+gFLAT = FinCompiledCurveTypes.FLAT.value
+gNELSON_SIEGEL = FinCompiledCurveTypes.NELSON_SIEGEL.value
+gNELSON_SIEGEL_SVENSSON = FinCompiledCurveTypes.NELSON_SIEGEL_SVENSSON.value
+gPIECEWISE_FLAT = FinCompiledCurveTypes.PIECEWISE_FLAT.value
+gPIECEWISE_LINEAR = FinCompiledCurveTypes.PIECEWISE_LINEAR.value
+gPOLYNOMIAL = FinCompiledCurveTypes.POLYNOMIAL.value
+
+###############################################################################
+
+spec = [
+    ('_curveType', int64),
+    ('_times', float64[::1]),
+    ('_coeffs', float64[:, ::1]),
+    ('_values', float64[::1]),
+    ('_params', float64[::1]),
+    ('_frequency', int64),
+    ('_hasSurvivalCurve', boolean),
+    ('_survTimes', float64[::1]),
+    ('_survCoeffs', float64[:, ::1])
+]
+
+###############################################################################
+
+
+@jitclass(spec)
+class FinCompiledCurve(object):
+    ''' A Numba representation of a discount curve that can be passed into
+    and used inside Numba compiled functions. It is created by calling the
+    compiled() method of a curve object. All of the methods take times in
+    years measured from the curve valuation date using the curve day count
+    convention, as is done by the _df function of the curve.
+
+    An interpolated curve is stored as its grid times and the precomputed
+    interpolation coefficients on each grid interval. The other curve types
+    store their zero rate parameters along with the compounding frequency of
+    the zero rates. A curve built from CDS contracts also has a grid of
+    survival probabilities. Otherwise the survival probability is equal to
+    the discount factor as is the case for FinDiscountCurve. '''
+
+    def __init__(self,
+                 curveType,
+                 times,
+                 coeffs,
+                 values,
+                 params,
+                 frequency,
+                 hasSurvivalCurve,
+                 survTimes,
+                 survCoeffs):
+        ''' Create the compiled curve. Use the compiled() method of a curve
+        object rather than calling this directly. '''
+
+        self._curveType = curveType
+        self._times = times
+        self._coeffs = coeffs
+        self._values = values
+        self._params = params
+        self._frequency = frequency
+        self._hasSurvivalCurve = hasSurvivalCurve
+        self._survTimes = survTimes
+        self._survCoeffs = survCoeffs
+
+    ###########################################################################
+
+    def _zeroRate(self, t):
+        ''' The zero rate of a parametric curve at time t. This has the
+        compounding frequency of the curve. '''
+
+        curveType = self._curveType
+        p = self._params
+
+        if curveType == gFLAT:
+
+            return p[0]
+
+        elif curveType == gNELSON_SIEGEL:
+
+            theta = t / p[3]
+            e = exp(-theta)
+            zeroRate = p[0]
+            zeroRate += p[1] * (1.0 - e) / theta
+            zeroRate += p[2] * ((1.0 - e) / theta - e)
+            return zeroRate
+
+        elif curveType == gNELSON_SIEGEL_SVENSSON:
+
+            theta1 = t / p[4]
+            theta2 = t / p[5]
+            e1 = exp(-theta1)
+            e2 = exp(-theta2)
+            zeroRate = p[0]
+            zeroRate += p[1] * (1.0 - e1) / theta1
+            zeroRate += p[2] * ((1.0 - e1) / theta1 - e1)
+            zeroRate += p[3] * ((1.0 - e2) / theta2 - e2)
+            return zeroRate
+
+        elif curveType == gPOLYNOMIAL:
+
+            zeroRate = 0.0
+            tn = 1.0
+            for n in range(0, len(p)):
+                zeroRate += p[n] * tn
+                tn *= t
+            return zeroRate
+
+        # The piecewise curves use the interval that starts at the last grid
+        # time that is not after t and use the last rate after the grid
+        times = self._times
+        rates = self._values
+        numTimes = len(times)
+
+        i = np.searchsorted(times, t, side='right')
+
+        if i >= numTimes or numTimes == 1:
+            return rates[numTimes - 1]
+
+        if i < 1:
+            i = 1
+
+        if curveType == gPIECEWISE_FLAT:
+            return rates[i - 1]
+
+        t0 = times[i - 1]
+        t1 = times[i]
+        return ((t1 - t) * rates[i - 1] + (t - t0) * rates[i]) / (t1 - t0)
+
+    ###########################################################################
+
+    def df(self, t):
+        ''' Discount factor at time t in years from the valuation date. '''
+
+        if self._curveType == gINTERPOLATED:
+            i = _findIndex(t, self._times)
+            c = self._coeffs
+            u = t - c[i, 0]
+            return exp(c[i, 1] + u * (c[i, 2] + u * c[i, 3]))
+
+        # The piecewise linear curve floors the time used for its zero rate
+        # at a larger value than is used by the other curves
+        if self._curveType == gPIECEWISE_LINEAR:
+            r = self._zeroRate(max(t, 1e-6))
+        else:
+            r = self._zeroRate(max(t, gSmall))
+
+        t = max(t, gSmall)
+
+        if self._frequency == -1:
+            return exp(-r * t)
+        elif self._frequency == 0:
+            return 1.0 / (1.0 + r * t)
+        else:
+            f = self._frequency
+            return (1.0 + r / f) ** (-f * t)
+
+    ###########################################################################
+
+    def dfs(self, times):
+        ''' Discount factors at a vector of times. '''
+
+        n = len(times)
+        values = np.empty(n)
+        for i in range(0, n):
+            values[i] = self.df(times[i])
+        return values
+
+    ###########################################################################
+
+    def zero(self, t):
+        ''' Continuously compounded zero rate to time t. '''
+
+        t = max(t, gSmall)
+        return -log(self.df(t)) / t
+
+    ###########################################################################
+
+    def fwd(self, t):
+        ''' Continuously compounded instantaneous forward rate at time t. It
+        is calculated in the same way as the _fwd function of the curve by
+        perturbing the time on either side of t. '''
+
+        dt = 1e-6
+        t = max(t, dt)
+        df1 = self.df(t - dt)
+        df2 = self.df(t + dt)
+        return log(df1 / df2) / (2.0 * dt)
+
+    ###########################################################################
+
+    def survProb(self, t):
+        ''' Survival probability to time t. If the curve has no survival
+        probabilities then this is the discount factor. '''
+
+        if not self._hasSurvivalCurve:
+            return self.df(t)
+
+        i = _findIndex(t, self._survTimes)
+        c = self._survCoeffs
+        u = t - c[i, 0]
+        return exp(c[i, 1] + u * (c[i, 2] + u * c[i, 3]))
+
+    ###########################################################################
+
+    def survProbs(self, times):
+        ''' Survival probabilities at a vector of times. '''
+
+        n = len(times)
+        values = np.empty(n)
+        for i in range(0, n):
+            values[i] = self.survProb(times[i])
+        return values
+
+###############################################################################
+
+
+def _compileCurve(curveType: FinCompiledCurveTypes,
+                  times: np.ndarray = None,
+                  coeffs: np.ndarray = None,
+                  values: np.ndarray = None,
+                  params: (list, np.ndarray) = None,
+                  frequencyType=None,
+                  survTimes: np.ndarray = None,
+                  survCoeffs: np.ndarray = None):
+    ''' Create a FinCompiledCurve filling in empty arrays for the fields that
+    are not used by the curve type. '''
+
+    def vector(x):
+        if x is None:
+            return np.zeros(0)
+        return np.ascontiguousarray(x, dtype=np.float64)
+
+    def matrix(x):
+        if x is None:
+            return np.zeros((0, 4))
+        return np.ascontiguousarray(x, dtype=np.float64)
+
+    if frequencyType is None:
+        frequency = -1
+    else:
+        frequency = FinFrequency(frequencyType)
+
+    hasSurvivalCurve = survTimes is not None
+
+    return FinCompiledCurve(curveType.value,
+                            vector(times),
+                            matrix(coeffs),
+                            vector(values),
+                            vector(params),
+                            frequency,
+                            hasSurvivalCurve,
+                            vector(survTimes),
+                            matrix(survCoeffs))
+
+###############################################################################
@@ -6,8 +6,12 @@
 import numpy as np
 
 from .FinInterpolate import interpolate, FinInterpTypes
+from .FinInterpolate import _interpolationCoeffs, _vinterpolateCoeffs
+from .FinCompiledCurve import FinCompiledCurveTypes, _compileCurve
+from .FinDiscountCurveSet import FinDiscountCurveSet
 
 from ...finutils.FinDate import FinDate
+from ...finutils.FinDateArray import FinDateArray
 from ...finutils.FinError import FinError
 from ...finutils.FinGlobalVariables import gDaysInYear, gSmall
 from ...finutils.FinFrequency import FinFrequency, FinFrequencyTypes
@@ -227,7 +231,7 @@ class FinDiscountCurve():
                                    maturityDt,
                                    frequencyType)
 
-            flowDates = schedule._generate()
+            flowDates = schedule.scheduleDates()
 
             dayCounter = FinDayCount(dayCountType)
             prevDt = flowDates[0]
@@ -256,9 +260,12 @@ class FinDiscountCurve():
 ###############################################################################
 
     def df(self,
-           dt: (list, FinDate)):
+           dt: (list, FinDate, FinDateArray, np.ndarray)):
         ''' Function to calculate a discount factor from a date or a
-        vector of dates. '''
+        vector of dates. The dates can also be a FinDateArray or a NumPy array
+        of integer Excel serial dates in which case the times are computed in
+        one vectorised step and all of the discount factors are interpolated
+        in a single Numba call. '''
 
         times = timesFromDates(dt, self._valuationDate, self._dayCountType)
         dfs = self._df(times)
@@ -275,6 +282,11 @@ class FinDiscountCurve():
         ''' Hidden function to calculate a discount factor from a time or a
         vector of times. Discourage usage in favour of passing in dates. '''
 
+        if type(t) is np.ndarray:
+            coeffs = self._interpolationCoeffs()
+            df = _vinterpolateCoeffs(t, self._coeffsTimes, coeffs)
+            return df
+
         df = interpolate(t,
                          self._times,
                          self._dfValues,
@@ -282,6 +294,43 @@ class FinDiscountCurve():
         
         return df
 
+###############################################################################
+
+    def _interpolationCoeffs(self):
+        ''' Return the coefficients of the interpolation on each interval of
+        the curve grid. These are stored on the curve and only recalculated if
+        the grid times, discount factors or interpolation scheme change. '''
+
+        method = self._interpType.value
+        coeffs = getattr(self, "_coeffs", None)
+
+        if coeffs is not None:
+            if self._coeffsMethod == method and \
+                np.array_equal(self._coeffsTimes, self._times) and \
+                    np.array_equal(self._coeffsDfs, self._dfValues):
+                return coeffs
+
+        self._coeffsTimes = np.array(self._times, dtype=np.float64)
+        self._coeffsDfs = np.array(self._dfValues, dtype=np.float64)
+        self._coeffsMethod = method
+        self._coeffs = _interpolationCoeffs(self._coeffsTimes,
+                                            self._coeffsDfs,
+                                            method)
+        return self._coeffs
+
+###############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve with the grid and interpolation of this
+        curve which can be passed into Numba compiled functions. It takes
+        times in years from the valuation date as used by the _df function.
+        It is a snapshot so it must be recreated if the curve changes. '''
+
+        coeffs = self._interpolationCoeffs()
+        return _compileCurve(FinCompiledCurveTypes.INTERPOLATED,
+                             times=self._coeffsTimes,
+                             coeffs=coeffs)
+
 ###############################################################################
 
     def survProb(self,
@@ -364,6 +413,78 @@ class FinDiscountCurve():
 
         return discCurve
 
+###############################################################################
+
+    def bumpMany(self,
+                 bumpSizes: (float, list, np.ndarray),
+                 keyTimes: (list, np.ndarray) = None):
+        ''' Return a FinDiscountCurveSet of bumped copies of this curve that
+        can be used to value many scenarios in one pass. Each bump is a shift
+        in the continuously compounded zero rate at the grid times of the
+        curve and the interpolation scheme is unchanged. The bumps are given
+        in one of three ways:
+
+        1) A vector of bump sizes gives one parallel shift per scenario.
+        2) A matrix of bump sizes with one row per scenario and one column per
+        grid time gives bumps of any shape.
+        3) A single bump size and a vector of key times gives one key rate
+        scenario per key time. The bump at a grid time is the bump size times
+        a triangular weight that is one at the key time and falls to zero at
+        the neighbouring key times. The weights are flat before the first key
+        time and after the last so the scenarios add up to a parallel shift.
+        '''
+
+        # Curves such as FinDiscountCurvePWF have a grid of times but do not
+        # interpolate a grid of discount factors so they cannot be bumped
+        if hasattr(self, "_times") is False or \
+                hasattr(self, "_dfValues") is False:
+            raise FinError("Curve does not have a grid of discount factors "
+                           "to bump.")
+
+        times = np.array(self._times, dtype=np.float64)
+        dfValues = np.array(self._dfValues, dtype=np.float64)
+        numTimes = len(times)
+
+        if keyTimes is not None:
+
+            if isinstance(bumpSizes, (list, np.ndarray)):
+                raise FinError("Key rate bumps need a single bump size.")
+
+            keyTimes = np.array(keyTimes, dtype=np.float64)
+
+            if testMonotonicity(keyTimes) is False:
+                raise FinError("Key times are not in increasing order.")
+
+            numKeys = len(keyTimes)
+            bumps = np.zeros((numKeys, numTimes))
+
+            for k in range(0, numKeys):
+                unitBump = np.zeros(numKeys)
+                unitBump[k] = bumpSizes
+                bumps[k] = np.interp(times, keyTimes, unitBump)
+
+        else:
+
+            bumps = np.array(bumpSizes, dtype=np.float64)
+
+            if bumps.ndim == 0:
+                bumps = bumps.reshape(1)
+
+            if bumps.ndim == 1:
+                bumps = np.outer(bumps, np.ones(numTimes))
+            elif bumps.ndim != 2 or bumps.shape[1] != numTimes:
+                raise FinError("Bump matrix needs one column per grid time.")
+
+        dfMatrix = dfValues * np.exp(-bumps * times)
+
+        curveSet = FinDiscountCurveSet(self._valuationDate,
+                                       times,
+                                       dfMatrix,
+                                       self._interpType,
+                                       self._dayCountType)
+
+        return curveSet
+
 ###############################################################################
 
     def fwdRate(self,
@@ -13,6 +13,8 @@ from ...finutils.FinFrequency import FinFrequencyTypes
 from ...finutils.FinHelperFunctions import labelToString
 from ...finutils.FinHelperFunctions import checkArgumentTypes
 from ...market.curves.FinDiscountCurve import FinDiscountCurve
+from ...market.curves.FinCompiledCurve import FinCompiledCurveTypes
+from ...market.curves.FinCompiledCurve import _compileCurve
 from ...finutils.FinHelperFunctions import timesFromDates
 from ...market.curves.FinInterpolate import FinInterpTypes
 
@@ -100,6 +102,17 @@ class FinDiscountCurveFlat(FinDiscountCurve):
         else:
             return np.array(dfs)
 
+###############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve with the parameters of this curve which
+        can be passed into Numba compiled functions. Its times are measured
+        using the curve day count convention. '''
+
+        return _compileCurve(FinCompiledCurveTypes.FLAT,
+                             params=[float(self._flatRate)],
+                             frequencyType=self._frequencyType)
+
 ###############################################################################
 
     def __repr__(self):
@@ -9,6 +9,8 @@ from ...finutils.FinFrequency import FinFrequencyTypes
 from ...finutils.FinGlobalVariables import gSmall
 from ...finutils.FinError import FinError
 from ...market.curves.FinDiscountCurve import FinDiscountCurve
+from ...market.curves.FinCompiledCurve import FinCompiledCurveTypes
+from ...market.curves.FinCompiledCurve import _compileCurve
 from ...finutils.FinHelperFunctions import checkArgumentTypes
 from ...finutils.FinHelperFunctions import labelToString
 from ...finutils.FinDayCount import FinDayCountTypes
@@ -134,6 +136,18 @@ class FinDiscountCurveNS(FinDiscountCurve):
 
         return df
 
+###############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve with the parameters of this curve which
+        can be passed into Numba compiled functions. Its times are measured
+        using the curve day count convention. '''
+
+        return _compileCurve(FinCompiledCurveTypes.NELSON_SIEGEL,
+                             params=[self._beta0, self._beta1, self._beta2,
+                                     self._tau],
+                             frequencyType=self._frequencyType)
+
 ###############################################################################
 
     def __repr__(self):
@@ -10,6 +10,8 @@ from ...finutils.FinGlobalVariables import gSmall
 from ...finutils.FinHelperFunctions import labelToString
 from ...finutils.FinError import FinError
 from ...market.curves.FinDiscountCurve import FinDiscountCurve
+from ...market.curves.FinCompiledCurve import FinCompiledCurveTypes
+from ...market.curves.FinCompiledCurve import _compileCurve
 from ...finutils.FinHelperFunctions import checkArgumentTypes
 from ...finutils.FinDayCount import FinDayCountTypes
 from ...finutils.FinHelperFunctions import timesFromDates
@@ -153,6 +155,18 @@ class FinDiscountCurveNSS(FinDiscountCurve):
         else:
             return df
 
+###############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve with the parameters of this curve which
+        can be passed into Numba compiled functions. Its times are measured
+        using the curve day count convention. '''
+
+        return _compileCurve(FinCompiledCurveTypes.NELSON_SIEGEL_SVENSSON,
+                             params=[self._beta0, self._beta1, self._beta2,
+                                     self._beta3, self._tau1, self._tau2],
+                             frequencyType=self._frequencyType)
+
 ###############################################################################
 
     def __repr__(self):
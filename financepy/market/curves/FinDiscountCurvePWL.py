@@ -14,6 +14,8 @@ from ...finutils.FinHelperFunctions import checkArgumentTypes
 from ...finutils.FinDayCount import FinDayCountTypes
 from ...finutils.FinHelperFunctions import timesFromDates
 from ...market.curves.FinDiscountCurve import FinDiscountCurve
+from ...market.curves.FinCompiledCurve import FinCompiledCurveTypes
+from ...market.curves.FinCompiledCurve import _compileCurve
 
 ###############################################################################
 
@@ -135,6 +137,18 @@ class FinDiscountCurvePWL(FinDiscountCurve):
     #     df = zeroToDf(r, t, self._frequencyType)
     #     return df
 
+###############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve with the parameters of this curve which
+        can be passed into Numba compiled functions. Its times are measured
+        using the curve day count convention. '''
+
+        return _compileCurve(FinCompiledCurveTypes.PIECEWISE_LINEAR,
+                             times=self._times,
+                             values=self._zeroRates,
+                             frequencyType=self._frequencyType)
+
 ###############################################################################
 
     def __repr__(self):
@@ -9,6 +9,8 @@ from ...finutils.FinError import FinError
 from ...finutils.FinGlobalVariables import gSmall
 from ...finutils.FinHelperFunctions import labelToString
 from ...market.curves.FinDiscountCurve import FinDiscountCurve
+from ...market.curves.FinCompiledCurve import FinCompiledCurveTypes
+from ...market.curves.FinCompiledCurve import _compileCurve
 from ...finutils.FinHelperFunctions import checkArgumentTypes
 from ...finutils.FinFrequency import FinFrequencyTypes
 from ...finutils.FinDayCount import FinDayCountTypes
@@ -121,6 +123,17 @@ class FinDiscountCurvePoly(FinDiscountCurve):
 
         return dfs
 
+###############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve with the parameters of this curve which
+        can be passed into Numba compiled functions. Its times are measured
+        using the curve day count convention. '''
+
+        return _compileCurve(FinCompiledCurveTypes.POLYNOMIAL,
+                             params=self._coefficients,
+                             frequencyType=self._frequencyType)
+
 ###############################################################################
 
     def __repr__(self):
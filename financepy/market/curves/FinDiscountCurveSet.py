@@ -0,0 +1,130 @@
+##############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+##############################################################################
+
+import numpy as np
+
+from .FinInterpolate import FinInterpTypes, _vinterpolateMany
+
+from ...finutils.FinDate import FinDate
+from ...finutils.FinDateArray import FinDateArray
+from ...finutils.FinError import FinError
+from ...finutils.FinHelperFunctions import checkArgumentTypes
+from ...finutils.FinHelperFunctions import timesFromDates
+from ...finutils.FinHelperFunctions import labelToString
+
+###############################################################################
+
+
+class FinDiscountCurveSet():
+    ''' A set of discount curve scenarios which share the same valuation date,
+    grid times and interpolation scheme. The discount factors are held in a
+    matrix with one row per scenario and one column per grid time. Asking for
+    the discount factor to a date returns a vector with one value for each
+    scenario so that a product whose valuation only does arithmetic on the
+    discount factors can value all of the scenarios in one pass. This is
+    usually created by calling bumpMany on a FinDiscountCurve. '''
+
+###############################################################################
+
+    def __init__(self,
+                 valuationDate: FinDate,
+                 times: np.ndarray,
+                 dfMatrix: np.ndarray,
+                 interpType: FinInterpTypes = FinInterpTypes.FLAT_FORWARDS,
+                 dayCountType=None):
+        ''' Create the set of curves from a vector of grid times in years and
+        a matrix of discount factors with one row per scenario. The day count
+        type is used to convert dates to times and is None for curves whose
+        times are measured in years of 365 days. '''
+
+        checkArgumentTypes(self.__init__, locals())
+
+        times = np.array(times, dtype=np.float64)
+        dfMatrix = np.array(dfMatrix, dtype=np.float64)
+
+        if dfMatrix.ndim == 1:
+            dfMatrix = dfMatrix.reshape((1, len(dfMatrix)))
+
+        if dfMatrix.ndim != 2:
+            raise FinError("Discount factor matrix must be two-dimensional.")
+
+        if dfMatrix.shape[1] != len(times):
+            raise FinError("Matrix must have one column for each grid time.")
+
+        self._valuationDate = valuationDate
+        self._times = times
+        self._dfMatrix = dfMatrix
+        self._interpType = interpType
+        self._dayCountType = dayCountType
+
+###############################################################################
+
+    def numScenarios(self):
+        ''' The number of curve scenarios in the set. '''
+        return self._dfMatrix.shape[0]
+
+###############################################################################
+
+    def df(self,
+           dt: (list, FinDate, FinDateArray, np.ndarray)):
+        ''' Discount factors to a date or a vector of dates for all of the
+        scenarios. A single date returns a vector of discount factors, one for
+        each scenario. A vector of dates returns a matrix with one row per
+        scenario and one column per date. '''
+
+        times = timesFromDates(dt, self._valuationDate, self._dayCountType)
+        return self._df(times)
+
+###############################################################################
+
+    def _df(self,
+            t: (float, np.ndarray)):
+        ''' Hidden function to calculate the discount factors for all of the
+        scenarios from a time or a vector of times. '''
+
+        if isinstance(t, np.ndarray):
+            times = np.ascontiguousarray(t, dtype=np.float64)
+            return _vinterpolateMany(times,
+                                     self._times,
+                                     self._dfMatrix,
+                                     self._interpType.value)
+
+        times = np.array([t], dtype=np.float64)
+        dfs = _vinterpolateMany(times,
+                                self._times,
+                                self._dfMatrix,
+                                self._interpType.value)
+        return dfs[:, 0]
+
+###############################################################################
+
+    def survProb(self,
+                 dt: FinDate):
+        ''' Survival probabilities for all of the scenarios. As for the
+        FinDiscountCurve these are the discount factors. '''
+
+        return self.df(dt)
+
+###############################################################################
+
+    def __len__(self):
+        return self._dfMatrix.shape[0]
+
+###############################################################################
+
+    def __repr__(self):
+        s = labelToString("OBJECT TYPE", type(self).__name__)
+        s += labelToString("VALUATION DATE", self._valuationDate)
+        s += labelToString("INTERP TYPE", self._interpType)
+        s += labelToString("NUM SCENARIOS", self._dfMatrix.shape[0])
+        s += labelToString("NUM GRID TIMES", len(self._times))
+        return s
+
+###############################################################################
+
+    def _print(self):
+        ''' Simple print function for backward compatibility. '''
+        print(self)
+
+###############################################################################
@@ -42,13 +42,54 @@ def interpolate(t: (float, np.ndarray),  # time or array of times
 ###############################################################################
 
 
-@njit(float64(float64, float64[:], float64[:], int64),
+@njit(int64(float64, float64[:]), fastmath=True, cache=True, nogil=True)
+def _findIndex(t, times):
+    ''' Bisection search for the index of the first grid time that is not
+    less than t. This is the index of the grid point at the end of the
+    interval that contains t. If t is after the last grid time then the
+    number of grid points is returned to indicate extrapolation. '''
+
+    lo = 0
+    hi = times.size
+
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if times[mid] < t:
+            lo = mid + 1
+        else:
+            hi = mid
+
+    return lo
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _isSorted(xValues):
+    ''' Return True if the values are in non-decreasing order. '''
+
+    for i in range(1, xValues.size):
+        if xValues[i] < xValues[i-1]:
+            return False
+
+    return True
+
+###############################################################################
+
+
+@njit(float64(float64, int64, float64[:], float64[:], int64),
       fastmath=True, cache=True, nogil=True)
-def _uinterpolate(t, times, dfs, method):
-    ''' Return the interpolated value of y given x and a vector of x and y.
-    The values of x must be monotonic and increasing. The different schemes for
-    interpolation are linear in y (as a function of x), linear in log(y) and
-    piecewise flat in the continuously compounded forward y rate. '''
+def _uinterpolateIndex(t, i, times, dfs, method):
+    ''' Return the interpolated value of y at x = t given the index i of the
+    grid point at the end of the interval containing t. An index equal to the
+    number of grid points means that t is beyond the last grid time. An index
+    of zero means that t is before the first grid time. There the zero rate of
+    the first grid point is kept flat as it is by _interpolationCoeffs. '''
+
+    if i == 0:
+        if times[0] > 0.0:
+            return exp(log(dfs[0]) * t / times[0])
+        return dfs[0]
 
     if method == FinInterpTypes.LINEAR_SWAP_RATES.value:
         method = FinInterpTypes.FLAT_FORWARDS.value
@@ -56,16 +97,6 @@ def _uinterpolate(t, times, dfs, method):
     small = 1e-10
     numPoints = times.size
 
-    if t == times[0]:
-        return dfs[0]
-
-    i = 0
-    while times[i] < t and i < numPoints - 1:
-        i = i + 1
-
-    if t > times[i]:
-        i = numPoints
-
     yvalue = 0.0
 
     ###########################################################################
@@ -148,6 +179,24 @@ def _uinterpolate(t, times, dfs, method):
 
 ###############################################################################
 
+
+@njit(float64(float64, float64[:], float64[:], int64),
+      fastmath=True, cache=True, nogil=True)
+def _uinterpolate(t, times, dfs, method):
+    ''' Return the interpolated value of y given x and a vector of x and y.
+    The values of x must be monotonic and increasing. The different schemes for
+    interpolation are linear in y (as a function of x), linear in log(y) and
+    piecewise flat in the continuously compounded forward y rate. '''
+
+    if t == times[0]:
+        return dfs[0]
+
+    i = _findIndex(t, times)
+
+    return _uinterpolateIndex(t, i, times, dfs, method)
+
+###############################################################################
+
 @njit(float64[:](float64[:], float64[:], float64[:], int64),
       fastmath=True, cache=True, nogil=True)
 def _vinterpolate(xValues,
@@ -161,8 +210,217 @@ def _vinterpolate(xValues,
 
     n = xValues.size
     yvalues = np.empty(n)
+
+    if not _isSorted(xValues):
+        for i in range(0, n):
+            yvalues[i] = _uinterpolate(xValues[i], xvector, dfs, method)
+        return yvalues
+
+    # When the x values are increasing we walk through the grid alongside
+    # them so the total cost is linear in the number of grid and x values
+    numPoints = xvector.size
+    j = 0
+
     for i in range(0, n):
-        yvalues[i] = _uinterpolate(xValues[i], xvector, dfs, method)
+
+        t = xValues[i]
+
+        if t == xvector[0]:
+            yvalues[i] = dfs[0]
+            continue
+
+        while j < numPoints and xvector[j] < t:
+            j += 1
+
+        yvalues[i] = _uinterpolateIndex(t, j, xvector, dfs, method)
+
+    return yvalues
+
+###############################################################################
+
+
+@njit(float64[:, :](float64[:], float64[:], int64),
+      fastmath=True, cache=True, nogil=True)
+def _interpolationCoeffs(times, dfs, method):
+    ''' Precompute the coefficients of the interpolation on each interval of
+    the grid. For all of the schemes the log of the discount factor is at most
+    quadratic in time on each interval so we store for each interval the time
+    at its start and the coefficients c0, c1 and c2 such that
+
+        log(y(t)) = c0 + c1 * u + c2 * u * u where u = t - start time.
+
+    Row i holds the interval that ends at grid point i so row 0 is for times
+    before the first grid point and the last row is the extrapolation after
+    the last grid time. Before the first grid point the zero rate is flat. '''
+
+    if method == FinInterpTypes.LINEAR_SWAP_RATES.value:
+        method = FinInterpTypes.FLAT_FORWARDS.value
+
+    small = 1e-10
+    numPoints = times.size
+    coeffs = np.zeros((numPoints + 1, 4))
+
+    # Before the first grid point the zero rate is kept flat. If the first
+    # grid time is not positive then the discount factor is kept flat.
+    for i in range(0, numPoints + 1):
+        coeffs[i, 0] = times[0]
+        coeffs[i, 1] = log(dfs[0])
+
+    if times[0] > 0.0:
+        coeffs[0, 2] = log(dfs[0]) / times[0]
+
+    if numPoints == 1:
+        return coeffs
+
+    for i in range(1, numPoints + 1):
+
+        if i < numPoints:
+            t0 = times[i-1]
+            dt = times[i] - times[i-1]
+        else:
+            t0 = times[numPoints-1]
+            dt = times[numPoints-1] - times[numPoints-2]
+
+        c0 = 0.0
+        c1 = 0.0
+        c2 = 0.0
+
+        if method == FinInterpTypes.LINEAR_ZERO_RATES.value:
+
+            if i == 1:
+                r = -log(dfs[1]) / times[1]
+                c0 = -r * t0
+                c1 = -r
+            elif i < numPoints:
+                r1 = -log(dfs[i-1]) / times[i-1]
+                r2 = -log(dfs[i]) / times[i]
+                slope = (r2 - r1) / dt
+                c0 = -r1 * t0
+                c1 = -(r1 + slope * t0)
+                c2 = -slope
+            else:
+                r = -log(dfs[i-1]) / times[i-1]
+                c0 = -r * t0
+                c1 = -r
+
+        elif method == FinInterpTypes.FLAT_FORWARDS.value:
+
+            if i < numPoints:
+                rt1 = -log(dfs[i-1])
+                rt2 = -log(dfs[i])
+                c0 = -rt1
+            else:
+                rt1 = -log(dfs[i-2])
+                rt2 = -log(dfs[i-1])
+                c0 = -rt2
+
+            c1 = -(rt2 - rt1) / dt
+
+        elif method == FinInterpTypes.LINEAR_FORWARDS.value:
+
+            if i == 1:
+                k = -log(fabs(dfs[1]) + small) / (times[1] + small)
+                c0 = -k * t0
+                c1 = -k
+            elif i < numPoints:
+                fwd1 = -log(dfs[i-1]/dfs[i-2])/(times[i-1]-times[i-2])
+                fwd2 = -log(dfs[i]/dfs[i-1])/dt
+                c0 = log(dfs[i-1])
+                c1 = -fwd1
+                c2 = -(fwd2 - fwd1) / dt
+            else:
+                fwd = -log(dfs[i-1]/dfs[i-2])/dt
+                c0 = log(dfs[i-1])
+                c1 = -fwd
+
+        else:
+            raise FinError("Invalid interpolation scheme.")
+
+        coeffs[i, 0] = t0
+        coeffs[i, 1] = c0
+        coeffs[i, 2] = c1
+        coeffs[i, 3] = c2
+
+    return coeffs
+
+###############################################################################
+
+
+@njit(float64(float64, float64[:], float64[:, :]),
+      fastmath=True, cache=True, nogil=True)
+def _uinterpolateCoeffs(t, times, coeffs):
+    ''' Return the interpolated value at time t using the interval
+    coefficients precomputed by _interpolationCoeffs. '''
+
+    i = _findIndex(t, times)
+    u = t - coeffs[i, 0]
+    return exp(coeffs[i, 1] + u * (coeffs[i, 2] + u * coeffs[i, 3]))
+
+###############################################################################
+
+
+@njit(float64[:](float64[:], float64[:], float64[:, :]),
+      fastmath=True, cache=True, nogil=True)
+def _vinterpolateCoeffs(xValues, times, coeffs):
+    ''' Return the interpolated values at a vector of times using the
+    interval coefficients precomputed by _interpolationCoeffs. Increasing
+    times are handled by a single pass through the grid. '''
+
+    n = xValues.size
+    yvalues = np.empty(n)
+    numPoints = times.size
+    isSorted = _isSorted(xValues)
+    i = 0
+
+    for k in range(0, n):
+
+        t = xValues[k]
+
+        if isSorted:
+            while i < numPoints and times[i] < t:
+                i += 1
+        else:
+            i = _findIndex(t, times)
+
+        u = t - coeffs[i, 0]
+        yvalues[k] = exp(coeffs[i, 1] + u * (coeffs[i, 2] + u * coeffs[i, 3]))
+
+    return yvalues
+
+###############################################################################
+
+
+@njit(float64[:, :](float64[:], float64[:], float64[:, :], int64),
+      fastmath=True, cache=True, nogil=True)
+def _vinterpolateMany(xValues, times, dfMatrix, method):
+    ''' Return the interpolated values at a vector of times for each row of a
+    matrix of discount factors which share the same grid times. The row is
+    the scenario and the column is the grid point. The interval containing
+    each time is found once and used for all of the rows. '''
+
+    numScenarios = dfMatrix.shape[0]
+    n = xValues.size
+    numPoints = times.size
+    yvalues = np.empty((numScenarios, n))
+    isSorted = _isSorted(xValues)
+    i = 0
+
+    for k in range(0, n):
+
+        t = xValues[k]
+
+        if isSorted:
+            while i < numPoints and times[i] < t:
+                i += 1
+        else:
+            i = _findIndex(t, times)
+
+        for s in range(0, numScenarios):
+            if t == times[0]:
+                yvalues[s, k] = dfMatrix[s, 0]
+            else:
+                yvalues[s, k] = _uinterpolateIndex(t, i, times, dfMatrix[s],
+                                                   method)
 
     return yvalues
 
@@ -1,5 +1,7 @@
 from .FinInterpolate import *
+from .FinCompiledCurve import *
 from .FinDiscountCurve import *
+from .FinDiscountCurveSet import *
 from .FinDiscountCurveFlat import *
 from .FinDiscountCurveNS import *
 from .FinDiscountCurvePWF import *
@@ -2,15 +2,65 @@
 # Copyright (C) 2018, 2019, 2020 Dominic O'Kane
 ##############################################################################
 
-# TODO: Use Numba to speed this up more.
-
 import numpy as np
+from numba import njit, prange
 
+from ..finutils.FinError import FinError
 from ..finutils.FinMath import N
 from ..finutils.FinHelperFunctions import uniformToDefaultTime
 
 ###############################################################################
-# TODO:
+
+
+def _packSurvivalCurves(issuerCurves):
+    ''' Pack the survival curve grids of the issuers into flat arrays where
+    the grid of curve i runs from index starts[i] to starts[i+1]. '''
+
+    numCredits = len(issuerCurves)
+    starts = np.zeros(numCredits + 1, dtype=np.int64)
+
+    for iCredit in range(0, numCredits):
+        starts[iCredit + 1] = starts[iCredit] + \
+            len(issuerCurves[iCredit]._times)
+
+    times = np.concatenate([np.asarray(curve._times, np.float64)
+                            for curve in issuerCurves])
+    values = np.concatenate([np.asarray(curve._values, np.float64)
+                             for curve in issuerCurves])
+
+    return starts, times, values
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, parallel=True)
+def _defaultTimesGC_NUMBA(y, starts, survTimes, survValues):
+    ''' Map a matrix of correlated Gaussian variables with one row per credit
+    and one column per trial to default times using the survival curve of
+    each credit. The result has twice as many columns as each trial also
+    has an antithetic trial which is stored after all of the trials. '''
+
+    numCredits = y.shape[0]
+    numTrials = y.shape[1]
+
+    corrTimes = np.empty((numCredits, 2 * numTrials))
+
+    for iCredit in prange(0, numCredits):
+
+        times = survTimes[starts[iCredit]:starts[iCredit + 1]]
+        values = survValues[starts[iCredit]:starts[iCredit + 1]]
+
+        for iTrial in range(0, numTrials):
+            g = y[iCredit, iTrial]
+            u1 = 1.0 - N(g)
+            u2 = 1.0 - u1
+            t1 = uniformToDefaultTime(u1, times, values)
+            t2 = uniformToDefaultTime(u2, times, values)
+            corrTimes[iCredit, iTrial] = t1
+            corrTimes[iCredit, numTrials + iTrial] = t2
+
+    return corrTimes
+
 ###############################################################################
 
 
@@ -27,21 +77,40 @@ def defaultTimesGC(issuerCurves,
     c = np.linalg.cholesky(correlationMatrix)
     y = np.dot(c, x)
 
-    corrTimes = np.empty(shape=(numCredits, 2 * numTrials))
+    starts, survTimes, survValues = _packSurvivalCurves(issuerCurves)
+    corrTimes = _defaultTimesGC_NUMBA(y, starts, survTimes, survValues)
+    return corrTimes
 
-    for iCredit in range(0, numCredits):
-        issuerCurve = issuerCurves[iCredit]
-        for iTrial in range(0, numTrials):
-            g = y[iCredit, iTrial]
-            u1 = 1.0 - N(g)
-            u2 = 1.0 - u1
-            times = issuerCurve._times
-            values = issuerCurve._values
-            t1 = uniformToDefaultTime(u1, times, values)
-            t2 = uniformToDefaultTime(u2, times, values)
-            corrTimes[iCredit, iTrial] = t1
-            corrTimes[iCredit, numTrials + iTrial] = t2
+###############################################################################
 
-    return corrTimes
 
-##########################################################################
+def defaultTimesGCChunks(issuerCurves,
+                         correlationMatrix,
+                         numTrials,
+                         seed,
+                         chunkSize=10000):
+    ''' Generator which returns the default times of a Gaussian copula model
+    in chunks of at most chunkSize trials so that the memory used does not
+    grow with the number of trials. Each chunk is a matrix by credit and
+    trial with the antithetic trials of the chunk stored after its trials,
+    as in defaultTimesGC. If the chunk size is at least the number of trials
+    there is one chunk which is the same as the output of defaultTimesGC. '''
+
+    if chunkSize < 1:
+        raise FinError("Chunk size must be positive.")
+
+    np.random.seed(seed)
+    numCredits = len(issuerCurves)
+    c = np.linalg.cholesky(correlationMatrix)
+    starts, survTimes, survValues = _packSurvivalCurves(issuerCurves)
+
+    numTrialsLeft = numTrials
+
+    while numTrialsLeft > 0:
+        numChunkTrials = min(chunkSize, numTrialsLeft)
+        x = np.random.normal(0.0, 1.0, size=(numCredits, numChunkTrials))
+        y = np.dot(c, x)
+        yield _defaultTimesGC_NUMBA(y, starts, survTimes, survValues)
+        numTrialsLeft -= numChunkTrials
+
+###############################################################################
@@ -2,7 +2,7 @@
 # Copyright (C) 2018, 2019, 2020 Dominic O'Kane
 ##############################################################################
 
-from numba import njit, float64, int64
+from numba import njit, prange, float64, int64
 import numpy as np
 
 ##########################################################################
@@ -17,6 +17,75 @@ from .FinModelLossDbnBuilder import portfolioGCD
 
 minZ = -6.0
 
+###############################################################################
+# Quadrature rules for integrating over the market factor. The weights include
+# the standard normal density so that an integral is a weighted sum.
+###############################################################################
+
+_uniformTables = {}
+_gaussHermiteTables = {}
+
+
+def uniformQuadrature(numIntegrationSteps):
+    ''' Nodes and weights of the uniform grid from minZ used by the loss
+    distribution functions which take a number of integration steps. The
+    tables are cached by number of steps and must not be modified. '''
+
+    if numIntegrationSteps < 1:
+        raise FinError("Number of integration steps must be positive.")
+
+    if numIntegrationSteps not in _uniformTables:
+        dz = 2.0 * abs(minZ) / numIntegrationSteps
+        nodes = minZ + dz * np.arange(0, numIntegrationSteps)
+        weights = INVROOT2PI * dz * np.exp(-(nodes * nodes) / 2.0)
+        nodes.setflags(write=False)
+        weights.setflags(write=False)
+        _uniformTables[numIntegrationSteps] = (nodes, weights)
+
+    return _uniformTables[numIntegrationSteps]
+
+###############################################################################
+
+
+def gaussHermiteTable(numPoints):
+    ''' Nodes and weights of Gauss-Hermite quadrature for the expectation
+    over a standard normal market factor. The tables are cached by number of
+    points and must not be modified. This rule is exact for polynomials but
+    the conditional default probabilities become steep functions of the
+    market factor at high correlations where the uniform grid of the same
+    size is usually more accurate. '''
+
+    if numPoints < 1:
+        raise FinError("Number of points must be positive.")
+
+    if numPoints not in _gaussHermiteTables:
+        nodes, weights = np.polynomial.hermite_e.hermegauss(numPoints)
+        weights = weights / np.sqrt(2.0 * np.pi)
+        nodes.setflags(write=False)
+        weights.setflags(write=False)
+        _gaussHermiteTables[numPoints] = (nodes, weights)
+
+    return _gaussHermiteTables[numPoints]
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def defaultThresholds(survivalMatrix):
+    ''' Get the default thresholds of the credits in the one-factor GC model
+    from a matrix of survival probabilities with one row per time and one
+    column per credit. They do not depend on the correlation. '''
+
+    numTimes, numCredits = survivalMatrix.shape
+    thresholds = np.zeros((numTimes, numCredits))
+
+    for iTime in range(0, numTimes):
+        for iCredit in range(0, numCredits):
+            pd = 1.0 - survivalMatrix[iTime, iCredit]
+            thresholds[iTime, iCredit] = norminvcdf(pd)
+
+    return thresholds
+
 ###############################################################################
 # This implements the one-factor latent variable formulation of the Gaussian
 # Copula model as well as some approximations
@@ -129,24 +198,12 @@ def homogeneousBasketLossDbn(survivalProbabilities,
 ###############################################################################
 
 
-@njit(float64(float64, float64, int64, float64[:], float64[:], float64[:],
-              int64), fastmath=True)
-def trSurvProbRecursion(k1,
-                        k2,
-                        numCredits,
-                        survivalProbabilities,
-                        recoveryRates,
-                        betaVector,
-                        numIntegrationSteps):
-    ''' Get the tranche survival probability of a portfolio of credits in the
-    one-factor GC model using a full recursion calculation of the loss
-    distribution and survival probabilities to some time horizon. '''
-
-    if k1 == 0.0 and k2 == 0.0:
-        return 0.0
-
-    if k1 >= k2:
-        raise FinError("K1 >= K2")
+@njit(fastmath=True, cache=True, nogil=True)
+def lossUnitsGCD(numCredits, recoveryRates):
+    ''' Express the loss of each credit as a number of units where the unit
+    is the greatest common divisor of the credit losses. Returns the number
+    of loss units of each credit, the size of the unit and the number of
+    points on the loss grid including the zero loss. '''
 
     commonRecoveryFlag = 1
 
@@ -158,14 +215,6 @@ def trSurvProbRecursion(k1,
 
     gcd = 0.0
 
-    m = 0.0
-    for i in range(0, len(betaVector)):
-        m += betaVector[i]
-    m /= len(betaVector)
-
-    if m > 0.8:
-        numIntegrationSteps *= 2
-
     if commonRecoveryFlag == 1:
         gcd = lossAmounts[0]
     else:
@@ -178,6 +227,32 @@ def trSurvProbRecursion(k1,
         lossUnits[iCredit] = lossAmounts[iCredit] / gcd
         numLossUnits = numLossUnits + lossUnits[iCredit]
 
+    return lossUnits, gcd, numLossUnits
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def lossDbnRecursion(numCredits,
+                     survivalProbabilities,
+                     recoveryRates,
+                     betaVector,
+                     numIntegrationSteps):
+    ''' Get the loss distribution of a portfolio of credits in the one-factor
+    GC model using a full recursion calculation to some time horizon. The
+    losses are in units of the greatest common divisor of the credit losses
+    so the function returns the loss distribution and the size of the unit. '''
+
+    m = 0.0
+    for i in range(0, len(betaVector)):
+        m += betaVector[i]
+    m /= len(betaVector)
+
+    if m > 0.8:
+        numIntegrationSteps *= 2
+
+    lossUnits, gcd, numLossUnits = lossUnitsGCD(numCredits, recoveryRates)
+
     defaultProbs = np.zeros(numCredits)
 
     for iCredit in range(0, numCredits):
@@ -189,9 +264,27 @@ def trSurvProbRecursion(k1,
                                   betaVector,
                                   numIntegrationSteps)
 
+    numLossUnits = min(int(numLossUnits), len(lossDbn))
+    return lossDbn[0:numLossUnits], gcd
+
+###############################################################################
+
+
+@njit(float64(float64, float64, float64[:], float64), fastmath=True,
+      cache=True, nogil=True)
+def trSurvProbLossDbn(k1, k2, lossDbn, lossUnit):
+    ''' Get the tranche survival probability from the portfolio loss
+    distribution where loss i of the distribution is i loss units. '''
+
+    if k1 == 0.0 and k2 == 0.0:
+        return 0.0
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
     trancheEL = 0.0
-    for iLossUnit in range(0, int(numLossUnits)):
-        loss = iLossUnit * gcd
+    for iLossUnit in range(0, len(lossDbn)):
+        loss = iLossUnit * lossUnit
         trancheLoss = min(loss, k2) - min(loss, k1)
         trancheEL = trancheEL + trancheLoss * lossDbn[iLossUnit]
 
@@ -201,6 +294,310 @@ def trSurvProbRecursion(k1,
 ###############################################################################
 
 
+@njit(float64(float64, float64, int64, float64[:], float64[:], float64[:],
+              int64), fastmath=True)
+def trSurvProbRecursion(k1,
+                        k2,
+                        numCredits,
+                        survivalProbabilities,
+                        recoveryRates,
+                        betaVector,
+                        numIntegrationSteps):
+    ''' Get the tranche survival probability of a portfolio of credits in the
+    one-factor GC model using a full recursion calculation of the loss
+    distribution and survival probabilities to some time horizon. '''
+
+    if k1 == 0.0 and k2 == 0.0:
+        return 0.0
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    lossDbn, gcd = lossDbnRecursion(numCredits,
+                                    survivalProbabilities,
+                                    recoveryRates,
+                                    betaVector,
+                                    numIntegrationSteps)
+
+    q = trSurvProbLossDbn(k1, k2, lossDbn, gcd)
+    return q
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _complexPower(x, n):
+    ''' Raise a complex number to a positive integer power by repeated
+    squaring. '''
+
+    y = 1.0 + 0.0j
+    while n > 0:
+        if n & 1:
+            y *= x
+        x *= x
+        n >>= 1
+
+    return y
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, parallel=True)
+def uncondCharFnGCD(defaultProbs,
+                    betaVector,
+                    lossUnits,
+                    counts,
+                    numLossUnits,
+                    nodes,
+                    weights):
+    ''' Get the characteristic function of the unconditional portfolio loss
+    distribution on a grid of numLossUnits loss units at the non-negative
+    frequencies of its discrete Fourier transform. Each entry describes a
+    group of counts credits with the same default probability, beta and
+    integer number of loss units. The conditional characteristic function
+    is the product of those of the credits and is integrated over the
+    market factor using the quadrature nodes and weights. The frequencies
+    are calculated in parallel. '''
+
+    numGroups = len(defaultProbs)
+    numFreqs = numLossUnits // 2 + 1
+    numIntegrationSteps = len(nodes)
+
+    condDefaultProbs = np.zeros((numIntegrationSteps, numGroups))
+
+    thresholds = np.zeros(numGroups)
+    for iGroup in range(0, numGroups):
+        thresholds[iGroup] = norminvcdf(defaultProbs[iGroup])
+
+    for iStep in range(0, numIntegrationSteps):
+        z = nodes[iStep]
+        for iGroup in range(0, numGroups):
+            beta = betaVector[iGroup]
+            denom = np.sqrt(1.0 - beta * beta)
+            argz = (thresholds[iGroup] - beta * z) / denom
+            condDefaultProbs[iStep, iGroup] = N(argz)
+
+    charFn = np.zeros(numFreqs, dtype=np.complex128)
+    dtheta = 2.0 * np.pi / numLossUnits
+
+    for iFreq in prange(0, numFreqs):
+
+        # The phase of a loss of each group at this frequency
+        phases = np.zeros(numGroups, dtype=np.complex128)
+        for iGroup in range(0, numGroups):
+            theta = dtheta * ((iFreq * lossUnits[iGroup]) % numLossUnits)
+            phases[iGroup] = complex(np.cos(theta), -np.sin(theta))
+
+        v = 0.0 + 0.0j
+        for iStep in range(0, numIntegrationSteps):
+            phi = 1.0 + 0.0j
+            for iGroup in range(0, numGroups):
+                p = condDefaultProbs[iStep, iGroup]
+                f = (1.0 - p) + p * phases[iGroup]
+                if counts[iGroup] > 1:
+                    f = _complexPower(f, counts[iGroup])
+                phi *= f
+            v += phi * weights[iStep]
+
+        charFn[iFreq] = v
+
+    return charFn
+
+###############################################################################
+
+
+def lossDbnFFT(numCredits,
+               survivalProbabilities,
+               recoveryRates,
+               betaVector,
+               numIntegrationSteps):
+    ''' Get the loss distribution of a portfolio of credits in the one-factor
+    GC model to some time horizon by integrating the characteristic function
+    of the conditional loss distribution over the market factor and then
+    inverting it once using the FFT. Credits with the same default
+    probability, beta and loss are grouped. The losses are in units of the
+    greatest common divisor of the credit losses so the function returns the
+    loss distribution and the size of the unit. '''
+
+    m = np.mean(betaVector)
+
+    if m > 0.8:
+        numIntegrationSteps *= 2
+
+    nodes, weights = uniformQuadrature(numIntegrationSteps)
+    return lossDbnFFTQuadrature(numCredits, survivalProbabilities,
+                                recoveryRates, betaVector, nodes, weights)
+
+###############################################################################
+
+
+def lossDbnFFTQuadrature(numCredits,
+                         survivalProbabilities,
+                         recoveryRates,
+                         betaVector,
+                         nodes,
+                         weights):
+    ''' Get the loss distribution of a portfolio of credits using the FFT
+    method where the integral over the market factor uses the quadrature
+    nodes and weights. Returns the loss distribution and the size of the
+    loss unit. '''
+
+    lossUnits, gcd, _ = lossUnitsGCD(numCredits, recoveryRates)
+
+    small = 1e-10
+    lossUnits = (lossUnits + small).astype(np.int64)
+    numLossUnits = 1 + int(np.sum(lossUnits))
+
+    defaultProbs = 1.0 - np.asarray(survivalProbabilities, dtype=np.float64)
+    keys = np.column_stack((defaultProbs, betaVector, lossUnits))
+    keys, counts = np.unique(keys, axis=0, return_counts=True)
+
+    charFn = uncondCharFnGCD(keys[:, 0].copy(),
+                             keys[:, 1].copy(),
+                             keys[:, 2].astype(np.int64),
+                             counts.astype(np.int64),
+                             numLossUnits,
+                             nodes,
+                             weights)
+
+    lossDbn = np.fft.irfft(charFn, numLossUnits)
+    return lossDbn, gcd
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def uncondCharFnsGCD(defaultProbs,
+                     betaVector,
+                     lossUnits,
+                     counts,
+                     numLossUnits,
+                     nodes,
+                     weights):
+    ''' Get the characteristic functions of the unconditional portfolio loss
+    distributions at a set of times in the same way as uncondCharFnGCD. The
+    default probabilities have one row per time and one column per group of
+    credits. Returns a matrix with one characteristic function per row. The
+    times and frequencies are calculated in parallel. '''
+
+    numTimes, numGroups = defaultProbs.shape
+    numFreqs = numLossUnits // 2 + 1
+    numIntegrationSteps = len(nodes)
+
+    condDefaultProbs = np.zeros((numTimes, numIntegrationSteps, numGroups))
+
+    for iTime in prange(0, numTimes):
+        for iGroup in range(0, numGroups):
+            threshold = norminvcdf(defaultProbs[iTime, iGroup])
+            beta = betaVector[iGroup]
+            denom = np.sqrt(1.0 - beta * beta)
+            for iStep in range(0, numIntegrationSteps):
+                argz = (threshold - beta * nodes[iStep]) / denom
+                condDefaultProbs[iTime, iStep, iGroup] = N(argz)
+
+    charFns = np.zeros((numTimes, numFreqs), dtype=np.complex128)
+    dtheta = 2.0 * np.pi / numLossUnits
+
+    for k in prange(0, numTimes * numFreqs):
+
+        iTime = k // numFreqs
+        iFreq = k % numFreqs
+
+        # The phase of a loss of each group at this frequency
+        phases = np.zeros(numGroups, dtype=np.complex128)
+        for iGroup in range(0, numGroups):
+            theta = dtheta * ((iFreq * lossUnits[iGroup]) % numLossUnits)
+            phases[iGroup] = complex(np.cos(theta), -np.sin(theta))
+
+        v = 0.0 + 0.0j
+        for iStep in range(0, numIntegrationSteps):
+            phi = 1.0 + 0.0j
+            for iGroup in range(0, numGroups):
+                p = condDefaultProbs[iTime, iStep, iGroup]
+                f = (1.0 - p) + p * phases[iGroup]
+                if counts[iGroup] > 1:
+                    f = _complexPower(f, counts[iGroup])
+                phi *= f
+            v += phi * weights[iStep]
+
+        charFns[iTime, iFreq] = v
+
+    return charFns
+
+###############################################################################
+
+
+def lossDbnsFFTQuadrature(survivalProbabilities,
+                          recoveryRates,
+                          betaVector,
+                          nodes,
+                          weights):
+    ''' Get the loss distributions of a portfolio of credits at a set of
+    times using the FFT method. The survival probabilities have one row per
+    time and one column per credit. Credits with the same survival
+    probabilities at all of the times, beta and loss are grouped. The
+    characteristic functions are calculated together in parallel and are
+    inverted by a single call to the FFT. Returns a matrix with one loss
+    distribution per row and the size of the loss unit. '''
+
+    survivalProbabilities = np.asarray(survivalProbabilities,
+                                       dtype=np.float64)
+    numTimes, numCredits = survivalProbabilities.shape
+
+    lossUnits, gcd, _ = lossUnitsGCD(numCredits, recoveryRates)
+
+    small = 1e-10
+    lossUnits = (lossUnits + small).astype(np.int64)
+    numLossUnits = 1 + int(np.sum(lossUnits))
+
+    defaultProbs = 1.0 - survivalProbabilities
+    keys = np.column_stack((defaultProbs.T, betaVector, lossUnits))
+    keys, counts = np.unique(keys, axis=0, return_counts=True)
+
+    charFns = uncondCharFnsGCD(keys[:, 0:numTimes].T.copy(),
+                               keys[:, numTimes].copy(),
+                               keys[:, numTimes + 1].astype(np.int64),
+                               counts.astype(np.int64),
+                               numLossUnits,
+                               nodes,
+                               weights)
+
+    lossDbns = np.fft.irfft(charFns, numLossUnits, axis=1)
+    return lossDbns, gcd
+
+###############################################################################
+
+
+def trSurvProbFFT(k1,
+                  k2,
+                  numCredits,
+                  survivalProbabilities,
+                  recoveryRates,
+                  betaVector,
+                  numIntegrationSteps):
+    ''' Get the tranche survival probability of a portfolio of credits in the
+    one-factor GC model using the FFT inversion of the characteristic function
+    of the loss distribution and survival probabilities to some time
+    horizon. '''
+
+    if k1 == 0.0 and k2 == 0.0:
+        return 0.0
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    lossDbn, gcd = lossDbnFFT(numCredits,
+                              survivalProbabilities,
+                              recoveryRates,
+                              betaVector,
+                              numIntegrationSteps)
+
+    q = trSurvProbLossDbn(k1, k2, lossDbn, gcd)
+    return q
+
+###############################################################################
+
+
 @njit(float64(float64, float64, float64, float64), fastmath=True, cache=True)
 def gaussApproxTrancheLoss(k1, k2, mu, sigma):
 
@@ -224,32 +621,15 @@ def gaussApproxTrancheLoss(k1, k2, mu, sigma):
 ###############################################################################
 
 
-@njit(float64(float64, float64, int64, float64[:], float64[:], float64[:],
-              int64), fastmath=True, cache=True)
-def trSurvProbGaussian(k1,
-                       k2,
-                       numCredits,
-                       survivalProbabilities,
-                       recoveryRates,
-                       betaVector,
-                       numIntegrationSteps):
-    ''' Get the approximated tranche survival probability of a portfolio
-    of credits in the one-factor GC model using a Gaussian fit of the
-    conditional loss distribution and survival probabilities to some time
-    horizon. Note that the losses in this fit are allowed to be negative. '''
-
-    if k1 == 0.0 and k2 == 0.0:
-        return 0.0
-
-    if k1 >= k2:
-        raise FinError("K1 >= K2")
-
-    defaultProbs = [0.0] * numCredits
-    for iCredit in range(0, numCredits):
-        defaultProbs[iCredit] = 1.0 - survivalProbabilities[iCredit]
-
-    dz = 2.0 * abs(minZ) / numIntegrationSteps
-    z = minZ
+@njit(fastmath=True, cache=True, nogil=True)
+def condLossMomentsGaussian(numCredits,
+                            survivalProbabilities,
+                            recoveryRates,
+                            betaVector,
+                            numIntegrationSteps):
+    ''' Get the mean and standard deviation of the conditional loss
+    distribution of a portfolio of credits in the one-factor GC model at each
+    point of the market factor integration grid. '''
 
     thresholds = np.zeros(numCredits)
     losses = np.zeros(numCredits)
@@ -259,8 +639,13 @@ def trSurvProbGaussian(k1,
         thresholds[iCredit] = norminvcdf(pd)
         losses[iCredit] = (1.0 - recoveryRates[iCredit]) / numCredits
 
-    v = 0.0
-    for _ in range(0, numIntegrationSteps):
+    dz = 2.0 * abs(minZ) / numIntegrationSteps
+    z = minZ
+
+    mus = np.zeros(numIntegrationSteps)
+    sigmas = np.zeros(numIntegrationSteps)
+
+    for iStep in range(0, numIntegrationSteps):
 
         mu = 0.0
         var = 0.0
@@ -274,10 +659,36 @@ def trSurvProbGaussian(k1,
             mu += condprob * losses[iCredit]
             var += (losses[iCredit]**2) * condprob * (1.0 - condprob)
 
-        sigma = np.sqrt(var)
-        el = gaussApproxTrancheLoss(k1, k2, mu, sigma)
-        gaussWt = np.exp(-(z**2) / 2.0)
+        mus[iStep] = mu
+        sigmas[iStep] = np.sqrt(var)
+        z += dz
+
+    return mus, sigmas
+
+###############################################################################
+
+
+@njit(float64(float64, float64, float64[:], float64[:]), fastmath=True,
+      cache=True, nogil=True)
+def trSurvProbCondMoments(k1, k2, mus, sigmas):
+    ''' Get the tranche survival probability from the mean and standard
+    deviation of the conditional loss distribution at each point of the
+    market factor integration grid using a Gaussian fit. '''
+
+    if k1 == 0.0 and k2 == 0.0:
+        return 0.0
 
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    numIntegrationSteps = len(mus)
+    dz = 2.0 * abs(minZ) / numIntegrationSteps
+    z = minZ
+
+    v = 0.0
+    for iStep in range(0, numIntegrationSteps):
+        el = gaussApproxTrancheLoss(k1, k2, mus[iStep], sigmas[iStep])
+        gaussWt = np.exp(-(z**2) / 2.0)
         v += el * gaussWt
         z += dz
 
@@ -287,6 +698,38 @@ def trSurvProbGaussian(k1,
 
 ###############################################################################
 
+
+@njit(float64(float64, float64, int64, float64[:], float64[:], float64[:],
+              int64), fastmath=True, cache=True)
+def trSurvProbGaussian(k1,
+                       k2,
+                       numCredits,
+                       survivalProbabilities,
+                       recoveryRates,
+                       betaVector,
+                       numIntegrationSteps):
+    ''' Get the approximated tranche survival probability of a portfolio
+    of credits in the one-factor GC model using a Gaussian fit of the
+    conditional loss distribution and survival probabilities to some time
+    horizon. Note that the losses in this fit are allowed to be negative. '''
+
+    if k1 == 0.0 and k2 == 0.0:
+        return 0.0
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    mus, sigmas = condLossMomentsGaussian(numCredits,
+                                          survivalProbabilities,
+                                          recoveryRates,
+                                          betaVector,
+                                          numIntegrationSteps)
+
+    q = trSurvProbCondMoments(k1, k2, mus, sigmas)
+    return q
+
+###############################################################################
+
 @njit(float64[:](int64, float64[:], float64[:], float64[:], int64),
       fastmath=True, cache=True)
 def lossDbnHeterogeneousAdjBinomial(numCredits,
@@ -336,6 +779,45 @@ def lossDbnHeterogeneousAdjBinomial(numCredits,
 ###############################################################################
 
 
+@njit(fastmath=True, cache=True, nogil=True)
+def lossDbnAdjBinomial(numCredits,
+                       survivalProbabilities,
+                       recoveryRates,
+                       betaVector,
+                       numIntegrationSteps):
+    ''' Get the loss distribution of a portfolio of credits in the one-factor
+    GC model using the adjusted binomial fit of the conditional loss
+    distribution to some time horizon. The losses are in units of the average
+    credit loss so the function returns the loss distribution and the size of
+    the unit. '''
+
+    defaultProbs = np.zeros(numCredits)
+    for iCredit in range(0, numCredits):
+        defaultProbs[iCredit] = 1.0 - survivalProbabilities[iCredit]
+
+    totalLoss = 0.0
+    for iCredit in range(0, numCredits):
+        totalLoss += (1.0 - recoveryRates[iCredit])
+    totalLoss /= numCredits
+
+    avgLoss = totalLoss / numCredits
+
+    lossRatio = np.zeros(numCredits)
+    for iCredit in range(0, numCredits):
+        lossRatio[iCredit] = (
+            1.0 - recoveryRates[iCredit]) / numCredits / avgLoss
+
+    lossDbn = lossDbnHeterogeneousAdjBinomial(numCredits,
+                                              defaultProbs,
+                                              lossRatio,
+                                              betaVector,
+                                              numIntegrationSteps)
+
+    return lossDbn, avgLoss
+
+###############################################################################
+
+
 @njit(float64(float64, float64, int64, float64[:], float64[:], float64[:],
               int64), fastmath=True, cache=True)
 def trSurvProbAdjBinomial(k1,
@@ -356,9 +838,90 @@ def trSurvProbAdjBinomial(k1,
     if k1 >= k2:
         raise FinError("K1 >= K2")
 
-    defaultProbs = np.zeros(numCredits)
+    lossDbn, avgLoss = lossDbnAdjBinomial(numCredits,
+                                          survivalProbabilities,
+                                          recoveryRates,
+                                          betaVector,
+                                          numIntegrationSteps)
+
+    q = trSurvProbLossDbn(k1, k2, lossDbn, avgLoss)
+    return q
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def _condDefaultProbs(thresholds, betaVector, z, condDefaultProbs):
+    ''' Fill the vector of default probabilities conditional on the market
+    factor taking value z. '''
+
+    for iCredit in range(0, len(thresholds)):
+        beta = betaVector[iCredit]
+        denom = np.sqrt(1.0 - beta * beta)
+        argz = (thresholds[iCredit] - beta * z) / denom
+        condDefaultProbs[iCredit] = N(argz)
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def lossDbnsRecursionQuadrature(thresholds,
+                                lossUnits,
+                                betaVector,
+                                nodes,
+                                weights):
+    ''' Get the loss distributions of a portfolio of credits at a set of
+    times in the one-factor GC model using a full recursion. The thresholds
+    have one row per time and one column per credit and the integral over
+    the market factor uses the quadrature nodes and weights. Returns a
+    matrix with one loss distribution per row in units of lossUnits. The
+    times are calculated in parallel. '''
+
+    numTimes, numCredits = thresholds.shape
+
+    numLossUnits = 1
     for iCredit in range(0, numCredits):
-        defaultProbs[iCredit] = 1.0 - survivalProbabilities[iCredit]
+        numLossUnits += int(lossUnits[iCredit])
+
+    lossDbns = np.zeros((numTimes, numLossUnits))
+
+    for iTime in prange(0, numTimes):
+
+        condDefaultProbs = np.zeros(numCredits)
+
+        for iNode in range(0, len(nodes)):
+
+            _condDefaultProbs(thresholds[iTime], betaVector, nodes[iNode],
+                              condDefaultProbs)
+
+            indepDbn = indepLossDbnRecursionGCD(numCredits,
+                                                condDefaultProbs,
+                                                lossUnits)
+
+            for iLossUnit in range(0, numLossUnits):
+                lossDbns[iTime, iLossUnit] += \
+                    indepDbn[iLossUnit] * weights[iNode]
+
+    return lossDbns
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def lossDbnsAdjBinomialQuadrature(thresholds,
+                                  recoveryRates,
+                                  betaVector,
+                                  nodes,
+                                  weights):
+    ''' Get the loss distributions of a portfolio of credits at a set of
+    times in the one-factor GC model using the adjusted binomial fit of the
+    conditional loss distribution. The thresholds have one row per time and
+    one column per credit and the integral over the market factor uses the
+    quadrature nodes and weights. Returns a matrix with one loss
+    distribution per row and the size of the loss unit. The times are
+    calculated in parallel. '''
+
+    numTimes, numCredits = thresholds.shape
 
     totalLoss = 0.0
     for iCredit in range(0, numCredits):
@@ -372,19 +935,142 @@ def trSurvProbAdjBinomial(k1,
         lossRatio[iCredit] = (
             1.0 - recoveryRates[iCredit]) / numCredits / avgLoss
 
-    lossDbn = lossDbnHeterogeneousAdjBinomial(numCredits,
-                                              defaultProbs,
-                                              lossRatio,
-                                              betaVector,
-                                              numIntegrationSteps)
-    trancheEL = 0.0
     numLossUnits = numCredits + 1
-    for iLossUnit in range(0, numLossUnits):
-        loss = iLossUnit * avgLoss
-        trancheLoss = min(loss, k2) - min(loss, k1)
-        trancheEL += trancheLoss * lossDbn[iLossUnit]
+    lossDbns = np.zeros((numTimes, numLossUnits))
 
-    q = 1.0 - trancheEL / (k2 - k1)
+    for iTime in prange(0, numTimes):
+
+        condDefaultProbs = np.zeros(numCredits)
+
+        for iNode in range(0, len(nodes)):
+
+            _condDefaultProbs(thresholds[iTime], betaVector, nodes[iNode],
+                              condDefaultProbs)
+
+            indepDbn = indepLossDbnHeterogeneousAdjBinomial(numCredits,
+                                                            condDefaultProbs,
+                                                            lossRatio)
+
+            for iLossUnit in range(0, numLossUnits):
+                lossDbns[iTime, iLossUnit] += \
+                    indepDbn[iLossUnit] * weights[iNode]
+
+    return lossDbns, avgLoss
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def condLossMomentsGaussianQuadrature(thresholds,
+                                      recoveryRates,
+                                      betaVector,
+                                      nodes):
+    ''' Get the mean and standard deviation of the conditional loss of a
+    portfolio of credits at each quadrature node and at a set of times. The
+    thresholds have one row per time and one column per credit. Returns two
+    matrices with one row per time and one column per node. The times are
+    calculated in parallel. '''
+
+    numTimes, numCredits = thresholds.shape
+    numNodes = len(nodes)
+
+    losses = np.zeros(numCredits)
+    for iCredit in range(0, numCredits):
+        losses[iCredit] = (1.0 - recoveryRates[iCredit]) / numCredits
+
+    mus = np.zeros((numTimes, numNodes))
+    sigmas = np.zeros((numTimes, numNodes))
+
+    for iTime in prange(0, numTimes):
+
+        condDefaultProbs = np.zeros(numCredits)
+
+        for iNode in range(0, numNodes):
+
+            _condDefaultProbs(thresholds[iTime], betaVector, nodes[iNode],
+                              condDefaultProbs)
+
+            mu = 0.0
+            var = 0.0
+            for iCredit in range(0, numCredits):
+                condprob = condDefaultProbs[iCredit]
+                mu += condprob * losses[iCredit]
+                var += (losses[iCredit]**2) * condprob * (1.0 - condprob)
+
+            mus[iTime, iNode] = mu
+            sigmas[iTime, iNode] = np.sqrt(var)
+
+    return mus, sigmas
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True)
+def trSurvProbCondMomentsQuadrature(k1, k2, mus, sigmas, weights):
+    ''' Get the tranche survival probability from the mean and standard
+    deviation of the conditional loss at each quadrature node using a
+    Gaussian fit. '''
+
+    if k1 == 0.0 and k2 == 0.0:
+        return 0.0
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    v = 0.0
+    for iNode in range(0, len(mus)):
+        el = gaussApproxTrancheLoss(k1, k2, mus[iNode], sigmas[iNode])
+        v += el * weights[iNode]
+
+    q = 1.0 - v / (k2 - k1)
     return q
 
 ###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def trSurvProbsLossDbns(k1, k2, lossDbns, lossUnit):
+    ''' Get the tranche survival probabilities at a set of times from a
+    matrix with one portfolio loss distribution per row. The times are
+    calculated in parallel. '''
+
+    numTimes = lossDbns.shape[0]
+    qs = np.zeros(numTimes)
+
+    if k1 == 0.0 and k2 == 0.0:
+        return qs
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    for iTime in prange(0, numTimes):
+        qs[iTime] = trSurvProbLossDbn(k1, k2, lossDbns[iTime], lossUnit)
+
+    return qs
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def trSurvProbsCondMomentsQuadrature(k1, k2, mus, sigmas, weights):
+    ''' Get the tranche survival probabilities at a set of times from the
+    matrices of the mean and standard deviation of the conditional loss with
+    one row per time and one column per quadrature node. The times are
+    calculated in parallel. '''
+
+    numTimes = mus.shape[0]
+    qs = np.zeros(numTimes)
+
+    if k1 == 0.0 and k2 == 0.0:
+        return qs
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    for iTime in prange(0, numTimes):
+        qs[iTime] = trSurvProbCondMomentsQuadrature(k1, k2, mus[iTime],
+                                                    sigmas[iTime], weights)
+
+    return qs
+
+###############################################################################
@@ -2,7 +2,7 @@
 # Copyright (C) 2018, 2019, 2020 Dominic O'Kane
 ##############################################################################
 
-from numba import njit
+from numba import njit, prange
 import numpy as np
 
 ###############################################################################
@@ -14,7 +14,7 @@ from ..finutils.FinError import FinError
 ###############################################################################
 
 
-@njit(fastmath=True, cache=True)
+@njit(fastmath=True, cache=True, nogil=True)
 def trSurvProbLHP(k1,
                   k2,
                   numCredits,
@@ -54,6 +54,35 @@ def trSurvProbLHP(k1,
 ###############################################################################
 
 
+@njit(fastmath=True, cache=True, nogil=True, parallel=True)
+def trSurvProbsLHP(k1,
+                   k2,
+                   survivalMatrix,
+                   recoveryRates,
+                   beta):
+    ''' Get the tranche survival probabilities at a set of times using the
+    large portfolio limit where the survival probabilities of the credits
+    have one row per time and one column per credit. The times are
+    calculated in parallel. '''
+
+    numTimes, numCredits = survivalMatrix.shape
+    qs = np.zeros(numTimes)
+
+    if k1 == 0.0 and k2 == 0.0:
+        return qs
+
+    if k1 >= k2:
+        raise FinError("K1 >= K2")
+
+    for iTime in prange(0, numTimes):
+        qs[iTime] = trSurvProbLHP(k1, k2, numCredits, survivalMatrix[iTime],
+                                  recoveryRates, beta)
+
+    return qs
+
+###############################################################################
+
+
 @njit(fastmath=True, cache=True)
 def portfolioCDF_LHP(k, numCredits, qvector, recoveryRates, beta, numPoints):
 
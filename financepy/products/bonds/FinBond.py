@@ -139,7 +139,7 @@ class FinBond(object):
                                       self._frequencyType,
                                       calendarType,
                                       busDayRuleType,
-                                      dateGenRuleType)._generate()
+                                      dateGenRuleType).scheduleDates()
 
 ###############################################################################
 
@@ -344,7 +344,7 @@ class FinBondConvertible(object):
                                       self._frequencyType,
                                       calendarType,
                                       busDayRuleType,
-                                      dateGenRuleType)._generate()
+                                      dateGenRuleType).scheduleDates()
 
         self._pcd = self._flowDates[0]
         self._ncd = self._flowDates[1]
@@ -95,7 +95,7 @@ class FinBondFRN(object):
                                       self._frequencyType,
                                       calendarType,
                                       busDayRuleType,
-                                      dateGenRuleType)._generate()
+                                      dateGenRuleType).scheduleDates()
 
 ###############################################################################
 
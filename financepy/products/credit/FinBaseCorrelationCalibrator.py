@@ -0,0 +1,229 @@
+##############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+##############################################################################
+
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from numba import get_num_threads, set_num_threads
+from scipy import optimize
+
+from ...finutils.FinDate import FinDate
+from ...finutils.FinError import FinError
+from ...finutils.FinHelperFunctions import checkArgumentTypes
+from ...finutils.FinHelperFunctions import labelToString
+from .FinCDSTranche import FinLossDistributionBuilder
+
+###############################################################################
+
+
+class FinBaseCorrelationCalibrator():
+    ''' Calibrates the base correlation skew of a CDS index to the market
+    quotes of a capital structure of tranches. The base correlation of each
+    detachment point is found in turn by a bracketing root search which
+    starts from the base correlation of the previous detachment point. The
+    survival probabilities of the issuers at the tranche payment times are
+    calculated once for each index series and the loss distributions are
+    shared between neighbouring tranches using a FinTrancheLossSurface.
+    Several index series can be calibrated together. '''
+
+###############################################################################
+
+    def __init__(self,
+                 numPoints: int = 40,
+                 model: FinLossDistributionBuilder = FinLossDistributionBuilder.ADJUSTED_BINOMIAL,
+                 minCorrelation: float = 0.0001,
+                 maxCorrelation: float = 0.99,
+                 bracketWidth: float = 0.05,
+                 tolerance: float = 1e-8,
+                 gaussHermite: bool = False):
+        ''' Create the calibrator with the number of points and the loss
+        distribution model used to value the tranches. The base correlations
+        are searched for between the minimum and maximum correlation. The
+        search for each detachment point starts with a bracket of the given
+        width either side of the base correlation of the previous one. If
+        gaussHermite is True the tranches are valued using Gauss-Hermite
+        quadrature over the market factor. At high base correlations this
+        needs more points than the default uniform grid for the same
+        accuracy. '''
+
+        checkArgumentTypes(self.__init__, locals())
+
+        if minCorrelation < 0.0 or maxCorrelation >= 1.0:
+            raise FinError("Correlations must be in the range [0, 1).")
+
+        if minCorrelation >= maxCorrelation:
+            raise FinError("Minimum correlation must be below the maximum.")
+
+        if bracketWidth <= 0.0:
+            raise FinError("Bracket width must be positive.")
+
+        self._numPoints = numPoints
+        self._model = model
+        self._minCorrelation = minCorrelation
+        self._maxCorrelation = maxCorrelation
+        self._bracketWidth = bracketWidth
+        self._tolerance = tolerance
+        self._gaussHermite = gaussHermite
+
+###############################################################################
+
+    def _findBracket(self, f, guess):
+        ''' Find an interval around the guess on which the function changes
+        sign by doubling the width of the interval until it does so or it
+        reaches the correlation bounds. '''
+
+        width = self._bracketWidth
+        lo = max(guess - width, self._minCorrelation)
+        hi = min(guess + width, self._maxCorrelation)
+        flo = f(lo)
+        fhi = f(hi)
+
+        while flo * fhi > 0.0:
+
+            if lo == self._minCorrelation and hi == self._maxCorrelation:
+                raise FinError("Unable to bracket the base correlation.")
+
+            width *= 2.0
+            newLo = max(guess - width, self._minCorrelation)
+            newHi = min(guess + width, self._maxCorrelation)
+
+            if newLo < lo:
+                lo = newLo
+                flo = f(lo)
+
+            if newHi > hi:
+                hi = newHi
+                fhi = f(hi)
+
+        return lo, hi
+
+###############################################################################
+
+    def calibrate(self,
+                  valuationDate: FinDate,
+                  tranches: list,
+                  issuerCurves: list,
+                  upfronts: (list, np.ndarray),
+                  runningCoupons: (list, np.ndarray)):
+        ''' Calibrate the base correlation of each detachment point of a
+        capital structure of tranches with the same maturity whose strikes
+        start at zero and are contiguous. Each tranche is quoted by an
+        upfront and a running coupon at which it has zero value. Returns a
+        vector of base correlations, one per tranche detachment point. '''
+
+        numTranches = len(tranches)
+
+        if numTranches == 0:
+            raise FinError("No tranches to calibrate.")
+
+        if len(upfronts) != numTranches or len(runningCoupons) != numTranches:
+            raise FinError("Need one upfront and running coupon per tranche.")
+
+        if tranches[0]._k1 != 0.0:
+            raise FinError("First tranche must attach at zero.")
+
+        for i in range(1, numTranches):
+            if tranches[i]._k1 != tranches[i - 1]._k2:
+                raise FinError("Tranche strikes must be contiguous.")
+
+        lossSurface = tranches[0].lossSurface(valuationDate,
+                                              issuerCurves,
+                                              self._numPoints,
+                                              self._model,
+                                              self._gaussHermite)
+
+        baseCorrelations = np.zeros(numTranches)
+        corr1 = self._minCorrelation
+        guess = 0.5 * (self._minCorrelation + self._maxCorrelation)
+
+        for i in range(0, numTranches):
+
+            tranche = tranches[i]
+            upfront = upfronts[i]
+            runningCoupon = runningCoupons[i]
+
+            def _f(corr2):
+                v = tranche.valueBC(valuationDate, issuerCurves, upfront,
+                                    runningCoupon, corr1, corr2,
+                                    lossSurface=lossSurface)
+                return v[0] / tranche._notional
+
+            lo, hi = self._findBracket(_f, guess)
+            corr2 = optimize.brentq(_f, lo, hi, xtol=self._tolerance)
+
+            baseCorrelations[i] = corr2
+            corr1 = corr2
+            guess = corr2
+
+        return baseCorrelations
+
+###############################################################################
+
+    def calibrateSeries(self,
+                        valuationDate: FinDate,
+                        trancheSets: list,
+                        issuerCurveSets: list,
+                        upfrontSets: list,
+                        runningCouponSets: list,
+                        numThreads: int = 1):
+        ''' Calibrate the base correlation skews of several index series
+        where each series has its own capital structure of tranches, issuer
+        curves, upfronts and running coupons. The series can be calibrated at
+        the same time on a pool of numThreads threads. Most of the time is
+        spent in the loss distribution kernels which release the GIL. Each
+        of these is parallel so each thread is given an equal share of the
+        Numba threads rather than all of them, so that the kernels of the
+        different series run on different cores. This needs a thread safe
+        Numba threading layer such as tbb or omp. Returns a list with the
+        vector of base correlations of each series. '''
+
+        numSeries = len(trancheSets)
+
+        if len(issuerCurveSets) != numSeries or \
+                len(upfrontSets) != numSeries or \
+                len(runningCouponSets) != numSeries:
+            raise FinError("Need the same number of sets for each input.")
+
+        if numThreads < 1:
+            raise FinError("Number of threads must be positive.")
+
+        def _calibrate(i):
+            return self.calibrate(valuationDate, trancheSets[i],
+                                  issuerCurveSets[i], upfrontSets[i],
+                                  runningCouponSets[i])
+
+        if numThreads == 1:
+            return [_calibrate(i) for i in range(0, numSeries)]
+
+        # The number of Numba threads is local to each thread
+        numKernelThreads = max(get_num_threads() // numThreads, 1)
+
+        def _calibrateShared(i):
+            set_num_threads(numKernelThreads)
+            return _calibrate(i)
+
+        with ThreadPoolExecutor(max_workers=numThreads) as executor:
+            baseCorrelations = list(executor.map(_calibrateShared,
+                                                 range(0, numSeries)))
+
+        return baseCorrelations
+
+###############################################################################
+
+    def __repr__(self):
+        s = labelToString("OBJECT TYPE", type(self).__name__)
+        s += labelToString("NUM POINTS", self._numPoints)
+        s += labelToString("MODEL", self._model)
+        s += labelToString("MIN CORRELATION", self._minCorrelation)
+        s += labelToString("MAX CORRELATION", self._maxCorrelation)
+        s += labelToString("BRACKET WIDTH", self._bracketWidth)
+        s += labelToString("TOLERANCE", self._tolerance)
+        s += labelToString("GAUSS HERMITE", self._gaussHermite)
+        return s
+
+###############################################################################
+
+    def _print(self):
+        print(self)
+
+###############################################################################
@@ -6,7 +6,7 @@
 import numpy as np
 from numba import njit, float64, int64
 from math import exp, log
-from copy import deepcopy
+from copy import copy, deepcopy
 
 from ...finutils.FinDate import FinDate
 from ...finutils.FinError import FinError
@@ -14,10 +14,12 @@ from ...finutils.FinCalendar import FinCalendar, FinCalendarTypes
 from ...finutils.FinCalendar import FinBusDayAdjustTypes, FinDateGenRuleTypes
 from ...finutils.FinDayCount import FinDayCount, FinDayCountTypes
 from ...finutils.FinFrequency import FinFrequency, FinFrequencyTypes
+from ...finutils.FinSchedule import gScheduleCache
 from ...finutils.FinGlobalVariables import gDaysInYear
 from ...finutils.FinMath import ONE_MILLION
 from ...finutils.FinHelperFunctions import labelToString, tableToString
 from ...market.curves.FinInterpolate import FinInterpTypes, _uinterpolate
+from ...market.curves.FinInterpolate import _findIndex
 
 from ...finutils.FinHelperFunctions import checkArgumentTypes
 
@@ -179,6 +181,242 @@ def _protectionLegPV_NUMBA(teff,
     return protPV
 
 ###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _logInterpWeights(t, times):
+    ''' Return the two grid indices and the weights such that the log of
+    the value at time t is w1 * log(y[i1]) + w2 * log(y[i2]) when the grid
+    values y are interpolated using FLAT_FORWARDS as in _uinterpolate. This
+    includes the extrapolation after the last grid time and before the first
+    grid time. '''
+
+    numPoints = len(times)
+
+    if t == times[0]:
+        return 0, 1.0, 0, 0.0
+
+    i = _findIndex(t, times)
+
+    # Before the first grid time the zero rate of the first grid point is
+    # kept flat as it is by _uinterpolate
+    if i == 0:
+        if times[0] > 0.0:
+            return 0, t / times[0], 0, 0.0
+        return 0, 1.0, 0, 0.0
+
+    if i == numPoints:
+        i = numPoints - 1
+
+    i1 = i - 1
+    dt = times[i] - times[i1]
+    w1 = (times[i] - t) / dt
+    w2 = (t - times[i1]) / dt
+    return i1, w1, i, w2
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _cdsLegGradients_NUMBA(teff,
+                           tmat,
+                           accrualFactorPCDToNow,
+                           paymentTimes,
+                           yearFracs,
+                           npLiborTimes,
+                           npLiborValues,
+                           npSurvTimes,
+                           npSurvValues,
+                           numStepsPerYear):
+    ''' Calculate the full risky PV01 and the protection leg PV with zero
+    recovery in the same way as _riskyPV01_NUMBA and _protectionLegPV_NUMBA
+    along with their analytical derivatives with respect to the log of each
+    survival probability and Libor discount factor on the curve grids. The
+    derivatives of each term are found with respect to the log survival
+    probability and log discount factor at its times and these are then
+    passed back to the grid points using the interpolation weights. '''
+
+    numPayments = len(paymentTimes)
+    numProt = numStepsPerYear + 1
+
+    # Times at which the curves are needed. The first is the step-in date,
+    # then the payment dates and then the protection leg integration grid.
+    times = np.zeros(1 + numPayments + numProt)
+    times[0] = teff
+    times[1:1 + numPayments] = paymentTimes
+
+    dt = (tmat - teff) / numStepsPerYear
+    t = teff
+    times[1 + numPayments] = t
+    for k in range(1, numProt):
+        t = t + dt
+        times[1 + numPayments + k] = t
+
+    numTimes = len(times)
+
+    logSurvValues = np.log(npSurvValues)
+    logLiborValues = np.log(npLiborValues)
+
+    qi1 = np.zeros(numTimes, dtype=np.int64)
+    qi2 = np.zeros(numTimes, dtype=np.int64)
+    qw1 = np.zeros(numTimes)
+    qw2 = np.zeros(numTimes)
+    zi1 = np.zeros(numTimes, dtype=np.int64)
+    zi2 = np.zeros(numTimes, dtype=np.int64)
+    zw1 = np.zeros(numTimes)
+    zw2 = np.zeros(numTimes)
+    ls = np.zeros(numTimes)
+    ms = np.zeros(numTimes)
+
+    for j in range(0, numTimes):
+        i1, w1, i2, w2 = _logInterpWeights(times[j], npSurvTimes)
+        qi1[j] = i1
+        qi2[j] = i2
+        qw1[j] = w1
+        qw2[j] = w2
+        ls[j] = w1 * logSurvValues[i1] + w2 * logSurvValues[i2]
+        i1, w1, i2, w2 = _logInterpWeights(times[j], npLiborTimes)
+        zi1[j] = i1
+        zi2[j] = i2
+        zw1[j] = w1
+        zw2[j] = w2
+        ms[j] = w1 * logLiborValues[i1] + w2 * logLiborValues[i2]
+
+    qs = np.exp(ls)
+    zs = np.exp(ms)
+
+    # Derivatives of each leg with respect to ls and ms at each time
+    rpv01DL = np.zeros(numTimes)
+    rpv01DM = np.zeros(numTimes)
+    protDL = np.zeros(numTimes)
+    protDM = np.zeros(numTimes)
+
+    ###########################################################################
+    # Premium leg risky PV01
+    ###########################################################################
+
+    a = accrualFactorPCDToNow
+    y1 = yearFracs[1]
+    qeff = qs[0]
+    q1 = qs[2]
+    z1 = zs[2]
+
+    term = q1 * z1 * y1
+    fullRPV01 = term
+    rpv01DL[2] += term
+    rpv01DM[2] += term
+
+    c = a + 0.5 * (y1 - a)
+    term = z1 * (qeff - q1) * c
+    fullRPV01 += term
+    rpv01DL[0] += z1 * qeff * c
+    rpv01DL[2] -= z1 * q1 * c
+    rpv01DM[2] += term
+
+    # The Libor discount factor z1 is not moved on as in _riskyPV01_NUMBA
+    j1 = 2
+
+    for it in range(2, numPayments):
+
+        j2 = it + 1
+        q1 = qs[j1]
+        q2 = qs[j2]
+        z2 = zs[j2]
+        tau = yearFracs[it]
+
+        term = q2 * z2 * tau
+        fullRPV01 += term
+        rpv01DL[j2] += term
+        rpv01DM[j2] += term
+
+        if useFlatHazardRateIntegral:
+            h12 = -(ls[j2] - ls[j1]) / tau
+            r12 = -(ms[j2] - ms[2]) / tau
+            alpha = h12 + r12
+            e = exp(-alpha * tau)
+            expTerm = 1.0 - e - alpha * tau * e
+            dExpTerm = alpha * tau * tau * e
+            denom = abs(alpha * alpha + 1e-20)
+            term = q1 * z1 * h12 * expTerm / denom
+            dTermDR = q1 * z1 * h12 * (dExpTerm / denom -
+                                       2.0 * alpha * expTerm / denom / denom)
+            dTermDH = q1 * z1 * expTerm / denom + dTermDR
+            fullRPV01 += term
+            rpv01DL[j1] += term + dTermDH / tau
+            rpv01DL[j2] -= dTermDH / tau
+            rpv01DM[2] += term + dTermDR / tau
+            rpv01DM[j2] -= dTermDR / tau
+        else:
+            term = 0.50 * (q1 - q2) * z2 * tau
+            fullRPV01 += term
+            rpv01DL[j1] += 0.5 * q1 * z2 * tau
+            rpv01DL[j2] -= 0.5 * q2 * z2 * tau
+            rpv01DM[j2] += term
+
+        j1 = j2
+
+    ###########################################################################
+    # Protection leg
+    ###########################################################################
+
+    small = 1e-8
+    protPV = 0.0
+
+    for k in range(1, numProt):
+
+        j1 = numPayments + k
+        j2 = j1 + 1
+        q1 = qs[j1]
+        q2 = qs[j2]
+        z1 = zs[j1]
+        z2 = zs[j2]
+
+        if useFlatHazardRateIntegral:
+            h12 = -(ls[j2] - ls[j1]) / dt
+            r12 = -(ms[j2] - ms[j1]) / dt
+            expTerm = exp(-(r12 + h12) * dt)
+            denom = abs(h12 + r12) + small
+            term = h12 * (1.0 - expTerm) * q1 * z1 / denom
+            dTermDR = q1 * z1 * h12 * (dt * expTerm / denom -
+                                       (1.0 - expTerm) *
+                                       np.sign(h12 + r12) / denom / denom)
+            dTermDH = q1 * z1 * (1.0 - expTerm) / denom + dTermDR
+            protPV += term
+            protDL[j1] += term + dTermDH / dt
+            protDL[j2] -= dTermDH / dt
+            protDM[j1] += term + dTermDR / dt
+            protDM[j2] -= dTermDR / dt
+        else:
+            term = 0.5 * (z1 + z2) * (q1 - q2)
+            protPV += term
+            protDL[j1] += 0.5 * (z1 + z2) * q1
+            protDL[j2] -= 0.5 * (z1 + z2) * q2
+            protDM[j1] += 0.5 * z1 * (q1 - q2)
+            protDM[j2] += 0.5 * z2 * (q1 - q2)
+
+    ###########################################################################
+    # Pass the derivatives back to the grid points of the curves
+    ###########################################################################
+
+    rpv01GradQ = np.zeros(len(npSurvTimes))
+    protGradQ = np.zeros(len(npSurvTimes))
+    rpv01GradZ = np.zeros(len(npLiborTimes))
+    protGradZ = np.zeros(len(npLiborTimes))
+
+    for j in range(0, numTimes):
+        rpv01GradQ[qi1[j]] += rpv01DL[j] * qw1[j]
+        rpv01GradQ[qi2[j]] += rpv01DL[j] * qw2[j]
+        protGradQ[qi1[j]] += protDL[j] * qw1[j]
+        protGradQ[qi2[j]] += protDL[j] * qw2[j]
+        rpv01GradZ[zi1[j]] += rpv01DM[j] * zw1[j]
+        rpv01GradZ[zi2[j]] += rpv01DM[j] * zw2[j]
+        protGradZ[zi1[j]] += protDM[j] * zw1[j]
+        protGradZ[zi2[j]] += protDM[j] * zw2[j]
+
+    return (fullRPV01, protPV,
+            rpv01GradQ, protGradQ, rpv01GradZ, protGradZ)
+
+###############################################################################
 ###############################################################################
 ###############################################################################
 
@@ -231,7 +469,23 @@ class FinCDS(object):
 ###############################################################################
 
     def _generateAdjustedCDSPaymentDates(self):
-        ''' Generate CDS payment dates which have been holiday adjusted.'''
+        ''' Generate CDS payment dates which have been holiday adjusted.
+        CDS with the same terms share the dates held in the schedule cache. '''
+
+        key = ("CDS",
+               self._stepInDate._excelDate,
+               self._maturityDate._excelDate,
+               self._frequencyType,
+               self._calendarType,
+               self._busDayAdjustType,
+               self._dateGenRuleType)
+
+        cachedDates = gScheduleCache.get(key)
+
+        if cachedDates is not None:
+            self._adjustedDates = list(cachedDates)
+            return
+
         frequency = FinFrequency(self._frequencyType)
         calendar = FinCalendar(self._calendarType)
         startDate = self._stepInDate
@@ -301,6 +555,8 @@ class FinCDS(object):
             raise FinError("Unknown FinDateGenRuleType:" +
                            str(self._dateGenRuleType))
 
+        gScheduleCache.add(key, self._adjustedDates)
+
 ###############################################################################
 
     def _calcFlows(self):
@@ -449,6 +705,151 @@ class FinCDS(object):
         interestDV01 = (v1['full_pv'] - v0['full_pv'])
         return interestDV01
 
+###############################################################################
+
+    def _legGradients(self,
+                      valuationDate,
+                      issuerCurve,
+                      numStepsPerYear):
+        ''' Full risky PV01 and zero recovery protection leg PV per unit
+        notional and their derivatives with respect to the log survival
+        probabilities and log Libor discount factors on the curve grids. '''
+
+        liborCurve = issuerCurve._liborCurve
+
+        paymentTimes = []
+        for dt in self._adjustedDates:
+            paymentTimes.append((dt - valuationDate) / gDaysInYear)
+
+        dayCount = FinDayCount(self._dayCountType)
+        pcd = self._adjustedDates[0]
+        accrualFactorPCDToNow = dayCount.yearFrac(pcd, self._stepInDate)[0]
+
+        teff = (self._stepInDate - valuationDate) / gDaysInYear
+        tmat = (self._maturityDate - valuationDate) / gDaysInYear
+
+        legs = _cdsLegGradients_NUMBA(teff,
+                                      tmat,
+                                      accrualFactorPCDToNow,
+                                      np.array(paymentTimes),
+                                      np.array(self._accrualFactors),
+                                      np.array(liborCurve._times,
+                                               dtype=np.float64),
+                                      np.array(liborCurve._dfValues,
+                                               dtype=np.float64),
+                                      np.array(issuerCurve._times,
+                                               dtype=np.float64),
+                                      np.array(issuerCurve._values,
+                                               dtype=np.float64),
+                                      numStepsPerYear)
+
+        return legs, accrualFactorPCDToNow
+
+###############################################################################
+
+    def bucketedDV01s(self,
+                      valuationDate,
+                      issuerCurve,
+                      contractRecovery=standardRecovery,
+                      numStepsPerYear=25):
+        ''' Value of the CDS contract with its credit DV01 to each of the CDS
+        contracts used to build the issuer curve and its interest DV01 to
+        each of the zero rates on the Libor curve grid. These are calculated
+        analytically in one pass without rebuilding any curve. The credit
+        DV01 is the change in value for a one basis point increase in the
+        spread of each curve CDS holding the Libor curve fixed. The interest
+        DV01 is the change in value for a one basis point increase in each
+        continuously compounded zero rate with the issuer curve recalibrated
+        to its CDS spreads. The sum of the credit DV01s is the first order
+        equivalent of creditDV01. '''
+
+        if len(issuerCurve._cdsContracts) == 0:
+            raise FinError("Issuer curve has no CDS contracts.")
+
+        bump = 0.0001
+
+        legs, accrualFactorPCDToNow = self._legGradients(valuationDate,
+                                                         issuerCurve,
+                                                         numStepsPerYear)
+
+        (fullRPV01, protPV,
+         rpv01GradQ, protGradQ, rpv01GradZ, protGradZ) = legs
+
+        if self._longProtection:
+            longProt = +1
+        else:
+            longProt = -1
+
+        scale = longProt * self._notional
+        coupon = self._runningCoupon
+        cleanRPV01 = fullRPV01 - accrualFactorPCDToNow
+
+        fullPV = scale * (protPV * (1.0 - contractRecovery) -
+                          coupon * fullRPV01)
+        cleanPV = scale * (protPV * (1.0 - contractRecovery) -
+                           coupon * cleanRPV01)
+
+        valueGradQ = scale * (protGradQ * (1.0 - contractRecovery) -
+                              coupon * rpv01GradQ)
+        valueGradZ = scale * (protGradZ * (1.0 - contractRecovery) -
+                              coupon * rpv01GradZ)
+
+        #######################################################################
+        # Each curve CDS has a zero clean value on the curve built up to its
+        # maturity. Differentiating these conditions gives the derivatives of
+        # the survival probabilities with respect to the CDS spreads and the
+        # Libor discount factors. The survival probability at time zero is
+        # fixed and so is excluded.
+        #######################################################################
+
+        curveContracts = issuerCurve._cdsContracts
+        numPillars = len(curveContracts)
+        numLiborPoints = len(issuerCurve._liborCurve._times)
+
+        calibGradQ = np.zeros((numPillars, numPillars))
+        calibGradZ = np.zeros((numPillars, numLiborPoints))
+        calibRPV01s = np.zeros(numPillars)
+
+        for j in range(0, numPillars):
+
+            cds = curveContracts[j]
+
+            # The bootstrap of pillar j only sees the first j pillars
+            pillarCurve = copy(issuerCurve)
+            pillarCurve._times = issuerCurve._times[0:j + 2]
+            pillarCurve._values = issuerCurve._values[0:j + 2]
+
+            calibLegs, calibAccrual = \
+                cds._legGradients(issuerCurve._valuationDate,
+                                  pillarCurve, 25)
+
+            (calibFullRPV01, _,
+             calibRPV01GradQ, calibProtGradQ,
+             calibRPV01GradZ, calibProtGradZ) = calibLegs
+
+            c = cds._runningCoupon
+            calibGradQ[j, 0:j + 1] = \
+                calibProtGradQ[1:] * (1.0 - standardRecovery) - \
+                c * calibRPV01GradQ[1:]
+            calibGradZ[j, :] = calibProtGradZ * (1.0 - standardRecovery) - \
+                c * calibRPV01GradZ
+            calibRPV01s[j] = calibFullRPV01 - calibAccrual
+
+        # Adjoint of the calibration conditions
+        adjoint = np.linalg.solve(calibGradQ.T, valueGradQ[1:])
+
+        creditDV01s = adjoint * calibRPV01s * bump
+
+        liborTimes = np.array(issuerCurve._liborCurve._times)
+        dValueDZ = valueGradZ - np.dot(adjoint, calibGradZ)
+        interestDV01s = -dValueDZ[1:] * liborTimes[1:] * bump
+
+        return {'full_pv': fullPV,
+                'clean_pv': cleanPV,
+                'credit_dv01': creditDV01s,
+                'interest_dv01': interestDV01s,
+                'interest_dv01_times': liborTimes[1:]}
+
 ###############################################################################
 
     def cashSettlementAmount(self,
@@ -5,7 +5,9 @@
 # TODO: There are several speed ups for the Monte-Carlo including calculating
 # all default baskets at the same time.
 
+from math import sqrt
 import numpy as np
+from numba import njit, prange
 
 from ...finutils.FinError import FinError
 
@@ -18,6 +20,7 @@ from ...products.credit.FinCDS import FinCDS
 
 from ...models.FinModelGaussianCopula1F import homogeneousBasketLossDbn
 from ...models.FinModelGaussianCopula import defaultTimesGC
+from ...models.FinModelGaussianCopula import defaultTimesGCChunks
 from ...models.FinModelStudentTCopula import FinModelStudentTCopula
 
 from ...products.credit.FinCDSCurve import FinCDSCurve
@@ -31,7 +34,63 @@ from ...finutils.FinDate import FinDate
 from ...finutils.FinHelperFunctions import labelToString, tableToString
 
 ###############################################################################
-# TODO: Convert functions to use NUMBA!!
+
+
+@njit(fastmath=True, cache=True, parallel=True)
+def _valueLegsTrials_NUMBA(nToDefault,
+                           defaultTimes,
+                           recoveryRates,
+                           rpv01ToTimes,
+                           averageAccrualFactor,
+                           tmat):
+    ''' Calculate the premium leg risky PV01 of the default basket in each
+    trial of a matrix of default times by credit and trial. The default times
+    of each trial are sorted to find the time of the nth default. Also return
+    the time of the nth default and the loss given default of the defaulting
+    credit in each trial so that the protection leg can be discounted. This
+    loss is zero if the nth default is after the basket maturity. '''
+
+    numCredits = defaultTimes.shape[0]
+    numTrials = defaultTimes.shape[1]
+
+    rpv01s = np.zeros(numTrials)
+    lgds = np.zeros(numTrials)
+    taus = np.zeros(numTrials)
+
+    for iTrial in prange(0, numTrials):
+
+        # ORDER THE DEFAULT TIMES
+        assetTau = defaultTimes[:, iTrial].copy()
+        assetTau.sort()
+
+        # GET THE Nth DEFAULT TIME
+        minTau = assetTau[nToDefault - 1]
+
+        if minTau < tmat:
+            numPaymentsIndex = int(minTau / averageAccrualFactor)
+            rpv01Trial = rpv01ToTimes[numPaymentsIndex]
+            rpv01Trial += (minTau - numPaymentsIndex * averageAccrualFactor)
+
+            # DETERMINE IDENTITY OF N-TO-DEFAULT CREDIT IF BASKET NOT HOMO
+            assetIndex = 0
+            for iCredit in range(0, numCredits):
+                if minTau == defaultTimes[iCredit, iTrial]:
+                    assetIndex = iCredit
+                    break
+
+            lgds[iTrial] = (1.0 - recoveryRates[assetIndex])
+            taus[iTrial] = minTau
+
+        else:
+
+            numPaymentsIndex = int(tmat / averageAccrualFactor)
+            rpv01Trial = rpv01ToTimes[numPaymentsIndex]
+            taus[iTrial] = tmat
+
+        rpv01s[iTrial] = rpv01Trial
+
+    return rpv01s, lgds, taus
+
 ###############################################################################
 
 
@@ -77,17 +136,12 @@ class FinCDSBasket(object):
 
 ###############################################################################
 
-    def valueLegs_MC(self,
+    def _legsData_MC(self,
                      valuationDate,
-                     nToDefault,
-                     defaultTimes,
-                     issuerCurves,
                      liborCurve):
-        ''' Value the legs of the default basket using Monte Carlo. The default
-        times are an input so this valuation is not model dependent. '''
-
-        numCredits = defaultTimes.shape[0]
-        numTrials = defaultTimes.shape[1]
+        ''' The risky PV01 of the basket premium leg to each payment date,
+        the average accrual factor and the basket maturity time which are
+        used to value the legs in each Monte Carlo trial. '''
 
         adjustedDates = self._cdsContract._adjustedDates
         numFlows = len(adjustedDates)
@@ -109,45 +163,69 @@ class FinCDSBasket(object):
 
         tmat = (self._maturityDate - valuationDate) / gDaysInYear
 
-        rpv01 = 0.0
-        prot = 0.0
+        return rpv01ToTimes, averageAccrualFactor, tmat
 
-        assetTau = np.zeros(numCredits)
+###############################################################################
 
-        for iTrial in range(0, numTrials):
-            for iCredit in range(0, numCredits):
-                assetTau[iCredit] = defaultTimes[iCredit, iTrial]
+    def _valueLegsTrials_MC(self,
+                            nToDefault,
+                            defaultTimes,
+                            issuerCurves,
+                            liborCurve,
+                            legsData):
+        ''' Vectors of the premium leg risky PV01 and protection leg PV of
+        each trial in a matrix of default times by credit and trial. '''
 
-            # ORDER THE DEFAULT TIMES
-            assetTau.sort()
+        rpv01ToTimes, averageAccrualFactor, tmat = legsData
 
-            # GET THE Nth DEFAULT TIME
-            minTau = assetTau[nToDefault - 1]
+        recoveryRates = np.array([issuerCurve._recoveryRate
+                                  for issuerCurve in issuerCurves])
 
-            if minTau < tmat:
-                numPaymentsIndex = int(minTau / averageAccrualFactor)
-                rpv01Trial = rpv01ToTimes[numPaymentsIndex]
-                rpv01Trial += (minTau - numPaymentsIndex *
-                               averageAccrualFactor)
+        rpv01s, lgds, taus = \
+            _valueLegsTrials_NUMBA(nToDefault,
+                                   np.asarray(defaultTimes, np.float64),
+                                   recoveryRates,
+                                   rpv01ToTimes,
+                                   averageAccrualFactor,
+                                   tmat)
 
-                # DETERMINE IDENTITY OF N-TO-DEFAULT CREDIT IF BASKET NOT HOMO
-                assetIndex = 0
-                for iCredit in range(0, numCredits):
-                    if minTau == defaultTimes[iCredit, iTrial]:
-                        assetIndex = iCredit
-                        break
+        prots = lgds * liborCurve._df(taus)
+        return rpv01s, prots
 
-                protTrial = (1.0 - issuerCurves[assetIndex]._recoveryRate)
-                protTrial *= liborCurve._df(minTau)
+###############################################################################
 
-            else:
+    def valueLegs_MC(self,
+                     valuationDate,
+                     nToDefault,
+                     defaultTimes,
+                     issuerCurves,
+                     liborCurve):
+        ''' Value the legs of the default basket using Monte Carlo. The default
+        times are an input so this valuation is not model dependent. They can
+        be a matrix by credit and trial or a sequence of these matrices, such
+        as the chunks returned by defaultTimesGCChunks, which are valued in
+        turn so that all of the trials need not be held in memory. '''
+
+        if isinstance(defaultTimes, np.ndarray):
+            defaultTimes = [defaultTimes]
 
-                numPaymentsIndex = int(tmat / averageAccrualFactor)
-                rpv01Trial = rpv01ToTimes[numPaymentsIndex]
-                protTrial = 0.0
+        legsData = self._legsData_MC(valuationDate, liborCurve)
 
-            rpv01 += rpv01Trial
-            prot += protTrial
+        rpv01 = 0.0
+        prot = 0.0
+        numTrials = 0
+
+        for chunkTimes in defaultTimes:
+
+            rpv01s, prots = self._valueLegsTrials_MC(nToDefault,
+                                                     chunkTimes,
+                                                     issuerCurves,
+                                                     liborCurve,
+                                                     legsData)
+
+            rpv01 += np.sum(rpv01s)
+            prot += np.sum(prots)
+            numTrials += len(rpv01s)
 
         rpv01 = rpv01 / numTrials
         prot = prot / numTrials
@@ -162,19 +240,30 @@ class FinCDSBasket(object):
                          correlationMatrix,
                          liborCurve,
                          numTrials,
-                         seed):
+                         seed,
+                         chunkSize=None):
         ''' Value the default basket using a Gaussian copula model. This
-        depends on the issuer curves and correlation matrix. '''
+        depends on the issuer curves and correlation matrix. If a chunk size
+        is given then the default times are generated and valued in chunks of
+        this many trials so that the memory used does not grow with the
+        number of trials. '''
 
         numCredits = len(issuerCurves)
 
         if nToDefault > numCredits or nToDefault < 1:
             raise FinError("nToDefault must be 1 to numCredits")
 
-        defaultTimes = defaultTimesGC(issuerCurves,
-                                      correlationMatrix,
-                                      numTrials,
-                                      seed)
+        if chunkSize is None:
+            defaultTimes = defaultTimesGC(issuerCurves,
+                                          correlationMatrix,
+                                          numTrials,
+                                          seed)
+        else:
+            defaultTimes = defaultTimesGCChunks(issuerCurves,
+                                                correlationMatrix,
+                                                numTrials,
+                                                seed,
+                                                chunkSize)
 
         rpv01, protPV = self.valueLegs_MC(valuationDate,
                                           nToDefault,
@@ -190,6 +279,119 @@ class FinCDSBasket(object):
 
         return (value, rpv01, spd)
 
+###############################################################################
+
+    def valueGaussianStream_MC(self,
+                               valuationDate,
+                               nToDefault,
+                               issuerCurves,
+                               correlationMatrix,
+                               liborCurve,
+                               seed,
+                               targetStdErr=None,
+                               maxTrials=1000000,
+                               chunkSize=10000):
+        ''' Value the default basket using a Gaussian copula model where the
+        default times are generated and valued in chunks of trials so that
+        the memory used does not depend on the number of trials. Running
+        estimates of the legs and their standard errors are updated after
+        each chunk and the simulation stops once the standard error of the
+        basket spread is below the target or the maximum number of trials is
+        reached. The standard errors treat each trial and its antithetic
+        trial as one sample. Returns a dictionary with the value, risky PV01,
+        protection leg PV and spread, their standard errors, the number of
+        trials, a flag to say if the target was met and a convergence history
+        with one row per chunk giving the number of trials, the spread and
+        its standard error. '''
+
+        numCredits = len(issuerCurves)
+
+        if nToDefault > numCredits or nToDefault < 1:
+            raise FinError("nToDefault must be 1 to numCredits")
+
+        legsData = self._legsData_MC(valuationDate, liborCurve)
+
+        chunks = defaultTimesGCChunks(issuerCurves,
+                                      correlationMatrix,
+                                      maxTrials,
+                                      seed,
+                                      chunkSize)
+
+        c = self._runningCoupon
+        n = 0
+        sumR = 0.0
+        sumP = 0.0
+        sumRR = 0.0
+        sumPP = 0.0
+        sumRP = 0.0
+        converged = False
+        history = []
+
+        for chunkTimes in chunks:
+
+            rpv01s, prots = self._valueLegsTrials_MC(nToDefault,
+                                                     chunkTimes,
+                                                     issuerCurves,
+                                                     liborCurve,
+                                                     legsData)
+
+            # Each trial is averaged with its antithetic trial
+            m = len(rpv01s) // 2
+            r = 0.5 * (rpv01s[0:m] + rpv01s[m:])
+            p = 0.5 * (prots[0:m] + prots[m:])
+
+            n += m
+            sumR += np.sum(r)
+            sumP += np.sum(p)
+            sumRR += np.sum(r * r)
+            sumPP += np.sum(p * p)
+            sumRP += np.sum(r * p)
+
+            rpv01 = sumR / n
+            protPV = sumP / n
+            spd = protPV / rpv01
+
+            if n > 1:
+                varR = max(sumRR - n * rpv01 * rpv01, 0.0) / (n - 1)
+                varP = max(sumPP - n * protPV * protPV, 0.0) / (n - 1)
+                covRP = (sumRP - n * rpv01 * protPV) / (n - 1)
+            else:
+                varR = 0.0
+                varP = 0.0
+                covRP = 0.0
+
+            # The spread standard error uses the delta method
+            rpv01StdErr = sqrt(varR / n)
+            protStdErr = sqrt(varP / n)
+            varSpd = varP - 2.0 * spd * covRP + spd * spd * varR
+            spdStdErr = sqrt(max(varSpd, 0.0) / n) / rpv01
+            varValue = varP - 2.0 * c * covRP + c * c * varR
+            valueStdErr = self._notional * sqrt(max(varValue, 0.0) / n)
+
+            history.append([n, spd, spdStdErr])
+
+            if targetStdErr is not None and n > 1:
+                if spdStdErr < targetStdErr:
+                    converged = True
+                    break
+
+        value = self._notional * (protPV - c * rpv01)
+
+        if not self._longProtection:
+            value = value * -1.0
+
+        return {'value': value,
+                'rpv01': rpv01,
+                'prot_pv': protPV,
+                'spread': spd,
+                'value_stderr': valueStdErr,
+                'rpv01_stderr': rpv01StdErr,
+                'prot_stderr': protStdErr,
+                'spread_stderr': spdStdErr,
+                'num_trials': n,
+                'converged': converged,
+                'history': np.array(history)}
+
 ###############################################################################
 
     def valueStudentT_MC(self,
@@ -2,38 +2,415 @@
 # Copyright (C) 2018, 2019, 2020 Dominic O'Kane
 ##############################################################################
 
-from math import log
+from math import log, exp
 import numpy as np
-import scipy.optimize as optimize
-from numba import njit, float64
+from numba import njit, float64, prange
 
 from ...finutils.FinDate import FinDate
 from ...finutils.FinError import FinError
 from ...finutils.FinGlobalVariables import gDaysInYear
 from ...market.curves.FinInterpolate import _uinterpolate, FinInterpTypes
+from ...market.curves.FinInterpolate import _vinterpolate
+from ...market.curves.FinInterpolate import _interpolationCoeffs
+from ...market.curves.FinCompiledCurve import FinCompiledCurve
 from ...finutils.FinHelperFunctions import inputTime, tableToString
 from ...finutils.FinDayCount import FinDayCount
 from ...finutils.FinFrequency import FinFrequency, FinFrequencyTypes
 from ...finutils.FinHelperFunctions import checkArgumentTypes, _funcName
 from ...finutils.FinHelperFunctions import labelToString
+from .FinCDS import standardRecovery
 
+cdstol = 1e-10
 
 ###############################################################################
 
 
-def f(q, *args):
-    ''' Function that returns zero when the survival probability that gives a
-    zero value of the CDS has been determined. '''
+def _cdsBootstrapData(cdsContracts: list,
+                      valuationDate: FinDate,
+                      liborCurve,
+                      numSteps: int = 25):
+    ''' Precompute the data needed to value each CDS contract in Numba
+    during the bootstrap. These are the premium leg payment times, accrual
+    factors and Libor discount factors and the times and Libor discount
+    factors of the protection leg integration grid. The flows of all of the
+    contracts are packed into flat arrays and the flows of contract i run
+    from index starts[i] to starts[i+1]. The discount factors are found by
+    flat forward interpolation of the Libor curve grid as in FinCDS. '''
 
-    self = args[0]
-    valueDate = args[1]
-    cds = args[2]
-    numPoints = len(self._times)
-    self._values[numPoints - 1] = q
-    # This is important - we calibrate a curve that makes the clean PV of the
-    # CDS equal to zero and so we select the second element of the value tuple
-    objFn = cds.value(valueDate, self)['clean_pv']
-    return objFn
+    numContracts = len(cdsContracts)
+
+    pillarTimes = np.zeros(numContracts)
+    teffs = np.zeros(numContracts)
+    accrualFactorsPCDToNow = np.zeros(numContracts)
+    protSteps = np.zeros(numContracts)
+    payStarts = np.zeros(numContracts + 1, dtype=np.int64)
+    protStarts = np.zeros(numContracts + 1, dtype=np.int64)
+
+    payTimes = []
+    yearFracs = []
+    protTimes = []
+
+    for i in range(0, numContracts):
+
+        cds = cdsContracts[i]
+
+        teff = (cds._stepInDate - valuationDate) / gDaysInYear
+        tmat = (cds._maturityDate - valuationDate) / gDaysInYear
+
+        for dt in cds._adjustedDates:
+            payTimes.append((dt - valuationDate) / gDaysInYear)
+
+        yearFracs += cds._accrualFactors
+
+        dayCount = FinDayCount(cds._dayCountType)
+        pcd = cds._adjustedDates[0]
+        accrualFactorsPCDToNow[i] = dayCount.yearFrac(pcd, cds._stepInDate)[0]
+
+        # The grid is built up in the same way as in _protectionLegPV_NUMBA
+        dt = (tmat - teff) / numSteps
+        t = teff
+        protTimes.append(t)
+        for _ in range(0, numSteps):
+            t = t + dt
+            protTimes.append(t)
+
+        pillarTimes[i] = tmat
+        teffs[i] = teff
+        protSteps[i] = dt
+        payStarts[i + 1] = len(payTimes)
+        protStarts[i + 1] = len(protTimes)
+
+    payTimes = np.array(payTimes)
+    yearFracs = np.array(yearFracs)
+    protTimes = np.array(protTimes)
+
+    method = FinInterpTypes.FLAT_FORWARDS.value
+    liborTimes = np.array(liborCurve._times, dtype=np.float64)
+    liborValues = np.array(liborCurve._dfValues, dtype=np.float64)
+    payDfs = _vinterpolate(payTimes, liborTimes, liborValues, method)
+    protDfs = _vinterpolate(protTimes, liborTimes, liborValues, method)
+
+    return (pillarTimes, teffs, accrualFactorsPCDToNow,
+            payStarts, payTimes, yearFracs, payDfs,
+            protStarts, protTimes, protDfs, protSteps)
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _logSurvivalSplit(times, survTimes, logQs, numKnown, tNext):
+    ''' Split the log survival probability at each time into the part that
+    is fixed by the first numKnown grid points and the part that depends on
+    the flat hazard rate h from the last of these points to the next grid
+    point at tNext. The log survival probability is logQ0 - h * slope. Times
+    before zero are extrapolated using the average hazard rate to the next
+    grid point as is done by the flat forward interpolation. '''
+
+    n = len(times)
+    logQ0 = np.zeros(n)
+    slopes = np.zeros(n)
+
+    tLast = survTimes[numKnown - 1]
+
+    for j in range(0, n):
+
+        t = times[j]
+
+        if t > tLast:
+            logQ0[j] = logQs[numKnown - 1]
+            slopes[j] = t - tLast
+        elif t > 0.0:
+            k = 1
+            while survTimes[k] < t:
+                k += 1
+            w = (t - survTimes[k - 1]) / (survTimes[k] - survTimes[k - 1])
+            logQ0[j] = logQs[k - 1] + w * (logQs[k] - logQs[k - 1])
+        elif t < 0.0:
+            logQ0[j] = t * logQs[numKnown - 1] / tNext
+            slopes[j] = t * (tNext - tLast) / tNext
+
+    return logQ0, slopes
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _cdsValueHazard(h, coupon, contractRecovery, accrualFactorPCDToNow,
+                    effLogQ0, effSlope,
+                    payLogQ0, paySlopes, yearFracs, payDfs,
+                    protLogQ0, protSlopes, protDfs, protStep):
+    ''' Clean value per unit notional of a long protection CDS when the
+    hazard rate after the last known survival grid point is h and the
+    analytical derivative of this value with respect to h. This is the same
+    calculation as _riskyPV01_NUMBA and _protectionLegPV_NUMBA when they use
+    the flat hazard rate integrals, except that the survival probabilities
+    are exp(logQ0 - h * slope) in closed form. '''
+
+    small = 1e-8
+
+    ###########################################################################
+    # Premium leg risky PV01
+    ###########################################################################
+
+    dlEff = -effSlope
+    qeff = exp(effLogQ0 + h * dlEff)
+    dqeff = qeff * dlEff
+
+    dl1 = -paySlopes[1]
+    l1 = payLogQ0[1] + h * dl1
+    q1 = exp(l1)
+    dq1 = q1 * dl1
+    z1 = payDfs[1]
+
+    a = accrualFactorPCDToNow
+    y1 = yearFracs[1]
+
+    # reference credit survives to the premium payment date
+    fullRPV01 = q1 * z1 * y1
+    dFullRPV01 = dq1 * z1 * y1
+
+    # coupon accrued from previous coupon to today paid in full at default
+    fullRPV01 += z1 * (qeff - q1) * a
+    dFullRPV01 += z1 * (dqeff - dq1) * a
+
+    # future accrued from now to coupon payment date
+    fullRPV01 += 0.5 * z1 * (qeff - q1) * (y1 - a)
+    dFullRPV01 += 0.5 * z1 * (dqeff - dq1) * (y1 - a)
+
+    for it in range(2, len(payDfs)):
+
+        dl2 = -paySlopes[it]
+        l2 = payLogQ0[it] + h * dl2
+        q2 = exp(l2)
+        dq2 = q2 * dl2
+        z2 = payDfs[it]
+
+        tau = yearFracs[it]
+
+        fullRPV01 += q2 * z2 * tau
+        dFullRPV01 += dq2 * z2 * tau
+
+        h12 = -(l2 - l1) / tau
+        dh12 = -(dl2 - dl1) / tau
+        r12 = -log(z2 / z1) / tau
+        alpha = h12 + r12
+        e = exp(-alpha * tau)
+        expTerm = 1.0 - e - alpha * tau * e
+        dExpTerm = alpha * tau * tau * e * dh12
+        denom = abs(alpha * alpha + 1e-20)
+        dDenom = 2.0 * alpha * dh12
+
+        dfullRPV01 = q1 * z1 * h12 * expTerm / denom
+        fullRPV01 += dfullRPV01
+        dFullRPV01 += z1 * (dq1 * h12 * expTerm + q1 * dh12 * expTerm +
+                            q1 * h12 * dExpTerm) / denom
+        dFullRPV01 -= dfullRPV01 * dDenom / denom
+
+        # The Libor discount factor z1 is not moved on as in FinCDS
+        l1 = l2
+        dl1 = dl2
+        q1 = q2
+        dq1 = dq2
+
+    cleanRPV01 = fullRPV01 - accrualFactorPCDToNow
+
+    ###########################################################################
+    # Protection leg
+    ###########################################################################
+
+    dt = protStep
+
+    dl1 = -protSlopes[0]
+    l1 = protLogQ0[0] + h * dl1
+    q1 = exp(l1)
+    dq1 = q1 * dl1
+    z1 = protDfs[0]
+
+    protPV = 0.0
+    dProtPV = 0.0
+
+    for k in range(1, len(protDfs)):
+
+        dl2 = -protSlopes[k]
+        l2 = protLogQ0[k] + h * dl2
+        q2 = exp(l2)
+        dq2 = q2 * dl2
+        z2 = protDfs[k]
+
+        h12 = -(l2 - l1) / dt
+        dh12 = -(dl2 - dl1) / dt
+        r12 = -log(z2 / z1) / dt
+        expTerm = exp(-(r12 + h12) * dt)
+        dExpTerm = -dt * expTerm * dh12
+        denom = abs(h12 + r12) + small
+        dDenom = np.sign(h12 + r12) * dh12
+
+        dprotPV = h12 * (1.0 - expTerm) * q1 * z1 / denom
+        protPV += dprotPV
+        dProtPV += z1 * (dh12 * (1.0 - expTerm) * q1 -
+                         h12 * dExpTerm * q1 +
+                         h12 * (1.0 - expTerm) * dq1) / denom
+        dProtPV -= dprotPV * dDenom / denom
+
+        l1 = l2
+        dl1 = dl2
+        q1 = q2
+        dq1 = dq2
+        z1 = z2
+
+    v = protPV * (1.0 - contractRecovery) - coupon * cleanRPV01
+    dv = dProtPV * (1.0 - contractRecovery) - coupon * dFullRPV01
+
+    return v, dv
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _solveSurvivalCurve(pillarTimes, teffs, accrualFactorsPCDToNow,
+                        payStarts, payTimes, yearFracs, payDfs,
+                        protStarts, protTimes, protDfs, protSteps,
+                        coupons, contractRecovery, tol, maxIterations):
+    ''' Bootstrap the survival probabilities at the CDS maturities one
+    pillar at a time so that each CDS has a zero clean value. The hazard
+    rate is flat between pillars and the hazard rate of each pillar is found
+    by a Newton search using the analytical derivative of the CDS value.
+    Returns the survival probabilities including the value of one at time
+    zero and a flag which is True if all of the searches converged. '''
+
+    numPillars = len(pillarTimes)
+
+    survTimes = np.zeros(numPillars + 1)
+    logQs = np.zeros(numPillars + 1)
+
+    # Start with the credit triangle hazard rate for the first pillar
+    h = coupons[0] / (1.0 - contractRecovery)
+
+    for i in range(0, numPillars):
+
+        p0 = payStarts[i]
+        p1 = payStarts[i + 1]
+        k0 = protStarts[i]
+        k1 = protStarts[i + 1]
+
+        tmat = pillarTimes[i]
+        teff = np.array([teffs[i]])
+        effLogQ0, effSlopes = _logSurvivalSplit(teff, survTimes, logQs,
+                                                i + 1, tmat)
+        payLogQ0, paySlopes = _logSurvivalSplit(payTimes[p0:p1], survTimes,
+                                                logQs, i + 1, tmat)
+        protLogQ0, protSlopes = _logSurvivalSplit(protTimes[k0:k1],
+                                                  survTimes, logQs, i + 1,
+                                                  tmat)
+
+        converged = False
+
+        for _ in range(0, maxIterations):
+
+            v, dv = _cdsValueHazard(h, coupons[i], contractRecovery,
+                                    accrualFactorsPCDToNow[i],
+                                    effLogQ0[0], effSlopes[0],
+                                    payLogQ0, paySlopes,
+                                    yearFracs[p0:p1], payDfs[p0:p1],
+                                    protLogQ0, protSlopes,
+                                    protDfs[k0:k1], protSteps[i])
+
+            if dv == 0.0:
+                break
+
+            dh = v / dv
+            h = h - dh
+
+            if abs(dh) < tol:
+                converged = True
+                break
+
+        if not converged:
+            return np.exp(logQs), False
+
+        survTimes[i + 1] = tmat
+        logQs[i + 1] = logQs[i] - h * (tmat - survTimes[i])
+
+    return np.exp(logQs), True
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, parallel=True)
+def _solveSurvivalCurves(pillarTimes, teffs, accrualFactorsPCDToNow,
+                         payStarts, payTimes, yearFracs, payDfs,
+                         protStarts, protTimes, protDfs, protSteps,
+                         couponMatrix, contractRecovery, tol, maxIterations):
+    ''' Bootstrap one survival curve for each row of a matrix of CDS
+    coupons where all of the curves use the same CDS contract dates. The
+    curves are independent and so are built in parallel. The result is a
+    matrix of survival probabilities with one row per curve and a flag for
+    each curve which is True if its bootstrap converged. '''
+
+    numCurves = couponMatrix.shape[0]
+    numPillars = len(pillarTimes)
+
+    qMatrix = np.zeros((numCurves, numPillars + 1))
+    convergedFlags = np.zeros(numCurves, dtype=np.bool_)
+
+    for iCurve in prange(0, numCurves):
+
+        qs, converged = _solveSurvivalCurve(pillarTimes, teffs,
+                                            accrualFactorsPCDToNow,
+                                            payStarts, payTimes, yearFracs,
+                                            payDfs, protStarts, protTimes,
+                                            protDfs, protSteps,
+                                            couponMatrix[iCurve],
+                                            contractRecovery, tol,
+                                            maxIterations)
+
+        qMatrix[iCurve, :] = qs
+        convergedFlags[iCurve] = converged
+
+    return qMatrix, convergedFlags
+
+###############################################################################
+
+
+def survivalMatrixFromSpreads(valuationDate: FinDate,
+                              cdsContracts: list,
+                              liborCurve,
+                              spreadMatrix: np.ndarray,
+                              contractRecovery: float = standardRecovery):
+    ''' Bootstrap the survival curves of many issuers in one call. Each row
+    of the spread matrix holds the CDS spreads of one issuer and there is one
+    column for each of the maturity-ordered CDS contracts. The contracts give
+    the dates of the premium and protection legs and their own coupons are
+    not used. The bootstrap data is computed once for all of the issuers and
+    the curves are then built in Numba. Returns the grid times including time
+    zero and a matrix of survival probabilities with one row per issuer. '''
+
+    spreadMatrix = np.array(spreadMatrix, dtype=np.float64)
+
+    if spreadMatrix.ndim != 2:
+        raise FinError("Spread matrix must be two-dimensional.")
+
+    if spreadMatrix.shape[1] != len(cdsContracts):
+        raise FinError("Spread matrix must have one column per CDS contract.")
+
+    if valuationDate != liborCurve._valuationDate:
+        raise FinError("Libor curve does not have same valuation date.")
+
+    bootstrapData = _cdsBootstrapData(cdsContracts, valuationDate, liborCurve)
+
+    if np.any(np.diff(bootstrapData[0]) <= 0.0):
+        raise FinError("CDS contracts not in increasing maturity.")
+
+    qMatrix, convergedFlags = _solveSurvivalCurves(*bootstrapData,
+                                                   spreadMatrix,
+                                                   contractRecovery,
+                                                   cdstol, 50)
+
+    if not np.all(convergedFlags):
+        raise FinError("CDS curve bootstrap failed to converge.")
+
+    times = np.concatenate((np.array([0.0]), bootstrapData[0]))
+    return times, qMatrix
 
 ###############################################################################
 
@@ -109,13 +486,10 @@ class FinCDSCurve():
             raise FinError("Survival Date before curve anchor date")
 
         if isinstance(t, np.ndarray):
-            n = len(t)
-            qs = np.zeros(n)
-            for i in range(0, n):
-                qs[i] = _uinterpolate(t[i],
-                                      self._times,
-                                      self._values,
-                                      self._interpolationMethod.value)
+            qs = _vinterpolate(t,
+                               self._times,
+                               self._values,
+                               self._interpolationMethod.value)
             return qs
         elif isinstance(t, float):
             q = _uinterpolate(t,
@@ -144,28 +518,28 @@ class FinCDSCurve():
 ###############################################################################
 
     def _buildCurve(self):
-        ''' Construct the CDS survival curve from a set of CDS contracts '''
+        ''' Construct the CDS survival curve from a set of CDS contracts. The
+        hazard rate is flat between the CDS maturities and is found for each
+        maturity in turn by a Newton search in Numba that uses the analytical
+        derivative of the CDS value. As in FinCDS.value the contracts are
+        valued using the standard contract recovery rate. '''
 
         self._validate(self._cdsContracts)
-        numTimes = len(self._cdsContracts)
 
-        # we size the vectors to include time zero
-        self._times = np.array([0.0])
-        self._values = np.array([1.0])
+        bootstrapData = _cdsBootstrapData(self._cdsContracts,
+                                          self._valuationDate,
+                                          self._liborCurve)
 
-        for i in range(0, numTimes):
+        coupons = np.array([cds._runningCoupon for cds in self._cdsContracts])
 
-            maturityDate = self._cdsContracts[i]._maturityDate
+        qs, converged = _solveSurvivalCurve(*bootstrapData, coupons,
+                                            standardRecovery, cdstol, 50)
 
-            argtuple = (self, self._valuationDate, self._cdsContracts[i])
-            tmat = (maturityDate - self._valuationDate) / gDaysInYear
-            q = self._values[i]
+        if not converged:
+            raise FinError("CDS curve bootstrap failed to converge.")
 
-            self._times = np.append(self._times, tmat)
-            self._values = np.append(self._values, q)
-
-            optimize.newton(f, x0=q, fprime=None, args=argtuple,
-                            tol=1e-7, maxiter=50, fprime2=None)
+        self._times = np.concatenate((np.array([0.0]), bootstrapData[0]))
+        self._values = qs
 
 ###############################################################################
 
@@ -221,6 +595,31 @@ class FinCDSCurve():
             zeroRate = (dfq**(-1.0/t) - 1) * f
         return zeroRate
 
+##############################################################################
+
+    def compiled(self):
+        ''' Return a FinCompiledCurve that can be passed into Numba compiled
+        functions. Its discount factors come from the compiled Libor curve and
+        its survival probabilities are interpolated on the grid of this curve.
+        Times are in years from the valuation date. '''
+
+        liborCurve = self._liborCurve.compiled()
+
+        survTimes = np.array(self._times, dtype=np.float64)
+        survValues = np.array(self._values, dtype=np.float64)
+        survCoeffs = _interpolationCoeffs(survTimes, survValues,
+                                          self._interpolationMethod.value)
+
+        return FinCompiledCurve(liborCurve._curveType,
+                                liborCurve._times,
+                                liborCurve._coeffs,
+                                liborCurve._values,
+                                liborCurve._params,
+                                liborCurve._frequency,
+                                True,
+                                survTimes,
+                                survCoeffs)
+
 ##############################################################################
 
     def __repr__(self):
@@ -0,0 +1,218 @@
+##############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+##############################################################################
+
+from copy import copy
+import numpy as np
+
+from ...finutils.FinDate import FinDate
+from ...finutils.FinError import FinError
+from ...finutils.FinGlobalVariables import gDaysInYear
+from ...finutils.FinHelperFunctions import checkArgumentTypes
+from ...finutils.FinHelperFunctions import labelToString
+from ...market.curves.FinInterpolate import FinInterpTypes, _vinterpolateMany
+from .FinCDS import FinCDS, standardRecovery
+from .FinCDSCurve import FinCDSCurve, survivalMatrixFromSpreads
+
+###############################################################################
+
+
+class FinCDSCurveSet():
+    ''' A set of issuer survival curves which are calibrated to CDS contracts
+    with the same maturity dates and conventions and which use the same Libor
+    curve. The CDS schedules are generated once and the curves of all of the
+    issuers are bootstrapped together in Numba. The survival probabilities
+    are held in a matrix with one row per issuer and one column per grid
+    time. Each issuer curve can be extracted as a FinCDSCurve whose survival
+    probabilities are a view onto its row of this matrix so that it can be
+    used anywhere a FinCDSCurve is expected. '''
+
+###############################################################################
+
+    def __init__(self,
+                 valuationDate: FinDate,
+                 cdsContracts: list,
+                 spreadMatrix: np.ndarray,
+                 recoveryRates: (float, list, np.ndarray),
+                 liborCurve):
+        ''' Create the set of curves from a list of maturity-ordered CDS
+        contracts which give the schedule of each tenor and a matrix of CDS
+        spreads with one row per issuer and one column per contract. The
+        recovery rate can be one value for all issuers or one per issuer.
+        As in FinCDSCurve, the contracts are valued during the bootstrap
+        using the standard contract recovery rate. '''
+
+        checkArgumentTypes(self.__init__, locals())
+
+        if valuationDate != liborCurve._valuationDate:
+            raise FinError("Libor curve does not have same valuation date as Issuer curve.")
+
+        spreadMatrix = np.array(spreadMatrix, dtype=np.float64)
+
+        if spreadMatrix.ndim == 1:
+            spreadMatrix = spreadMatrix.reshape((1, len(spreadMatrix)))
+
+        numIssuers = spreadMatrix.shape[0]
+
+        if isinstance(recoveryRates, float):
+            recoveryRates = np.full(numIssuers, recoveryRates)
+        else:
+            recoveryRates = np.array(recoveryRates, dtype=np.float64)
+
+        if len(recoveryRates) != numIssuers:
+            raise FinError("Need one recovery rate for each issuer.")
+
+        self._valuationDate = valuationDate
+        self._cdsContracts = cdsContracts
+        self._spreadMatrix = spreadMatrix
+        self._recoveryRates = recoveryRates
+        self._liborCurve = liborCurve
+        self._interpolationMethod = FinInterpTypes.FLAT_FORWARDS
+
+        self._times, self._qMatrix = \
+            survivalMatrixFromSpreads(valuationDate,
+                                      cdsContracts,
+                                      liborCurve,
+                                      spreadMatrix,
+                                      standardRecovery)
+
+###############################################################################
+
+    @classmethod
+    def fromSpreadMatrix(cls,
+                         valuationDate: FinDate,
+                         tenors: list,
+                         spreads: np.ndarray,
+                         recoveries: (float, list, np.ndarray),
+                         liborCurve):
+        ''' Create the set of curves from a list of CDS tenors such as "5Y"
+        or maturity dates and a matrix of CDS spreads with one row per issuer
+        and one column per tenor. One standard CDS contract is created for
+        each tenor with protection starting on the valuation date and its
+        schedule is shared by all of the issuers. '''
+
+        cdsContracts = []
+        for tenor in tenors:
+            cds = FinCDS(valuationDate, tenor, 0.0)
+            cdsContracts.append(cds)
+
+        return cls(valuationDate, cdsContracts, spreads, recoveries,
+                   liborCurve)
+
+###############################################################################
+
+    def numIssuers(self):
+        ''' The number of issuer curves in the set. '''
+        return self._qMatrix.shape[0]
+
+###############################################################################
+
+    def issuerCurve(self,
+                    issuerIndex: int):
+        ''' Return the curve of one issuer as a FinCDSCurve. It shares the
+        grid times of the set and its survival probabilities are a view onto
+        the row of the survival matrix so no curve data is copied. It holds
+        its own copies of the CDS contracts with the issuer spreads as their
+        coupons. If the curve is rebuilt, for example to calculate a risk
+        sensitivity, it gets its own arrays and the set is not changed. '''
+
+        if issuerIndex < 0 or issuerIndex >= self.numIssuers():
+            raise FinError("Issuer index out of range.")
+
+        recoveryRate = float(self._recoveryRates[issuerIndex])
+        curve = FinCDSCurve(self._valuationDate, [], self._liborCurve,
+                            recoveryRate)
+
+        issuerContracts = []
+        spreads = self._spreadMatrix[issuerIndex]
+
+        for cds, spread in zip(self._cdsContracts, spreads):
+            issuerCDS = copy(cds)
+            issuerCDS._runningCoupon = spread
+            issuerCDS._flows = [accrualFactor * spread * cds._notional
+                                for accrualFactor in cds._accrualFactors]
+            issuerContracts.append(issuerCDS)
+
+        curve._cdsContracts = issuerContracts
+        curve._times = self._times
+        curve._values = self._qMatrix[issuerIndex]
+        curve._builtOK = True
+        return curve
+
+###############################################################################
+
+    def issuerCurves(self):
+        ''' Return a list of the curves of all of the issuers which can be
+        passed to FinCDSIndexPortfolio and FinCDSTranche. '''
+
+        curves = []
+        for issuerIndex in range(0, self.numIssuers()):
+            curves.append(self.issuerCurve(issuerIndex))
+        return curves
+
+###############################################################################
+
+    def survProb(self,
+                 dt):
+        ''' Survival probabilities of all of the issuers to a date or to a
+        time in years or to a list or vector of times. A single date or time
+        returns a vector with one value per issuer. A vector of times returns
+        a matrix with one row per issuer and one column per time. '''
+
+        if isinstance(dt, FinDate):
+            t = (dt - self._valuationDate) / gDaysInYear
+        elif isinstance(dt, list):
+            t = np.array(dt)
+        else:
+            t = dt
+
+        if np.any(t < 0.0):
+            raise FinError("Survival Date before curve anchor date")
+
+        if isinstance(t, np.ndarray):
+            times = np.ascontiguousarray(t, dtype=np.float64)
+            return _vinterpolateMany(times,
+                                     self._times,
+                                     self._qMatrix,
+                                     self._interpolationMethod.value)
+
+        times = np.array([t], dtype=np.float64)
+        qs = _vinterpolateMany(times,
+                               self._times,
+                               self._qMatrix,
+                               self._interpolationMethod.value)
+        return qs[:, 0]
+
+###############################################################################
+
+    def __len__(self):
+        return self._qMatrix.shape[0]
+
+###############################################################################
+
+    def __getitem__(self, issuerIndex):
+        return self.issuerCurve(issuerIndex)
+
+###############################################################################
+
+    def __iter__(self):
+        return iter(self.issuerCurves())
+
+###############################################################################
+
+    def __repr__(self):
+        s = labelToString("OBJECT TYPE", type(self).__name__)
+        s += labelToString("VALUATION DATE", self._valuationDate)
+        s += labelToString("NUM ISSUERS", self._qMatrix.shape[0])
+        s += labelToString("NUM CDS CONTRACTS", len(self._cdsContracts))
+        for cds in self._cdsContracts:
+            s += labelToString("CDS MATURITY", cds._maturityDate)
+        return s
+
+###############################################################################
+
+    def _print(self):
+        ''' Simple print function for backward compatibility. '''
+        print(self)
+
+###############################################################################
@@ -0,0 +1,418 @@
+##############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+##############################################################################
+
+from math import exp, log
+import numpy as np
+from numba import njit, prange
+
+from ...finutils.FinDate import FinDate
+from ...finutils.FinError import FinError
+from ...finutils.FinMath import ONE_MILLION
+from ...finutils.FinHelperFunctions import checkArgumentTypes
+from ...finutils.FinHelperFunctions import labelToString
+from ...market.curves.FinInterpolate import FinInterpTypes, _uinterpolate
+from .FinCDS import FinCDS, standardRecovery, useFlatHazardRateIntegral
+from .FinCDSCurve import _cdsBootstrapData
+from .FinCDSCurveSet import FinCDSCurveSet
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True, parallel=True)
+def _cdsLegValues_NUMBA(pairSchedules, pairCurves,
+                        teffs, accrualFactorsPCDToNow,
+                        payStarts, payTimes, yearFracs, payDfs,
+                        protStarts, protTimes, protDfs, protSteps,
+                        survStarts, survTimes, survValues):
+    ''' Calculate the full and clean risky PV01 and the protection leg PV per
+    unit notional and with zero recovery for each pair of CDS schedule and
+    issuer curve. The payment times, accrual factors and Libor discount
+    factors of each schedule have been precomputed so only the survival
+    probabilities are interpolated. This is the same calculation as is done
+    by _riskyPV01_NUMBA and _protectionLegPV_NUMBA. '''
+
+    method = FinInterpTypes.FLAT_FORWARDS.value
+    small = 1e-8
+
+    numPairs = len(pairSchedules)
+    fullRPV01s = np.zeros(numPairs)
+    cleanRPV01s = np.zeros(numPairs)
+    protPVs = np.zeros(numPairs)
+
+    for iPair in prange(0, numPairs):
+
+        iSchedule = pairSchedules[iPair]
+        iCurve = pairCurves[iPair]
+
+        s0 = survStarts[iCurve]
+        s1 = survStarts[iCurve + 1]
+        sTimes = survTimes[s0:s1]
+        sValues = survValues[s0:s1]
+
+        p0 = payStarts[iSchedule]
+        p1 = payStarts[iSchedule + 1]
+
+        #######################################################################
+        # Premium leg risky PV01
+        #######################################################################
+
+        accrualFactorPCDToNow = accrualFactorsPCDToNow[iSchedule]
+
+        qeff = _uinterpolate(teffs[iSchedule], sTimes, sValues, method)
+        q1 = _uinterpolate(payTimes[p0 + 1], sTimes, sValues, method)
+        z1 = payDfs[p0 + 1]
+        y1 = yearFracs[p0 + 1]
+
+        fullRPV01 = q1 * z1 * y1
+        fullRPV01 += z1 * (qeff - q1) * accrualFactorPCDToNow
+        fullRPV01 += 0.5 * z1 * (qeff - q1) * (y1 - accrualFactorPCDToNow)
+
+        for it in range(p0 + 2, p1):
+
+            q2 = _uinterpolate(payTimes[it], sTimes, sValues, method)
+            z2 = payDfs[it]
+            tau = yearFracs[it]
+
+            fullRPV01 += q2 * z2 * tau
+
+            if useFlatHazardRateIntegral:
+                h12 = -log(q2 / q1) / tau
+                r12 = -log(z2 / z1) / tau
+                alpha = h12 + r12
+                expTerm = 1.0 - exp(-alpha * tau) - alpha * \
+                    tau * exp(-alpha * tau)
+                fullRPV01 += q1 * z1 * h12 * \
+                    expTerm / abs(alpha * alpha + 1e-20)
+            else:
+                fullRPV01 += 0.50 * (q1 - q2) * z2 * tau
+
+            # The Libor discount factor z1 is not moved on as in FinCDS
+            q1 = q2
+
+        fullRPV01s[iPair] = fullRPV01
+        cleanRPV01s[iPair] = fullRPV01 - accrualFactorPCDToNow
+
+        #######################################################################
+        # Protection leg
+        #######################################################################
+
+        k0 = protStarts[iSchedule]
+        k1 = protStarts[iSchedule + 1]
+        dt = protSteps[iSchedule]
+
+        q1 = _uinterpolate(protTimes[k0], sTimes, sValues, method)
+        z1 = protDfs[k0]
+
+        protPV = 0.0
+
+        for k in range(k0 + 1, k1):
+
+            q2 = _uinterpolate(protTimes[k], sTimes, sValues, method)
+            z2 = protDfs[k]
+
+            if useFlatHazardRateIntegral:
+                h12 = -log(q2 / q1) / dt
+                r12 = -log(z2 / z1) / dt
+                expTerm = exp(-(r12 + h12) * dt)
+                protPV += h12 * (1.0 - expTerm) * q1 * z1 / \
+                    (abs(h12 + r12) + small)
+            else:
+                protPV += 0.5 * (z1 + z2) * (q1 - q2)
+
+            q1 = q2
+            z1 = z2
+
+        protPVs[iPair] = protPV
+
+    return fullRPV01s, cleanRPV01s, protPVs
+
+###############################################################################
+
+
+class FinCDSPortfolioPricer():
+    ''' Value a large portfolio of CDS positions in one pass. Positions that
+    share the same premium leg schedule, meaning the same step-in date,
+    maturity date and conventions, share the payment times, accrual factors
+    and Libor discount factors which are computed once for each schedule.
+    The risky PV01 and protection leg of each distinct pair of schedule and
+    issuer curve is then calculated in parallel in Numba and the positions
+    are valued from these using their coupons, notionals and directions. The
+    results are the same as those of FinCDS.value, riskyPV01 and parSpread
+    for each position. '''
+
+    def __init__(self,
+                 valuationDate: FinDate,
+                 liborCurve,
+                 numStepsPerYear: int = 25):
+        ''' Create the pricer from the valuation date and the Libor curve
+        used to discount all of the positions. The number of steps is used in
+        the integration of the protection leg as in FinCDS.value. '''
+
+        checkArgumentTypes(self.__init__, locals())
+
+        if valuationDate != liborCurve._valuationDate:
+            raise FinError("Libor curve does not have same valuation date.")
+
+        self._valuationDate = valuationDate
+        self._liborCurve = liborCurve
+        self._numStepsPerYear = numStepsPerYear
+
+        self._schedules = []
+        self._scheduleIndex = {}
+        self._scheduleData = None
+
+        self._positionArrays = []
+        self._positions = None
+
+###############################################################################
+
+    def _addSchedule(self, cds):
+        ''' Return the index of the schedule of a CDS contract adding it to
+        the list of schedules if it has not been seen before. '''
+
+        key = (cds._stepInDate._excelDate,
+               cds._maturityDate._excelDate,
+               cds._frequencyType,
+               cds._dayCountType,
+               cds._calendarType,
+               cds._busDayAdjustType,
+               cds._dateGenRuleType)
+
+        scheduleIndex = self._scheduleIndex.get(key)
+
+        if scheduleIndex is None:
+            scheduleIndex = len(self._schedules)
+            self._scheduleIndex[key] = scheduleIndex
+            self._schedules.append(cds)
+            self._scheduleData = None
+
+        return scheduleIndex
+
+###############################################################################
+
+    def addPositions(self,
+                     cds: FinCDS,
+                     issuerIndices: (int, list, np.ndarray),
+                     coupons: (float, list, np.ndarray),
+                     notionals: (float, list, np.ndarray) = ONE_MILLION,
+                     longProtection: (bool, list, np.ndarray) = True):
+        ''' Add a block of positions which all have the schedule of the CDS
+        contract. The coupon and notional of the contract are not used. Each
+        position refers to its issuer curve by its index in the list of
+        curves passed to the value function. The coupons, notionals and
+        directions can be one value for all of the positions or one value for
+        each. Returns the indices of the new positions in the results. '''
+
+        scheduleIndex = self._addSchedule(cds)
+
+        issuerIndices = np.atleast_1d(np.array(issuerIndices, dtype=np.int64))
+        numPositions = len(issuerIndices)
+
+        if numPositions == 0:
+            raise FinError("No positions have been supplied.")
+
+        scheduleIndices = np.full(numPositions, scheduleIndex, dtype=np.int64)
+        coupons = np.broadcast_to(np.array(coupons, dtype=np.float64),
+                                  numPositions)
+        notionals = np.broadcast_to(np.array(notionals, dtype=np.float64),
+                                    numPositions)
+        longProtection = np.broadcast_to(np.array(longProtection,
+                                                  dtype=np.bool_),
+                                         numPositions)
+        signs = np.where(longProtection, 1.0, -1.0)
+
+        firstPosition = self.numPositions()
+
+        self._positionArrays.append((scheduleIndices, issuerIndices,
+                                     coupons.copy(), notionals.copy(), signs))
+        self._positions = None
+
+        return np.arange(firstPosition, firstPosition + numPositions)
+
+###############################################################################
+
+    def addTrades(self,
+                  cdsContracts: list,
+                  issuerIndices: (list, np.ndarray)):
+        ''' Add a list of CDS contracts as positions using their own coupons,
+        notionals and directions. Contract i uses the issuer curve with index
+        issuerIndices[i]. Returns the indices of the new positions in the
+        results. '''
+
+        if len(cdsContracts) != len(issuerIndices):
+            raise FinError("Need one issuer index for each CDS contract.")
+
+        if len(cdsContracts) == 0:
+            raise FinError("No CDS contracts have been supplied.")
+
+        scheduleIndices = []
+        coupons = []
+        notionals = []
+        signs = []
+
+        for cds in cdsContracts:
+            scheduleIndices.append(self._addSchedule(cds))
+            coupons.append(cds._runningCoupon)
+            notionals.append(cds._notional)
+            signs.append(1.0 if cds._longProtection else -1.0)
+
+        firstPosition = self.numPositions()
+
+        self._positionArrays.append((np.array(scheduleIndices, dtype=np.int64),
+                                     np.array(issuerIndices, dtype=np.int64),
+                                     np.array(coupons, dtype=np.float64),
+                                     np.array(notionals, dtype=np.float64),
+                                     np.array(signs)))
+        self._positions = None
+
+        return np.arange(firstPosition, firstPosition + len(cdsContracts))
+
+###############################################################################
+
+    def numPositions(self):
+        ''' The number of positions in the portfolio. '''
+
+        numPositions = 0
+        for positionArrays in self._positionArrays:
+            numPositions += len(positionArrays[0])
+        return numPositions
+
+###############################################################################
+
+    def numSchedules(self):
+        ''' The number of distinct CDS schedules used by the positions. '''
+        return len(self._schedules)
+
+###############################################################################
+
+    def _packPositions(self):
+        ''' Join the blocks of positions into one array for each field. '''
+
+        if self._positions is None:
+            self._positions = [np.concatenate(field)
+                               for field in zip(*self._positionArrays)]
+
+        return self._positions
+
+###############################################################################
+
+    def _packSchedules(self):
+        ''' Precompute the payment times, accrual factors and Libor discount
+        factors of all of the schedules. This is done once and reused until
+        a new schedule is added. '''
+
+        if self._scheduleData is None:
+            self._scheduleData = _cdsBootstrapData(self._schedules,
+                                                   self._valuationDate,
+                                                   self._liborCurve,
+                                                   self._numStepsPerYear)
+
+        return self._scheduleData
+
+###############################################################################
+
+    def _packIssuerCurves(self, issuerCurves):
+        ''' Pack the survival curve grids of the issuers into flat arrays
+        where the grid of curve i runs from index starts[i] to starts[i+1]. '''
+
+        if isinstance(issuerCurves, FinCDSCurveSet):
+            qMatrix = issuerCurves._qMatrix
+            numCurves, numTimes = qMatrix.shape
+            survTimes = np.tile(issuerCurves._times, numCurves)
+            survValues = np.ascontiguousarray(qMatrix).ravel()
+            survStarts = np.arange(numCurves + 1, dtype=np.int64) * numTimes
+            return survStarts, survTimes, survValues
+
+        numCurves = len(issuerCurves)
+
+        if numCurves == 0:
+            raise FinError("No issuer curves have been supplied.")
+
+        survStarts = np.zeros(numCurves + 1, dtype=np.int64)
+
+        for i in range(0, numCurves):
+            survStarts[i + 1] = survStarts[i] + len(issuerCurves[i]._times)
+
+        survTimes = np.concatenate([np.asarray(curve._times, np.float64)
+                                    for curve in issuerCurves])
+        survValues = np.concatenate([np.asarray(curve._values, np.float64)
+                                     for curve in issuerCurves])
+
+        return survStarts, survTimes, survValues
+
+###############################################################################
+
+    def value(self,
+              issuerCurves: (list, FinCDSCurveSet),
+              contractRecovery: (float, np.ndarray) = standardRecovery):
+        ''' Value all of the positions given a list of issuer curves or a
+        FinCDSCurveSet and a contract recovery rate which can be one value
+        for all positions or one per position. Returns a dictionary of
+        vectors with one value per position. These are the full and clean
+        PV, the full and clean risky PV01, the protection leg PV and the par
+        spread. '''
+
+        if len(self._positionArrays) == 0:
+            raise FinError("No positions have been added.")
+
+        (scheduleIndices, issuerIndices,
+         coupons, notionals, signs) = self._packPositions()
+
+        survStarts, survTimes, survValues = \
+            self._packIssuerCurves(issuerCurves)
+
+        numCurves = len(survStarts) - 1
+
+        if np.any(issuerIndices < 0) or np.any(issuerIndices >= numCurves):
+            raise FinError("Issuer index out of range.")
+
+        (_, teffs, accrualFactorsPCDToNow,
+         payStarts, payTimes, yearFracs, payDfs,
+         protStarts, protTimes, protDfs, protSteps) = self._packSchedules()
+
+        # Positions with the same schedule and issuer have the same legs
+        pairKeys = scheduleIndices * numCurves + issuerIndices
+        uniqueKeys, pairIndices = np.unique(pairKeys, return_inverse=True)
+        pairSchedules = uniqueKeys // numCurves
+        pairCurves = uniqueKeys % numCurves
+
+        fullRPV01s, cleanRPV01s, protPVs = \
+            _cdsLegValues_NUMBA(pairSchedules, pairCurves,
+                                teffs, accrualFactorsPCDToNow,
+                                payStarts, payTimes, yearFracs, payDfs,
+                                protStarts, protTimes, protDfs, protSteps,
+                                survStarts, survTimes, survValues)
+
+        fullRPV01 = fullRPV01s[pairIndices]
+        cleanRPV01 = cleanRPV01s[pairIndices]
+        protPV = protPVs[pairIndices] * (1.0 - contractRecovery)
+
+        fullPV = signs * notionals * (protPV - coupons * fullRPV01)
+        cleanPV = signs * notionals * (protPV - coupons * cleanRPV01)
+        parSpread = protPV / cleanRPV01
+
+        return {'full_pv': fullPV,
+                'clean_pv': cleanPV,
+                'full_rpv01': fullRPV01,
+                'clean_rpv01': cleanRPV01,
+                'prot_pv': protPV * notionals,
+                'par_spread': parSpread}
+
+###############################################################################
+
+    def __repr__(self):
+        s = labelToString("OBJECT TYPE", type(self).__name__)
+        s += labelToString("VALUATION DATE", self._valuationDate)
+        s += labelToString("NUM POSITIONS", self.numPositions())
+        s += labelToString("NUM SCHEDULES", self.numSchedules())
+        s += labelToString("NUM STEPS PER YEAR", self._numStepsPerYear)
+        return s
+
+###############################################################################
+
+    def _print(self):
+        ''' Simple print function for backward compatibility. '''
+        print(self)
+
+###############################################################################
@@ -6,12 +6,20 @@
 
 import numpy as np
 from math import sqrt
+from collections import OrderedDict
 
 
-from ...models.FinModelGaussianCopula1F import trSurvProbGaussian
-from ...models.FinModelGaussianCopula1F import trSurvProbAdjBinomial
-from ...models.FinModelGaussianCopula1F import trSurvProbRecursion
-from ...models.FinModelGaussianCopulaLHP import trSurvProbLHP
+from ...models.FinModelGaussianCopula1F import trSurvProbsLossDbns
+from ...models.FinModelGaussianCopula1F import uniformQuadrature
+from ...models.FinModelGaussianCopula1F import gaussHermiteTable
+from ...models.FinModelGaussianCopula1F import defaultThresholds
+from ...models.FinModelGaussianCopula1F import lossUnitsGCD
+from ...models.FinModelGaussianCopula1F import lossDbnsRecursionQuadrature
+from ...models.FinModelGaussianCopula1F import lossDbnsAdjBinomialQuadrature
+from ...models.FinModelGaussianCopula1F import condLossMomentsGaussianQuadrature
+from ...models.FinModelGaussianCopula1F import trSurvProbsCondMomentsQuadrature
+from ...models.FinModelGaussianCopula1F import lossDbnsFFTQuadrature
+from ...models.FinModelGaussianCopulaLHP import trSurvProbsLHP
 
 from ...finutils.FinDayCount import FinDayCountTypes
 from ...finutils.FinFrequency import FinFrequencyTypes
@@ -27,6 +35,7 @@ from ...market.curves.FinInterpolate import FinInterpTypes, interpolate
 from ...finutils.FinError import FinError
 
 from ...finutils.FinHelperFunctions import checkArgumentTypes
+from ...finutils.FinHelperFunctions import labelToString
 from ...finutils.FinDate import FinDate
 
 ###############################################################################
@@ -39,6 +48,220 @@ class FinLossDistributionBuilder(Enum):
     ADJUSTED_BINOMIAL = 2
     GAUSSIAN = 3
     LHP = 4
+    FFT = 5
+
+###############################################################################
+
+
+class FinTrancheLossSurface(object):
+    ''' The portfolio loss distributions of a set of issuers in the one-factor
+    Gaussian copula model at a set of times. The loss distribution at each
+    time is built once for each correlation and kept so that the survival
+    probabilities of all of the tranches on the same portfolio can be read
+    from it without integrating over the market factor again. For the
+    Gaussian model the mean and standard deviation of the conditional loss
+    at each point of the integration grid are kept instead. The default
+    thresholds of the issuers are found once and the loss distributions at
+    all of the times are built together in parallel using a cached table of
+    quadrature nodes and weights over the market factor. Only the loss data
+    of the most recently used correlations is kept. '''
+
+    def __init__(self,
+                 valuationDate: FinDate,
+                 issuerCurves: list,
+                 times,
+                 numPoints: int = 50,
+                 model: FinLossDistributionBuilder = FinLossDistributionBuilder.RECURSION,
+                 gaussHermite: bool = False,
+                 maxCorrelations: int = 10):
+        ''' Create the loss surface from the issuer curves of the portfolio
+        and the times in years from the valuation date at which the loss
+        distributions are required. The number of points is used in the
+        integration over the market factor. This is on the uniform grid used
+        by the tranche survival probability functions unless gaussHermite is
+        True in which case Gauss-Hermite quadrature is used. The loss data is
+        kept for at most maxCorrelations correlations so that the trial
+        correlations of a root search do not accumulate. '''
+
+        checkArgumentTypes(self.__init__, locals())
+
+        numCredits = len(issuerCurves)
+
+        if numCredits == 0:
+            raise FinError("Number of credits equals zero")
+
+        if maxCorrelations < 1:
+            raise FinError("Maximum number of correlations must be positive.")
+
+        self._valuationDate = valuationDate
+        self._times = np.array(times, dtype=np.float64)
+        self._numPoints = numPoints
+        self._model = model
+        self._gaussHermite = gaussHermite
+        self._maxCorrelations = maxCorrelations
+        self._issuerCurves = list(issuerCurves)
+
+        numTimes = len(self._times)
+
+        self._recoveryRates = np.zeros(numCredits)
+        self._qMatrix = np.zeros((numTimes, numCredits))
+
+        for j in range(0, numCredits):
+            issuerCurve = issuerCurves[j]
+            self._recoveryRates[j] = issuerCurve._recoveryRate
+            self._qMatrix[:, j] = self._survivalProbs(issuerCurve)
+
+        self._thresholds = defaultThresholds(self._qMatrix)
+
+        self._lossData = OrderedDict()
+
+###############################################################################
+
+    def _survivalProbs(self, issuerCurve):
+        ''' Interpolate the survival probabilities of an issuer curve at the
+        times of the surface. '''
+
+        vTimes = np.asarray(issuerCurve._times, dtype=np.float64)
+        qRow = np.asarray(issuerCurve._values, dtype=np.float64)
+        return interpolate(self._times, vTimes, qRow,
+                           FinInterpTypes.FLAT_FORWARDS.value)
+
+###############################################################################
+
+    def checkIssuerCurves(self, issuerCurves):
+        ''' Check that the issuer curves are those the surface was built
+        from. Curves which are not the same objects must have the same
+        recovery rate and survival probabilities at the surface times. '''
+
+        if len(issuerCurves) != len(self._issuerCurves):
+            raise FinError("Loss surface has a different number of issuers.")
+
+        for j, issuerCurve in enumerate(issuerCurves):
+
+            if issuerCurve is self._issuerCurves[j]:
+                continue
+
+            if issuerCurve._recoveryRate != self._recoveryRates[j] or \
+                    not np.array_equal(self._survivalProbs(issuerCurve),
+                                       self._qMatrix[:, j]):
+                raise FinError("Loss surface was built from other issuers.")
+
+###############################################################################
+
+    def _buildLossData(self, corr):
+        ''' Build the loss distribution or the conditional loss moments at
+        each time for a flat correlation. '''
+
+        numCredits = self._qMatrix.shape[1]
+        beta = sqrt(corr)
+        betaVector = np.full(numCredits, beta)
+
+        # High beta requires more integration steps as in lossDbnRecursion
+        numPoints = self._numPoints
+        if beta > 0.8 and (self._model == FinLossDistributionBuilder.RECURSION
+                           or self._model == FinLossDistributionBuilder.FFT):
+            numPoints *= 2
+
+        if self._gaussHermite:
+            nodes, weights = gaussHermiteTable(numPoints)
+        else:
+            nodes, weights = uniformQuadrature(numPoints)
+
+        if self._model == FinLossDistributionBuilder.RECURSION:
+            lossUnits, gcd, _ = lossUnitsGCD(numCredits, self._recoveryRates)
+            lossDbns = lossDbnsRecursionQuadrature(self._thresholds, lossUnits,
+                                                   betaVector, nodes, weights)
+            lossData = (lossDbns, gcd)
+        elif self._model == FinLossDistributionBuilder.ADJUSTED_BINOMIAL:
+            lossData = lossDbnsAdjBinomialQuadrature(self._thresholds,
+                                                     self._recoveryRates,
+                                                     betaVector, nodes,
+                                                     weights)
+        elif self._model == FinLossDistributionBuilder.GAUSSIAN:
+            mus, sigmas = condLossMomentsGaussianQuadrature(
+                self._thresholds, self._recoveryRates, betaVector, nodes)
+            lossData = (mus, sigmas, weights)
+        elif self._model == FinLossDistributionBuilder.LHP:
+            lossData = None
+        elif self._model == FinLossDistributionBuilder.FFT:
+            lossData = lossDbnsFFTQuadrature(self._qMatrix,
+                                             self._recoveryRates,
+                                             betaVector, nodes, weights)
+        else:
+            raise FinError("Unknown model type " + str(self._model))
+
+        return lossData
+
+###############################################################################
+
+    def trancheSurvProbs(self, k1, k2, corr):
+        ''' Get the survival probabilities of the tranche from K1 to K2 at
+        each time of the surface for a flat correlation. The loss data for the
+        correlation is built on the first call and reused after that. '''
+
+        numTimes, numCredits = self._qMatrix.shape
+
+        if k1 == 0.0 and k2 == 0.0:
+            return np.zeros(numTimes)
+
+        if corr < 0.0 or corr > 1.0:
+            raise FinError("Correlation must be between 0 and 1")
+
+        corr = float(corr)
+
+        if corr in self._lossData:
+            self._lossData.move_to_end(corr)
+        else:
+            self._lossData[corr] = self._buildLossData(corr)
+
+            while len(self._lossData) > self._maxCorrelations:
+                self._lossData.popitem(last=False)
+
+        lossData = self._lossData[corr]
+
+        if self._model == FinLossDistributionBuilder.GAUSSIAN:
+            mus, sigmas, weights = lossData
+            qt = trSurvProbsCondMomentsQuadrature(k1, k2, mus, sigmas,
+                                                  weights)
+        elif self._model == FinLossDistributionBuilder.LHP:
+            qt = trSurvProbsLHP(k1, k2, self._qMatrix, self._recoveryRates,
+                                sqrt(corr))
+        else:
+            lossDbns, lossUnit = lossData
+            qt = trSurvProbsLossDbns(k1, k2, lossDbns, lossUnit)
+
+        return qt
+
+###############################################################################
+
+    def numCorrelations(self):
+        ''' The number of correlations for which loss data is held. '''
+        return len(self._lossData)
+
+###############################################################################
+
+    def clear(self):
+        ''' Remove the loss data of all of the correlations. '''
+        self._lossData.clear()
+
+###############################################################################
+
+    def __repr__(self):
+        s = labelToString("OBJECT TYPE", type(self).__name__)
+        s += labelToString("VALUATION DATE", self._valuationDate)
+        s += labelToString("NUM CREDITS", self._qMatrix.shape[1])
+        s += labelToString("NUM TIMES", len(self._times))
+        s += labelToString("NUM POINTS", self._numPoints)
+        s += labelToString("MODEL", self._model)
+        s += labelToString("GAUSS HERMITE", self._gaussHermite)
+        s += labelToString("MAX CORRELATIONS", self._maxCorrelations)
+        s += labelToString("NUM CORRELATIONS", len(self._lossData))
+        return s
+
+###############################################################################
+
+    def _print(self):
+        print(self)
 
 ###############################################################################
 
@@ -93,17 +316,56 @@ class FinCDSTranche(object):
 
 ###############################################################################
 
-    def valueBC(self,
-                valuationDate,
-                issuerCurves,
-                upfront,
-                runningCoupon,
-                corr1,
-                corr2,
-                numPoints=50,
-                model=FinLossDistributionBuilder.RECURSION):
+    def _paymentTimes(self, valuationDate):
+        ''' The times in years from the valuation date to the payment dates
+        of the tranche after the first date. '''
+
+        paymentDates = self._cdsContract._adjustedDates
+        numTimes = len(paymentDates)
+
+        times = np.zeros(numTimes - 1)
+        for i in range(1, numTimes):
+            times[i - 1] = (paymentDates[i] - valuationDate) / gDaysInYear
+
+        return times
+
+###############################################################################
+
+    def lossSurface(self,
+                    valuationDate,
+                    issuerCurves,
+                    numPoints=50,
+                    model=FinLossDistributionBuilder.RECURSION,
+                    gaussHermite=False):
+        ''' Build the loss surface of the portfolio at the payment times of
+        the tranche. It can be passed to valueBC of every tranche with the
+        same payment dates so that the loss distributions are only built once
+        for each correlation across the capital structure. '''
+
+        times = self._paymentTimes(valuationDate)
+        lossSurface = FinTrancheLossSurface(valuationDate, issuerCurves,
+                                            times, numPoints, model,
+                                            gaussHermite)
+        return lossSurface
+
+###############################################################################
+
+    def survivalCurve(self,
+                      valuationDate,
+                      issuerCurves,
+                      corr1,
+                      corr2,
+                      numPoints=50,
+                      model=FinLossDistributionBuilder.RECURSION,
+                      lossSurface=None):
+        ''' Get the survival curve of the tranche at its payment dates using
+        base correlations corr1 and corr2 at the attachment and detachment
+        points. All of the time slices are calculated together in parallel by
+        the loss surface. If a loss surface is passed then the loss
+        distributions are read from it and the number of points and model
+        are those of the surface. The curve is returned as a FinCDSCurve with
+        zero recovery which can be used to value the tranche legs. '''
 
-        numCredits = len(issuerCurves)
         k1 = self._k1
         k2 = self._k2
         tmat = (self._maturityDate - valuationDate) / gDaysInYear
@@ -112,107 +374,46 @@ class FinCDSTranche(object):
             raise FinError("Value date is after maturity date")
 
         if abs(k1 - k2) < 0.00000001:
-            output = np.zeros(4)
-            output[0] = 0.0
-            output[1] = 0.0
-            output[2] = 0.0
-            output[3] = 0.0
-            return output
+            raise FinError("Tranche K1 and K2 are too close.")
 
         if k1 > k2:
             raise FinError("K1 > K2")
 
         kappa = k2 / (k2 - k1)
 
-        recoveryRates = np.zeros(numCredits)
-
-        paymentDates = self._cdsContract._adjustedDates
-        numTimes = len(paymentDates)
-
-        beta1 = sqrt(corr1)
-        beta2 = sqrt(corr2)
-        betaVector1 = np.zeros(numCredits)
-        for bb in range(0, numCredits):
-            betaVector1[bb] = beta1
+        times = self._paymentTimes(valuationDate)
 
-        betaVector2 = np.zeros(numCredits)
-        for bb in range(0, numCredits):
-            betaVector2[bb] = beta2
-
-        qVector = np.zeros(numCredits)
-        qt1 = np.zeros(numTimes)
-        qt2 = np.zeros(numTimes)
-        trancheTimes = np.zeros(numTimes)
-        trancheSurvivalCurve = np.zeros(numTimes)
+        if lossSurface is None:
+            lossSurface = FinTrancheLossSurface(valuationDate, issuerCurves,
+                                                times, numPoints, model)
+        else:
+            if lossSurface._valuationDate != valuationDate or \
+                    len(lossSurface._times) != len(times) or \
+                    np.any(lossSurface._times != times):
+                raise FinError(
+                    "Loss surface times are not the payment times.")
 
-        trancheTimes[0] = 0
-        trancheSurvivalCurve[0] = 1.0
-        qt1[0] = 1.0
-        qt2[0] = 1.0
+            lossSurface.checkIssuerCurves(issuerCurves)
 
-        for i in range(1, numTimes):
+        numTimes = len(times) + 1
 
-            t = (paymentDates[i] - valuationDate) / gDaysInYear
-
-            for j in range(0, numCredits):
-
-                issuerCurve = issuerCurves[j]
-                vTimes = issuerCurve._times
-                qRow = issuerCurve._values
-                recoveryRates[j] = issuerCurve._recoveryRate
-                qVector[j] = interpolate(
-                    t, vTimes, qRow, FinInterpTypes.FLAT_FORWARDS.value)
-
-            if model == FinLossDistributionBuilder.RECURSION:
-                qt1[i] = trSurvProbRecursion(
-                    0.0, k1, numCredits, qVector, recoveryRates,
-                    betaVector1, numPoints)
-                qt2[i] = trSurvProbRecursion(
-                    0.0, k2, numCredits, qVector, recoveryRates,
-                    betaVector2, numPoints)
-            elif model == FinLossDistributionBuilder.ADJUSTED_BINOMIAL:
-                qt1[i] = trSurvProbAdjBinomial(
-                    0.0, k1, numCredits, qVector, recoveryRates,
-                    betaVector1, numPoints)
-                qt2[i] = trSurvProbAdjBinomial(
-                    0.0, k2, numCredits, qVector, recoveryRates,
-                    betaVector2, numPoints)
-            elif model == FinLossDistributionBuilder.GAUSSIAN:
-                qt1[i] = trSurvProbGaussian(
-                    0.0,
-                    k1,
-                    numCredits,
-                    qVector,
-                    recoveryRates,
-                    betaVector1,
-                    numPoints)
-                qt2[i] = trSurvProbGaussian(
-                    0.0,
-                    k2,
-                    numCredits,
-                    qVector,
-                    recoveryRates,
-                    betaVector2,
-                    numPoints)
-            elif model == FinLossDistributionBuilder.LHP:
-                qt1[i] = trSurvProbLHP(
-                    0.0, k1, numCredits, qVector, recoveryRates, beta1)
-                qt2[i] = trSurvProbLHP(
-                    0.0, k2, numCredits, qVector, recoveryRates, beta2)
-            else:
-                raise FinError(
-                    "Unknown model type only full and AdjBinomial allowed")
+        qt1 = np.ones(numTimes)
+        qt2 = np.ones(numTimes)
+        qt1[1:] = lossSurface.trancheSurvProbs(0.0, k1, corr1)
+        qt2[1:] = lossSurface.trancheSurvProbs(0.0, k2, corr2)
 
-            if qt1[i] > qt1[i - 1]:
-                raise FinError(
-                    "Tranche K1 survival probabilities not decreasing.")
+        if np.any(qt1[1:] > qt1[:-1]):
+            raise FinError(
+                "Tranche K1 survival probabilities not decreasing.")
 
-            if qt2[i] > qt2[i - 1]:
-                raise FinError(
-                    "Tranche K2 survival probabilities not decreasing.")
+        if np.any(qt2[1:] > qt2[:-1]):
+            raise FinError(
+                "Tranche K2 survival probabilities not decreasing.")
 
-            trancheSurvivalCurve[i] = kappa * qt2[i] + (1.0 - kappa) * qt1[i]
-            trancheTimes[i] = t
+        trancheTimes = np.zeros(numTimes)
+        trancheTimes[1:] = times
+        trancheSurvivalCurve = kappa * qt2 + (1.0 - kappa) * qt1
+        trancheSurvivalCurve[0] = 1.0
 
         curveRecovery = 0.0  # For tranches only
         liborCurve = issuerCurves[0]._liborCurve
@@ -221,6 +422,45 @@ class FinCDSTranche(object):
         trancheCurve._times = trancheTimes
         trancheCurve._values = trancheSurvivalCurve
 
+        return trancheCurve
+
+###############################################################################
+
+    def valueBC(self,
+                valuationDate,
+                issuerCurves,
+                upfront,
+                runningCoupon,
+                corr1,
+                corr2,
+                numPoints=50,
+                model=FinLossDistributionBuilder.RECURSION,
+                lossSurface=None):
+        ''' Value the tranche using base correlations corr1 and corr2 at the
+        attachment and detachment points. If a loss surface is passed then
+        the loss distributions are read from it and the number of points and
+        model are those of the surface. '''
+
+        k1 = self._k1
+        k2 = self._k2
+        tmat = (self._maturityDate - valuationDate) / gDaysInYear
+
+        if tmat < 0.0:
+            raise FinError("Value date is after maturity date")
+
+        if abs(k1 - k2) < 0.00000001:
+            output = np.zeros(4)
+            output[0] = 0.0
+            output[1] = 0.0
+            output[2] = 0.0
+            output[3] = 0.0
+            return output
+
+        trancheCurve = self.survivalCurve(valuationDate, issuerCurves,
+                                          corr1, corr2, numPoints, model,
+                                          lossSurface)
+        curveRecovery = 0.0  # For tranches only
+
         protLegPV = self._cdsContract.protectionLegPV(
             valuationDate, trancheCurve, curveRecovery)
         riskyPV01 = self._cdsContract.riskyPV01(valuationDate, trancheCurve)['clean_rpv01']
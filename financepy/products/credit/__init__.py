@@ -1,7 +1,10 @@
 from .FinCDS import *
 from .FinCDSCurve import *
+from .FinCDSCurveSet import *
+from .FinCDSPortfolioPricer import *
 from .FinCDSBasket import *
 from .FinCDSIndexOption import *
 from .FinCDSIndexPortfolio import *
 from .FinCDSOption import *
 from .FinCDSTranche import *
+from .FinBaseCorrelationCalibrator import *
@@ -74,7 +74,7 @@ class FinEquityCliquetOption(FinEquityOption):
                                         self._frequencyType,
                                         self._calendarType,
                                         self._busDayAdjustType,
-                                        self._dateGenRuleType)._generate()
+                                        self._dateGenRuleType).scheduleDates()
 
 ###############################################################################
 
@@ -107,7 +107,7 @@ class FinLiborCapFloor():
                                              self._frequencyType,
                                              self._calendarType,
                                              self._busDayAdjustType,
-                                             self._dateGenRuleType)._generate()
+                                             self._dateGenRuleType).scheduleDates()
 
 ##########################################################################
 
@@ -3,14 +3,19 @@
 ##############################################################################
 
 import numpy as np
+from copy import copy
+from numba import njit, float64, int64
 from scipy import optimize
 
 from ...finutils.FinError import FinError
 from ...finutils.FinDate import FinDate
+from ...finutils.FinDayCount import FinDayCount
+from ...finutils.FinGlobalTypes import FinSwapTypes
 from ...finutils.FinHelperFunctions import labelToString
 from ...finutils.FinHelperFunctions import checkArgumentTypes, _funcName
 from ...finutils.FinGlobalVariables import gDaysInYear
-from ...market.curves.FinInterpolate import FinInterpTypes
+from ...market.curves.FinInterpolate import FinInterpTypes, _uinterpolate
+from ...market.curves.FinInterpolate import _findIndex, _uinterpolateIndex
 from ...market.curves.FinDiscountCurve import FinDiscountCurve
 
 swaptol = 1e-8
@@ -34,6 +39,274 @@ def _f(df, *args):
 ###############################################################################
 
 
+def _swapLegTimes(swap, valuationDate):
+    ''' Extract the payment times and accrual factors of the legs of a swap
+    that is being valued on the curve valuation date so that the swap can be
+    repriced in Numba during the bootstrap. The logic for choosing the flows
+    that are after the valuation date follows FinLiborSwap. '''
+
+    fixedDates = swap._adjustedFixedDates
+    floatDates = swap._adjustedFloatDates
+
+    fixedStartIndex = 0
+    while fixedDates[fixedStartIndex] < valuationDate:
+        fixedStartIndex += 1
+
+    floatStartIndex = 0
+    while floatDates[floatStartIndex] < valuationDate:
+        floatStartIndex += 1
+
+    if valuationDate <= swap._startDate:
+        fixedStartIndex = 1
+        floatStartIndex = 1
+
+    fixedDayCounter = FinDayCount(swap._fixedDayCountType)
+    floatDayCounter = FinDayCount(swap._floatDayCountType)
+
+    numFixedFlows = len(fixedDates) - fixedStartIndex
+    fixedPayTimes = np.zeros(numFixedFlows)
+    fixedAlphas = np.zeros(numFixedFlows)
+
+    for i in range(0, numFixedFlows):
+        prevDt = fixedDates[fixedStartIndex + i - 1]
+        nextDt = fixedDates[fixedStartIndex + i]
+        fixedPayTimes[i] = (nextDt - valuationDate) / gDaysInYear
+        fixedAlphas[i] = fixedDayCounter.yearFrac(prevDt, nextDt)[0]
+
+    # The index for the first floating period starts on the swap start date
+    numFloatFlows = len(floatDates) - floatStartIndex
+    floatStartTimes = np.zeros(numFloatFlows)
+    floatPayTimes = np.zeros(numFloatFlows)
+    floatAlphas = np.zeros(numFloatFlows)
+
+    for i in range(0, numFloatFlows):
+        prevDt = floatDates[floatStartIndex + i - 1]
+        nextDt = floatDates[floatStartIndex + i]
+
+        if i == 0:
+            floatStartTimes[i] = (swap._startDate - valuationDate) / gDaysInYear
+        else:
+            floatStartTimes[i] = (prevDt - valuationDate) / gDaysInYear
+
+        floatPayTimes[i] = (nextDt - valuationDate) / gDaysInYear
+        floatAlphas[i] = floatDayCounter.yearFrac(prevDt, nextDt)[0]
+
+    if swap._swapType == FinSwapTypes.PAYER:
+        sign = -1.0
+    else:
+        sign = 1.0
+
+    return (fixedPayTimes, fixedAlphas, swap._fixedCoupon,
+            floatStartTimes, floatPayTimes, floatAlphas, swap._floatSpread,
+            sign)
+
+###############################################################################
+
+
+@njit(float64(float64[:], float64[:], int64, float64[:], float64[:], float64,
+              float64[:], float64[:], float64[:], float64, float64, float64),
+      fastmath=True, cache=True)
+def _swapValue(times, dfs, method,
+               fixedPayTimes, fixedAlphas, fixedCoupon,
+               floatStartTimes, floatPayTimes, floatAlphas, floatSpread,
+               sign, principal):
+    ''' Value a swap per unit notional on the curve valuation date using the
+    curve as both the discount and the index curve. This is the same
+    calculation as FinLiborSwap.value but it only needs the curve grid. '''
+
+    df0 = _uinterpolate(0.0, times, dfs, method)
+
+    fixedLegPV = 0.0
+    dfDiscount = 1.0
+
+    for i in range(0, len(fixedPayTimes)):
+        dfDiscount = _uinterpolate(fixedPayTimes[i], times, dfs, method) / df0
+        fixedLegPV += fixedCoupon * fixedAlphas[i] * dfDiscount
+
+    fixedLegPV += principal * dfDiscount
+
+    floatLegPV = 0.0
+    dfDiscount = 1.0
+
+    for i in range(0, len(floatPayTimes)):
+        alpha = floatAlphas[i]
+        df1 = _uinterpolate(floatStartTimes[i], times, dfs, method)
+        df2 = _uinterpolate(floatPayTimes[i], times, dfs, method)
+        fwdRate = (df1 / df2 - 1.0) / alpha
+        dfDiscount = df2 / df0
+        floatLegPV += (fwdRate + floatSpread) * alpha * dfDiscount
+
+    floatLegPV += principal * dfDiscount
+
+    return sign * (fixedLegPV - floatLegPV)
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _uinterpolateLastDeriv(t, times, dfs, method):
+    ''' Return the interpolated discount factor at time t and its derivative
+    with respect to the discount factor at the last grid point. This follows
+    the branches of _uinterpolate for each of the interpolation schemes and
+    uses the same bisection search for the grid interval. '''
+
+    if method == FinInterpTypes.LINEAR_SWAP_RATES.value:
+        method = FinInterpTypes.FLAT_FORWARDS.value
+
+    small = 1e-10
+    numPoints = times.size
+    last = numPoints - 1
+
+    if t == times[0]:
+        return dfs[0], 0.0
+
+    i = _findIndex(t, times)
+    y = _uinterpolateIndex(t, i, times, dfs, method)
+
+    # Only the interval that ends on the last grid point and the
+    # extrapolation beyond it depend on the last discount factor
+    if i < last or i == 0:
+        return y, 0.0
+
+    dfLast = dfs[last]
+    tLast = times[last]
+
+    if method == FinInterpTypes.LINEAR_ZERO_RATES.value:
+
+        if i == 1 or i == numPoints:
+            dydf = y * t / (dfLast * tLast)
+        else:
+            w = (t - times[i-1]) / (times[i] - times[i-1])
+            dydf = y * t * w / (dfLast * tLast)
+
+    elif method == FinInterpTypes.FLAT_FORWARDS.value:
+
+        w = (t - times[last-1]) / (tLast - times[last-1])
+        dydf = y * w / dfLast
+
+    elif method == FinInterpTypes.LINEAR_FORWARDS.value:
+
+        if i == 1:
+            dydf = y * t / ((tLast + small) * (abs(dfLast) + small))
+        elif i < numPoints:
+            dt = times[i] - times[i-1]
+            dydf = y * (t - times[i-1])**2 / (dt * dt * dfLast)
+        else:
+            dt = tLast - times[last-1]
+            dydf = y / dfLast + y * (t - tLast) / (dfLast * dt)
+
+    else:
+        raise FinError("Invalid interpolation scheme.")
+
+    return y, dydf
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _swapValueDeriv(times, dfs, method,
+                    fixedPayTimes, fixedAlphas, fixedCoupon,
+                    floatStartTimes, floatPayTimes, floatAlphas, floatSpread,
+                    sign, principal):
+    ''' Value a swap per unit notional in the same way as _swapValue and
+    also return the analytical derivative of the value with respect to the
+    discount factor at the last point of the curve grid. '''
+
+    df0, ddf0 = _uinterpolateLastDeriv(0.0, times, dfs, method)
+
+    fixedLegPV = 0.0
+    dFixedLegPV = 0.0
+    dfDiscount = 1.0
+    dDfDiscount = 0.0
+
+    for i in range(0, len(fixedPayTimes)):
+        df, ddf = _uinterpolateLastDeriv(fixedPayTimes[i], times, dfs, method)
+        dfDiscount = df / df0
+        dDfDiscount = (ddf * df0 - df * ddf0) / (df0 * df0)
+        fixedLegPV += fixedCoupon * fixedAlphas[i] * dfDiscount
+        dFixedLegPV += fixedCoupon * fixedAlphas[i] * dDfDiscount
+
+    fixedLegPV += principal * dfDiscount
+    dFixedLegPV += principal * dDfDiscount
+
+    floatLegPV = 0.0
+    dFloatLegPV = 0.0
+    dfDiscount = 1.0
+    dDfDiscount = 0.0
+
+    for i in range(0, len(floatPayTimes)):
+        alpha = floatAlphas[i]
+        df1, ddf1 = _uinterpolateLastDeriv(floatStartTimes[i], times, dfs,
+                                           method)
+        df2, ddf2 = _uinterpolateLastDeriv(floatPayTimes[i], times, dfs,
+                                           method)
+        fwdRate = (df1 / df2 - 1.0) / alpha
+        dFwdRate = (ddf1 * df2 - df1 * ddf2) / (df2 * df2 * alpha)
+        dfDiscount = df2 / df0
+        dDfDiscount = (ddf2 * df0 - df2 * ddf0) / (df0 * df0)
+        floatLegPV += (fwdRate + floatSpread) * alpha * dfDiscount
+        dFloatLegPV += dFwdRate * alpha * dfDiscount
+        dFloatLegPV += (fwdRate + floatSpread) * alpha * dDfDiscount
+
+    floatLegPV += principal * dfDiscount
+    dFloatLegPV += principal * dDfDiscount
+
+    return sign * (fixedLegPV - floatLegPV), sign * (dFixedLegPV - dFloatLegPV)
+
+###############################################################################
+
+
+@njit(fastmath=True, cache=True)
+def _solveSwapPillar(times, dfs, method, x0, tol, maxIterations,
+                     fixedPayTimes, fixedAlphas, fixedCoupon,
+                     floatStartTimes, floatPayTimes, floatAlphas, floatSpread,
+                     sign, principal):
+    ''' Newton-Raphson search for the last discount factor on the grid that
+    reprices the swap to par using the analytical derivative of the swap
+    value. Returns the discount factor, the number of swap valuations and a
+    flag which is True if the search converged. '''
+
+    x = x0
+
+    for numValuations in range(1, maxIterations + 1):
+
+        dfs[-1] = x
+
+        v, dvdx = _swapValueDeriv(times, dfs, method,
+                                  fixedPayTimes, fixedAlphas, fixedCoupon,
+                                  floatStartTimes, floatPayTimes,
+                                  floatAlphas, floatSpread,
+                                  sign, principal)
+
+        if dvdx == 0.0:
+            return x, numValuations, False
+
+        xNew = x - v / dvdx
+
+        if abs(xNew - x) < tol:
+            dfs[-1] = xNew
+            return xNew, numValuations, True
+
+        x = xNew
+
+    return x, maxIterations, False
+
+###############################################################################
+
+
+def _fswap(df, *args):
+    ''' Root search objective function for swaps that reprices the swap in
+    Numba using its precomputed leg payment times. '''
+    curve = args[0]
+    legTimes = args[1]
+    curve._dfValues[-1] = df
+    v_swap = _swapValue(curve._times, curve._dfValues,
+                        curve._interpType.value, *legTimes, 1.0)
+    return v_swap
+
+###############################################################################
+
+
 def _g(df, *args):
     ''' Root search objective function for swaps '''
     curve = args[0]
@@ -83,7 +356,8 @@ class FinLiborCurve(FinDiscountCurve):
                  liborFRAs: list,
                  liborSwaps: list,
                  interpType: FinInterpTypes = FinInterpTypes.LINEAR_SWAP_RATES,
-                 checkRefit: bool = False):  # Set to True to test it works
+                 checkRefit: bool = False,  # Set to True to test it works
+                 analyticJacobian: bool = True):
         ''' Create an instance of a FinLibor curve given a valuation date and
         a set of libor deposits, libor FRAs and liborSwaps. Some of these may
         be left None and the algorithm will just use what is provided. An
@@ -91,6 +365,11 @@ class FinLiborCurve(FinDiscountCurve):
         linear interpolation for swap rates on coupon dates and to then assume
         flat forwards between these coupon dates.
 
+        When a solver is needed, the swap discount factors are found using a
+        Newton search with the analytical derivative of the swap value with
+        respect to the discount factor being solved for. Setting the
+        analyticJacobian flag to False uses a secant search instead.
+
         The curve will assign a discount factor of 1.0 to the valuation date.
         '''
 
@@ -100,6 +379,9 @@ class FinLiborCurve(FinDiscountCurve):
         self._validateInputs(liborDeposits, liborFRAs, liborSwaps)
         self._interpType = interpType
         self._checkRefit = checkRefit
+        self._analyticJacobian = analyticJacobian
+        self._numSwapValuations = 0
+        self._listeners = []
         self._buildCurve()
 
 ###############################################################################
@@ -230,9 +512,11 @@ class FinLiborCurve(FinDiscountCurve):
                 raise FinError("First Swap must mature after last FRA")
 
         # Now determine which instruments are used
-        self._usedDeposits = liborDeposits
-        self._usedFRAs = liborFRAs
-        self._usedSwaps = liborSwaps
+        # The lists are copied so that updateQuote can replace an instrument
+        # without changing the lists passed in by the caller
+        self._usedDeposits = list(liborDeposits)
+        self._usedFRAs = list(liborFRAs)
+        self._usedSwaps = list(liborSwaps)
         self._dayCountType = None
 
 ###############################################################################
@@ -243,25 +527,48 @@ class FinLiborCurve(FinDiscountCurve):
         of interpolation approaches between the swap rates and other rates. It
         involves the use of a solver. '''
 
-        self._times = np.array([])
-        self._dfValues = np.array([])
+        numPoints = 1 + len(self._usedDeposits) + len(self._usedFRAs) + \
+            len(self._usedSwaps)
+
+        self._initGrid(numPoints)
 
         # time zero is now.
-        tmat = 0.0
-        dfMat = 1.0
-        self._times = np.append(self._times, 0.0)
-        self._dfValues = np.append(self._dfValues, dfMat)
+        self._addGridPoint(0.0, 1.0)
 
-        for depo in self._usedDeposits:
+        dfMat = self._addDepositsAndFRAs(0)
+
+        self._swapLegs = []
+        for swap in self._usedSwaps:
+            self._swapLegs.append(_swapLegTimes(swap, self._valuationDate))
+
+        self._solveSwapPillars(0, dfMat)
+
+        if self._checkRefit is True:
+            self._checkRefits(1e-10, swaptol, 1e-5)
+
+###############################################################################
+
+    def _addDepositsAndFRAs(self,
+                            firstIndex: int):
+        ''' Add the grid points of the deposits and FRAs starting with the
+        instrument at firstIndex in the list of deposits followed by FRAs. The
+        grid points of the earlier instruments are kept. Returns the last
+        discount factor found which is used to start the next search. '''
+
+        numDepos = len(self._usedDeposits)
+
+        self._resetGrid(firstIndex + 1)
+        dfMat = self._dfValues[-1]
+
+        for depo in self._usedDeposits[firstIndex:]:
             dfSettle = self.df(depo._startDate)
             dfMat = depo._maturityDf() * dfSettle
             tmat = (depo._maturityDate - self._valuationDate) / gDaysInYear
-            self._times = np.append(self._times, tmat)
-            self._dfValues = np.append(self._dfValues, dfMat)
+            self._addGridPoint(tmat, dfMat)
 
-        oldtmat = tmat
+        oldtmat = self._gridTimes[numDepos]
 
-        for fra in self._usedFRAs:
+        for fra in self._usedFRAs[max(firstIndex - numDepos, 0):]:
 
             tset = (fra._startDate - self._valuationDate) / gDaysInYear
             tmat = (fra._maturityDate - self._valuationDate) / gDaysInYear
@@ -271,34 +578,67 @@ class FinLiborCurve(FinDiscountCurve):
 
             if tset < oldtmat and tmat > oldtmat:
                 dfMat = fra.maturityDf(self)
-                self._times = np.append(self._times, tmat)
-                self._dfValues = np.append(self._dfValues, dfMat)
+                self._addGridPoint(tmat, dfMat)
             else:
-                self._times = np.append(self._times, tmat)
-                self._dfValues = np.append(self._dfValues, dfMat)
+                self._addGridPoint(tmat, dfMat)
 
                 argtuple = (self, self._valuationDate, fra)
                 dfMat = optimize.newton(_g, x0=dfMat, fprime=None,
                                         args=argtuple, tol=swaptol,
                                         maxiter=50, fprime2=None)
 
-        for swap in self._usedSwaps:
+        return dfMat
+
+###############################################################################
+
+    def _solveSwapPillars(self,
+                          firstSwap: int,
+                          dfMat: float):
+        ''' Solve for the discount factor at the maturity of each swap in
+        turn starting with the swap at index firstSwap. The grid points of the
+        deposits, FRAs and earlier swaps are kept. The search for each pillar
+        starts at the discount factor of the previous pillar. The curve is
+        left holding trimmed copies of the grid. '''
+
+        self._resetGrid(1 + len(self._usedDeposits) + len(self._usedFRAs) +
+                        firstSwap)
+
+        for iSwap in range(firstSwap, len(self._usedSwaps)):
+
+            swap = self._usedSwaps[iSwap]
+            legTimes = self._swapLegs[iSwap]
+
             # I use the lastPaymentDate in case a date has been adjusted fwd
             # over a holiday as the maturity date is usually not adjusted CHECK
             maturityDate = swap._lastPaymentDate
             tmat = (maturityDate - self._valuationDate) / gDaysInYear
 
-            self._times = np.append(self._times, tmat)
-            self._dfValues = np.append(self._dfValues, dfMat)
+            self._addGridPoint(tmat, dfMat)
 
-            argtuple = (self, self._valuationDate, swap)
+            if self._analyticJacobian is True:
 
-            dfMat = optimize.newton(_f, x0=dfMat, fprime=None, args=argtuple,
-                                    tol=swaptol, maxiter=50, fprime2=None,
-                                    full_output=False)
+                method = self._interpType.value
+                dfMat, numValuations, converged = \
+                    _solveSwapPillar(self._times, self._dfValues, method,
+                                     dfMat, swaptol, 50, *legTimes, 1.0)
 
-        if self._checkRefit is True:
-            self._checkRefits(1e-10, swaptol, 1e-5)
+                self._numSwapValuations += numValuations
+
+                if not converged:
+                    raise FinError("Swap pillar search failed to converge.")
+
+            else:
+
+                argtuple = (self, legTimes)
+                dfMat, r = optimize.newton(_fswap, x0=dfMat, fprime=None,
+                                           args=argtuple, tol=swaptol,
+                                           maxiter=50, fprime2=None,
+                                           full_output=True)
+
+                self._numSwapValuations += r.function_calls
+
+        # The pillars were solved on views of the grid so copy them out
+        self._trimGrid()
 
 ###############################################################################
 
@@ -307,57 +647,35 @@ class FinLiborCurve(FinDiscountCurve):
         the linear swap rate method that is fast and exact as it does not
         require the use of a solver. It is also market standard. '''
 
-        self._times = np.array([])
-        self._dfValues = np.array([])
+        # The swaps add at most one point for each coupon of the longest swap
+        numPoints = 1 + len(self._usedDeposits) + len(self._usedFRAs)
+        if len(self._usedSwaps) > 0:
+            numPoints += len(self._usedSwaps[-1]._adjustedFixedDates)
 
-        # time zero is now.
-        tmat = 0.0
-        dfMat = 1.0
-        self._times = np.append(self._times, 0.0)
-        self._dfValues = np.append(self._dfValues, dfMat)
-
-        for depo in self._usedDeposits:
-            dfSettle = self.df(depo._startDate)
-            dfMat = depo._maturityDf() * dfSettle
-            tmat = (depo._maturityDate - self._valuationDate) / gDaysInYear
-            self._times = np.append(self._times, tmat)
-            self._dfValues = np.append(self._dfValues, dfMat)
-
-        oldtmat = tmat
+        self._initGrid(numPoints)
 
-        for fra in self._usedFRAs:
-
-            tset = (fra._startDate - self._valuationDate) / gDaysInYear
-            tmat = (fra._maturityDate - self._valuationDate) / gDaysInYear
+        # time zero is now.
+        self._addGridPoint(0.0, 1.0)
 
-            # if both dates are after the previous FRA/FUT then need to
-            # solve for 2 discount factors simultaneously using root search
+        self._addDepositsAndFRAs(0)
 
-            if tset < oldtmat and tmat > oldtmat:
-                dfMat = fra.maturityDf(self)
-                self._times = np.append(self._times, tmat)
-                self._dfValues = np.append(self._dfValues, dfMat)
-            else:
-                self._times = np.append(self._times, tmat)
-                self._dfValues = np.append(self._dfValues, dfMat)
+        if len(self._usedSwaps) > 0:
+            self._initSwapCoupons()
+            self._addSwapCoupons(self._swapCouponStart)
 
-                argtuple = (self, self._valuationDate, fra)
-                dfMat = optimize.newton(_g, x0=dfMat, fprime=None,
-                                        args=argtuple, tol=swaptol,
-                                        maxiter=50, fprime2=None)
+        self._trimGrid()
 
-        if len(self._usedSwaps) == 0:
-            if self._checkRefit is True:
-                self._checkRefits(1e-10, swaptol, 1e-5)
-            return
+        if self._checkRefit is True:
+            self._checkRefits(1e-10, swaptol, 1e-5)
 
-#        print("CURVE SO FAR")
-#        print(self._times)
-#        print(self._dfValues)
+###############################################################################
 
-        #######################################################################
-        # ADD SWAPS TO CURVE
-        #######################################################################
+    def _initSwapCoupons(self):
+        ''' Find the coupon dates of the longest swap which are after the end
+        of the deposits and FRAs and so need to be added to the grid by the
+        linear swap rate bootstrap. The annuity of the earlier coupons and the
+        settlement discount factor are saved so that the swap coupons can be
+        bootstrapped again from any coupon. '''
 
         # Find where the FRAs and Depos go up to as this bit of curve is done
         foundStart = False
@@ -385,6 +703,39 @@ class FinLiborCurve(FinDiscountCurve):
         if foundStart is False:
             raise FinError("Found start is false. Swaps payments inside FRAs")
 
+        couponTimes = []
+        for dt in couponDates:
+            couponTimes.append((dt - self._valuationDate) / gDaysInYear)
+
+        accrualFactors = longestSwap._fixedYearFracs
+
+        acc = 0.0
+        df = 1.0
+        pv01 = 0.0
+        dfSettle = self.df(longestSwap._startDate)
+
+        for i in range(1, startIndex):
+            dt = couponDates[i]
+            df = self.df(dt)
+            acc = accrualFactors[i-1]
+            pv01 += acc * df
+
+        # The annuity of the coupons before each coupon date
+        self._swapPv01s = np.zeros(numFlows + 1)
+        self._swapPv01s[startIndex] = pv01
+        self._swapCouponStart = startIndex
+        self._swapCouponTimes = couponTimes
+        self._swapDfSettle = dfSettle
+
+###############################################################################
+
+    def _addSwapCoupons(self,
+                        firstCoupon: int):
+        ''' Add the grid points on the coupon dates of the longest swap using
+        swap rates that are linearly interpolated between the swap maturities.
+        The points are added starting with the coupon at index firstCoupon and
+        the grid points before this coupon are kept. '''
+
         swapRates = []
         swapTimes = []
 
@@ -398,60 +749,210 @@ class FinLiborCurve(FinDiscountCurve):
             swapTimes.append(tswap)
             swapRates.append(swapRate)
 
+        couponTimes = self._swapCouponTimes
+        numFlows = len(couponTimes)
+
         interpolatedSwapRates = [0.0]
-        interpolatedSwapTimes = [0.0]
 
-        for dt in couponDates[1:]:
-            swapTime = (dt - self._valuationDate) / gDaysInYear
+        for swapTime in couponTimes[1:]:
             swapRate = np.interp(swapTime, swapTimes, swapRates)
             interpolatedSwapRates.append(swapRate)
-            interpolatedSwapTimes.append(swapTime)
 
         # Do I need this line ?
         interpolatedSwapRates[0] = interpolatedSwapRates[1]
 
-#        print("Interpolated swap times:", interpolatedSwapTimes)
-#        print("Interpolated swap rates:", interpolatedSwapRates)
+        accrualFactors = self._usedSwaps[-1]._fixedYearFracs
+        dfSettle = self._swapDfSettle
+        startIndex = self._swapCouponStart
 
-        accrualFactors = longestSwap._fixedYearFracs
+        self._resetGrid(1 + len(self._usedDeposits) + len(self._usedFRAs) +
+                        firstCoupon - startIndex)
 
-        acc = 0.0
-        df = 1.0
-        pv01 = 0.0
-        dfSettle = self.df(longestSwap._startDate)
-#        print("SETTLE", dfSettle)
-
-        for i in range(1, startIndex):
-            dt = couponDates[i]
-            df = self.df(dt)
-            acc = accrualFactors[i-1]
-            pv01 += acc * df
-#            print("BEFORE", i, dt, df, acc, pv01)
+        pv01 = self._swapPv01s[firstCoupon]
 
-        for i in range(startIndex, numFlows):
+        for i in range(firstCoupon, numFlows):
 
-            dt = couponDates[i]
-            tmat = (dt - self._valuationDate) / gDaysInYear
+            tmat = couponTimes[i]
             swapRate = interpolatedSwapRates[i]
             acc = accrualFactors[i-1]
             pv01End = (acc * swapRate + 1.0)
 
             dfMat = (dfSettle - swapRate * pv01) / pv01End
 
-#            print("IN: %12s %12.10f %12.10f %12.10f %12.10f OUT: %14.12f" %
-#                  (dt, swapRate, acc, pv01, pv01End, dfMat))
-
-            self._times = np.append(self._times, tmat)
-            self._dfValues = np.append(self._dfValues, dfMat)
+            self._addGridPoint(tmat, dfMat)
 
             pv01 += acc * dfMat
+            self._swapPv01s[i + 1] = pv01
+
+###############################################################################
+
+    def updateQuote(self,
+                    instrumentIndex: int,
+                    newRate: float):
+        ''' Change the market rate of one of the calibration instruments and
+        update the curve. The instruments are indexed in the order deposits,
+        FRAs and then swaps and the new rate is the deposit rate, the FRA rate
+        or the swap fixed coupon. A futures price change should be passed as
+        the rate of the FRA created from the future. The curve replaces the
+        instrument with a copy that has the new rate so the instrument passed
+        in by the caller is not changed.
+
+        The grid points before the instrument are left unchanged and only the
+        points from the instrument onwards are solved for again, starting each
+        search at the previous solution. For the linear swap rate method only
+        the coupons whose interpolated swap rate depends on the swap are
+        solved for again. Each listener is then called with the curve. '''
+
+        checkArgumentTypes(self.updateQuote, locals())
+
+        numDepos = len(self._usedDeposits)
+        numFRAs = len(self._usedFRAs)
+        numSwaps = len(self._usedSwaps)
+
+        if instrumentIndex < 0 or \
+                instrumentIndex >= numDepos + numFRAs + numSwaps:
+            raise FinError("Instrument index out of range.")
+
+        iSwap = instrumentIndex - numDepos - numFRAs
+
+        if instrumentIndex < numDepos:
+            depo = copy(self._usedDeposits[instrumentIndex])
+            depo._depositRate = newRate
+            self._usedDeposits[instrumentIndex] = depo
+        elif iSwap < 0:
+            fra = copy(self._usedFRAs[instrumentIndex - numDepos])
+            fra._fraRate = newRate
+            self._usedFRAs[instrumentIndex - numDepos] = fra
+        else:
+            swap = copy(self._usedSwaps[iSwap])
+            swap._fixedCoupon = newRate
+            # This creates new flow lists so those of the original are kept
+            swap._calcFixedLegFlows()
+            self._usedSwaps[iSwap] = swap
+
+        if self._interpType == FinInterpTypes.LINEAR_SWAP_RATES:
+
+            if iSwap < 0:
 
-#        print(self._times)
-#        print(self._dfValues)
+                self._addDepositsAndFRAs(instrumentIndex)
+
+                if numSwaps > 0:
+                    self._initSwapCoupons()
+                    self._addSwapCoupons(self._swapCouponStart)
+
+            else:
+
+                # Only the coupons after the maturity of the previous swap
+                # interpolate using the rate of this swap
+                couponTimes = self._swapCouponTimes
+                firstCoupon = self._swapCouponStart
+
+                if iSwap > 0:
+                    prevSwap = self._usedSwaps[iSwap - 1]
+                    prevDate = prevSwap._adjustedFixedDates[-1]
+                    tprev = (prevDate - self._valuationDate) / gDaysInYear
+                    while firstCoupon < len(couponTimes) and \
+                            couponTimes[firstCoupon] <= tprev:
+                        firstCoupon += 1
+
+                self._addSwapCoupons(firstCoupon)
+
+            self._trimGrid()
+
+        else:
+
+            if iSwap < 0:
+                dfMat = self._addDepositsAndFRAs(instrumentIndex)
+                iSwap = 0
+            else:
+                swap = self._usedSwaps[iSwap]
+                self._swapLegs[iSwap] = _swapLegTimes(swap,
+                                                      self._valuationDate)
+                dfMat = self._gridDfs[instrumentIndex]
+
+            self._solveSwapPillars(iSwap, dfMat)
 
         if self._checkRefit is True:
             self._checkRefits(1e-10, swaptol, 1e-5)
 
+        for listener in self._listeners:
+            listener(self)
+
+###############################################################################
+
+    def addListener(self,
+                    listener):
+        ''' Register a function that is called with the curve as its only
+        argument each time the curve is changed by updateQuote. This can be
+        used to revalue or recompile the objects that depend on the curve. '''
+
+        if callable(listener) is False:
+            raise FinError("Listener must be callable.")
+
+        self._listeners.append(listener)
+
+###############################################################################
+
+    def removeListener(self,
+                       listener):
+        ''' Stop calling a function that was registered with addListener. '''
+
+        if listener not in self._listeners:
+            raise FinError("Listener has not been added to the curve.")
+
+        self._listeners.remove(listener)
+
+###############################################################################
+
+    def _initGrid(self,
+                  numPoints: int):
+        ''' Allocate the grid of times and discount factors once for the
+        bootstrap. Points are added using a fill pointer and the curve only
+        sees the points that have been added so far as these are views onto
+        the preallocated arrays. '''
+
+        self._gridTimes = np.zeros(numPoints)
+        self._gridDfs = np.zeros(numPoints)
+        self._numGridPoints = 0
+        self._times = self._gridTimes[0:0]
+        self._dfValues = self._gridDfs[0:0]
+
+###############################################################################
+
+    def _addGridPoint(self,
+                      t: float,
+                      df: float):
+        ''' Add the next time and discount factor to the curve grid. '''
+
+        n = self._numGridPoints
+        self._gridTimes[n] = t
+        self._gridDfs[n] = df
+        self._numGridPoints = n + 1
+        self._times = self._gridTimes[0:n + 1]
+        self._dfValues = self._gridDfs[0:n + 1]
+
+###############################################################################
+
+    def _resetGrid(self,
+                   numPoints: int):
+        ''' Move the fill pointer back so that the grid only holds its first
+        numPoints points. The next point added goes after these. '''
+
+        self._numGridPoints = numPoints
+        self._times = self._gridTimes[0:numPoints]
+        self._dfValues = self._gridDfs[0:numPoints]
+
+###############################################################################
+
+    def _trimGrid(self):
+        ''' Copy the filled part of the grid into arrays of the right size
+        once the bootstrap is finished. The grid is kept so that the curve can
+        be updated by updateQuote. '''
+
+        n = self._numGridPoints
+        self._times = self._gridTimes[0:n].copy()
+        self._dfValues = self._gridDfs[0:n].copy()
+
 ###############################################################################
 
     def _checkRefits(self, depoTol, fraTol, swapTol):
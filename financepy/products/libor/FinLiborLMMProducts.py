@@ -74,7 +74,7 @@ class FinLiborLMMProducts():
                                       floatFrequencyType,
                                       calendarType,
                                       busDayAdjustType,
-                                      dateGenRuleType)._generate()
+                                      dateGenRuleType).scheduleDates()
 
         self._accrualFactors = []
         self._floatDayCountType = floatDayCountType
@@ -305,7 +305,7 @@ class FinLiborLMMProducts():
                                          floatFrequencyType,
                                          calendarType,
                                          busDayAdjustType,
-                                         dateGenRuleType)._generate()
+                                         dateGenRuleType).scheduleDates()
 
         for swaptionDt in swaptionFloatDates:
             foundDt = False
@@ -321,7 +321,7 @@ class FinLiborLMMProducts():
                                          fixedFrequencyType,
                                          calendarType,
                                          busDayAdjustType,
-                                         dateGenRuleType)._generate()
+                                         dateGenRuleType).scheduleDates()
 
         for swaptionDt in swaptionFixedDates:
             foundDt = False
@@ -376,7 +376,7 @@ class FinLiborLMMProducts():
                                     frequencyType,
                                     calendarType,
                                     busDayAdjustType,
-                                    dateGenRuleType)._generate()
+                                    dateGenRuleType).scheduleDates()
 
         for capFloorletDt in capFloorDates:
             foundDt = False
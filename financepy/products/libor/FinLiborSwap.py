@@ -147,7 +147,7 @@ class FinLiborSwap(object):
             self._fixedFrequencyType,
             self._calendarType,
             self._busDayAdjustType,
-            self._dateGenRuleType)._generate()
+            self._dateGenRuleType).scheduleDates()
 
 ##########################################################################
 
@@ -160,7 +160,7 @@ class FinLiborSwap(object):
             self._floatFrequencyType,
             self._calendarType,
             self._busDayAdjustType,
-            self._dateGenRuleType)._generate()
+            self._dateGenRuleType).scheduleDates()
 
 ##########################################################################
 
@@ -108,7 +108,7 @@ class FinOvernightIndexSwap(object):
             self._fixedFrequencyType,
             self._calendarType,
             self._busDayAdjustType,
-            self._dateGenRuleType)._generate()
+            self._dateGenRuleType).scheduleDates()
 
         self._adjustedFloatDates = FinSchedule(
             self._startDate,
@@ -116,7 +116,7 @@ class FinOvernightIndexSwap(object):
             self._floatFrequencyType,
             self._calendarType,
             self._busDayAdjustType,
-            self._dateGenRuleType)._generate()
+            self._dateGenRuleType).scheduleDates()
 
     ###########################################################################
 
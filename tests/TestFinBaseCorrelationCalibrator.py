@@ -0,0 +1,183 @@
+###############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+###############################################################################
+
+import os
+import time
+import numpy as np
+
+from FinTestCases import FinTestCases, globalTestCaseMode
+
+from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDayCount import FinDayCountTypes
+from financepy.finutils.FinFrequency import FinFrequencyTypes
+from financepy.finutils.FinGlobalTypes import FinSwapTypes
+from financepy.products.libor.FinLiborSwap import FinLiborSwap
+from financepy.products.libor.FinLiborCurve import FinLiborCurve
+from financepy.products.credit.FinCDS import FinCDS
+from financepy.products.credit.FinCDSCurve import FinCDSCurve
+from financepy.products.credit.FinCDSTranche import FinCDSTranche
+from financepy.products.credit.FinCDSTranche import FinLossDistributionBuilder
+from financepy.products.credit.FinBaseCorrelationCalibrator import FinBaseCorrelationCalibrator
+
+testCases = FinTestCases(__file__, globalTestCaseMode)
+
+###############################################################################
+
+
+def buildLiborCurve(valuationDate):
+
+    dcType = FinDayCountTypes.THIRTY_E_360_ISDA
+    fixedFreq = FinFrequencyTypes.SEMI_ANNUAL
+
+    swaps = []
+    for numYears, swapRate in zip([1, 2, 3, 4, 5, 7, 10],
+                                  [0.0502, 0.0502, 0.0501, 0.0502, 0.0501,
+                                   0.0505, 0.0510]):
+        maturityDate = valuationDate.addMonths(12 * numYears)
+        swap = FinLiborSwap(valuationDate, maturityDate, FinSwapTypes.PAYER,
+                            swapRate, fixedFreq, dcType)
+        swaps.append(swap)
+
+    liborCurve = FinLiborCurve(valuationDate, [], [], swaps)
+    return liborCurve
+
+###############################################################################
+
+
+def buildIssuerCurves(valuationDate, liborCurve, spreadScale):
+
+    path = os.path.join(os.path.dirname(__file__),
+                        './/data//CDX_NA_IG_S7_SPREADS.csv')
+    f = open(path, 'r')
+    data = f.readlines()
+    f.close()
+
+    maturityDates = [valuationDate.nextCDSDate(36),
+                     valuationDate.nextCDSDate(60),
+                     valuationDate.nextCDSDate(84),
+                     valuationDate.nextCDSDate(120)]
+
+    issuerCurves = []
+    for row in data[1:]:
+
+        splitRow = row.split(",")
+        recoveryRate = float(splitRow[5])
+
+        cdsContracts = []
+        for i, maturityDate in enumerate(maturityDates):
+            spread = spreadScale * float(splitRow[i + 1]) / 10000.0
+            cds = FinCDS(valuationDate, maturityDate, spread)
+            cdsContracts.append(cds)
+
+        issuerCurve = FinCDSCurve(valuationDate, cdsContracts, liborCurve,
+                                  recoveryRate)
+        issuerCurves.append(issuerCurve)
+
+    return issuerCurves
+
+###############################################################################
+
+
+def buildMarketQuotes(valuationDate, tranches, issuerCurves, baseCorrs,
+                      upfronts, model):
+    ''' Find the running coupon of each tranche which gives it zero value
+    given its upfront and the base correlations. '''
+
+    coupons = []
+    corr1 = 0.0
+    for tranche, upfront, corr2 in zip(tranches, upfronts, baseCorrs):
+        v = tranche.valueBC(valuationDate, issuerCurves, upfront, 0.0,
+                            corr1, corr2, 40, model)
+        coupons.append(v[3] - upfront * v[3] / (v[2] / tranche._notional))
+        corr1 = corr2
+
+    return coupons
+
+###############################################################################
+
+
+def test_FinBaseCorrelationCalibrator():
+
+    valuationDate = FinDate(2007, 8, 2)
+    liborCurve = buildLiborCurve(valuationDate)
+    maturityDate = valuationDate.nextCDSDate(60)
+
+    strikes = [0.0, 0.03, 0.07, 0.10, 0.15, 0.30]
+    tranches = []
+    for k1, k2 in zip(strikes[:-1], strikes[1:]):
+        tranches.append(FinCDSTranche(valuationDate, maturityDate, k1, k2))
+
+    model = FinLossDistributionBuilder.ADJUSTED_BINOMIAL
+    calibrator = FinBaseCorrelationCalibrator(40, model)
+
+    ###########################################################################
+    # Calibrate to quotes generated from a known base correlation skew
+    ###########################################################################
+
+    issuerCurves = buildIssuerCurves(valuationDate, liborCurve, 1.0)
+    trueCorrs = [0.18, 0.27, 0.33, 0.42, 0.61]
+    upfronts = [0.30, 0.0, 0.0, 0.0, 0.0]
+    coupons = buildMarketQuotes(valuationDate, tranches, issuerCurves,
+                                trueCorrs, upfronts, model)
+
+    start = time.time()
+    baseCorrs = calibrator.calibrate(valuationDate, tranches, issuerCurves,
+                                     upfronts, coupons)
+    end = time.time()
+
+    testCases.header("K1", "K2", "UPFRONT", "COUPON", "BASE CORR", "ERROR")
+    for i, tranche in enumerate(tranches):
+        testCases.print(tranche._k1, tranche._k2, upfronts[i],
+                        coupons[i] * 10000.0, baseCorrs[i],
+                        baseCorrs[i] - trueCorrs[i])
+
+    testCases.header("LABEL", "TIME")
+    testCases.print("CALIBRATION", end - start)
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("MAX CORR ERROR",
+                    np.max(np.abs(baseCorrs - np.array(trueCorrs))) < 1e-6)
+
+    ###########################################################################
+    # Calibrate several index series serially and on a pool of threads
+    ###########################################################################
+
+    trancheSets = []
+    issuerCurveSets = []
+    upfrontSets = []
+    couponSets = []
+    trueCorrSets = []
+
+    for iSeries, spreadScale in enumerate([0.8, 1.0, 1.5, 2.0]):
+        curves = buildIssuerCurves(valuationDate, liborCurve, spreadScale)
+        corrs = [0.15 + 0.02 * iSeries, 0.25, 0.32, 0.40, 0.58]
+        quotes = buildMarketQuotes(valuationDate, tranches, curves, corrs,
+                                   upfronts, model)
+        trancheSets.append(tranches)
+        issuerCurveSets.append(curves)
+        upfrontSets.append(upfronts)
+        couponSets.append(quotes)
+        trueCorrSets.append(corrs)
+
+    testCases.header("NUM THREADS", "TIME", "MAX CORR ERROR")
+
+    for numThreads in [1, 4]:
+        start = time.time()
+        seriesCorrs = calibrator.calibrateSeries(valuationDate, trancheSets,
+                                                 issuerCurveSets, upfrontSets,
+                                                 couponSets, numThreads)
+        end = time.time()
+
+        maxError = 0.0
+        for corrs, trueCorrs in zip(seriesCorrs, trueCorrSets):
+            maxError = max(maxError,
+                           np.max(np.abs(corrs - np.array(trueCorrs))))
+
+        testCases.print(numThreads, end - start, maxError < 1e-6)
+
+###############################################################################
+
+
+test_FinBaseCorrelationCalibrator()
+testCases.compareTestCases()
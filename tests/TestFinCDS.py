@@ -3,6 +3,7 @@
 ###############################################################################
 
 import time
+from copy import deepcopy
 from FinTestCases import FinTestCases, globalTestCaseMode
 
 from financepy.products.credit.FinCDS import FinCDS
@@ -725,6 +726,82 @@ def test_CDSDateGeneration():
 ##########################################################################
 
 
+def test_CDSBucketedDV01s():
+
+    valuationDate = FinDate(2018, 6, 20)
+    cdsContracts, issuerCurve = test_IssuerCurveBuild()
+
+    maturityDate = valuationDate.nextCDSDate(54)
+    cdsContract = FinCDS(valuationDate, maturityDate, 0.0100)
+
+    # The first call includes the Numba compilation
+    cdsContract.bucketedDV01s(valuationDate, issuerCurve)
+
+    start = time.time()
+    risk = cdsContract.bucketedDV01s(valuationDate, issuerCurve)
+    end = time.time()
+    analyticTime = end - start
+
+    v = cdsContract.value(valuationDate, issuerCurve)
+
+    start = time.time()
+    creditDV01 = cdsContract.creditDV01(valuationDate, issuerCurve)
+    end = time.time()
+    bumpTime = end - start
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("FULL_VALUE", risk['full_pv'])
+    testCases.print("VALUE MATCH", abs(risk['full_pv'] - v['full_pv']) < 1e-6)
+    testCases.print("CREDIT_DV01", creditDV01)
+    testCases.print("SUM BUCKETED CREDIT_DV01", np.sum(risk['credit_dv01']))
+
+    testCases.header("METHOD", "TIME")
+    testCases.print("ANALYTIC", analyticTime)
+    testCases.print("BUMPED", bumpTime)
+
+    # Compare each bucket with a central difference that rebuilds the curve
+    bump = 0.0001
+
+    testCases.header("CDS_MATURITY_DATE", "CREDIT_DV01", "BUMPED", "MATCH")
+
+    for i, cds in enumerate(cdsContracts):
+
+        bumpedValues = []
+        for sign in [1.0, -1.0]:
+            bumpedCurve = deepcopy(issuerCurve)
+            bumpedCurve._cdsContracts[i]._runningCoupon += sign * bump
+            bumpedCurve._buildCurve()
+            bumpedValues.append(cdsContract.value(valuationDate,
+                                                  bumpedCurve)['full_pv'])
+
+        bumpedDV01 = 0.5 * (bumpedValues[0] - bumpedValues[1])
+        creditDV01 = risk['credit_dv01'][i]
+        testCases.print(str(cds._maturityDate), creditDV01, bumpedDV01,
+                        abs(creditDV01 - bumpedDV01) < 1e-3)
+
+    testCases.header("T", "INTEREST_DV01", "BUMPED", "MATCH")
+
+    liborTimes = issuerCurve._liborCurve._times
+
+    for k in range(1, len(liborTimes)):
+
+        bumpedValues = []
+        for sign in [1.0, -1.0]:
+            bumpedCurve = deepcopy(issuerCurve)
+            bumpedCurve._liborCurve._dfValues[k] *= \
+                np.exp(-sign * bump * liborTimes[k])
+            bumpedCurve._buildCurve()
+            bumpedValues.append(cdsContract.value(valuationDate,
+                                                  bumpedCurve)['full_pv'])
+
+        bumpedDV01 = 0.5 * (bumpedValues[0] - bumpedValues[1])
+        interestDV01 = risk['interest_dv01'][k - 1]
+        testCases.print(liborTimes[k], interestDV01, bumpedDV01,
+                        abs(interestDV01 - bumpedDV01) < 1e-3)
+
+##########################################################################
+
+
 
 test_CDSCurveBuildTiming()
 test_fullPriceCDSModelCheck()
@@ -733,5 +810,6 @@ test_fullPriceCDS1()
 test_fullPriceCDSConvergence()
 test_CDSCurveRepricing()
 test_CDSFastApproximation()
+test_CDSBucketedDV01s()
 
 testCases.compareTestCases()
@@ -14,7 +14,10 @@ from financepy.finutils.FinFrequency import FinFrequencyTypes
 from financepy.finutils.FinDayCount import FinDayCountTypes
 from financepy.finutils.FinMath import corrMatrixGenerator
 from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinGlobalVariables import gDaysInYear
 from financepy.models.FinGBMProcess import getPathsAssets
+from financepy.models.FinModelGaussianCopula import defaultTimesGC
+from financepy.models.FinModelGaussianCopula import defaultTimesGCChunks
 from financepy.finutils.FinGlobalTypes import FinSwapTypes
 
 import time
@@ -386,6 +389,121 @@ def testFinGBMProcess():
 ###############################################################################
 
 
+def test_FinCDSBasketChunks():
+
+    tradeDate = FinDate(2007, 3, 1)
+    valuationDate = tradeDate.addDays(1)
+    liborCurve = buildLiborCurve(tradeDate)
+    basketMaturity = FinDate(2011, 12, 20)
+
+    issuerCurves = loadHeterogeneousSpreadCurves(valuationDate, liborCurve)
+    numCredits = len(issuerCurves)
+    corrMatrix = corrMatrixGenerator(0.25, numCredits)
+    seed = 1967
+
+    # One chunk gives the same default times as defaultTimesGC
+    numTrials = 2000
+    defaultTimes = defaultTimesGC(issuerCurves, corrMatrix, numTrials, seed)
+    chunks = list(defaultTimesGCChunks(issuerCurves, corrMatrix, numTrials,
+                                       seed, numTrials))
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("NUM CHUNKS", len(chunks))
+    testCases.print("SINGLE CHUNK MATCH", np.all(chunks[0] == defaultTimes))
+
+    # Chunks of trials are valued in turn by the basket
+    basket = FinCDSBasket(valuationDate, basketMaturity)
+    chunks = defaultTimesGCChunks(issuerCurves[0:5], corrMatrix[0:5, 0:5],
+                                  numTrials, seed, 500)
+    v = basket.valueLegs_MC(valuationDate, 1, chunks, issuerCurves,
+                            liborCurve)
+    testCases.print("FTD RPV01 CHUNKED", v[0])
+    testCases.print("FTD PROT CHUNKED", v[1])
+
+    # The memory used by a large simulation is bounded by the chunk size
+    testCases.header("TRIALS", "CHUNK", "TIME", "MAX CHUNK COLS", "P(DEF<5Y)")
+
+    tmat = (basketMaturity - valuationDate) / gDaysInYear
+
+    for numTrials in [1000000]:
+
+        chunkSize = 50000
+        numDefaults = 0.0
+        maxCols = 0
+
+        start = time.time()
+        for chunkTimes in defaultTimesGCChunks(issuerCurves, corrMatrix,
+                                               numTrials, seed, chunkSize):
+            numDefaults += np.sum(chunkTimes < tmat)
+            maxCols = max(maxCols, chunkTimes.shape[1])
+        end = time.time()
+
+        probDefault = numDefaults / (2.0 * numTrials * numCredits)
+        testCases.print(numTrials, chunkSize, end - start, maxCols,
+                        probDefault)
+
+###############################################################################
+
+
+def test_FinCDSBasketStream():
+
+    tradeDate = FinDate(2007, 3, 1)
+    valuationDate = tradeDate.addDays(1)
+    liborCurve = buildLiborCurve(tradeDate)
+    basketMaturity = FinDate(2011, 12, 20)
+
+    issuerCurves = loadHeterogeneousSpreadCurves(valuationDate, liborCurve)
+    issuerCurves = issuerCurves[0:5]
+    numCredits = len(issuerCurves)
+    corrMatrix = corrMatrixGenerator(0.25, numCredits)
+    seed = 1967
+
+    basket = FinCDSBasket(valuationDate, basketMaturity)
+
+    # With one chunk the stream gives the same answer as valueGaussian_MC
+    numTrials = 5000
+    v1 = basket.valueGaussian_MC(valuationDate, 1, issuerCurves, corrMatrix,
+                                 liborCurve, numTrials, seed)
+    v2 = basket.valueGaussianStream_MC(valuationDate, 1, issuerCurves,
+                                       corrMatrix, liborCurve, seed,
+                                       None, numTrials, numTrials)
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("FTD SPRD", v1[2] * 10000.0)
+    testCases.print("FTD SPRD STREAM", v2['spread'] * 10000.0)
+    testCases.print("FTD SPRD STDERR", v2['spread_stderr'] * 10000.0)
+    testCases.print("STREAM MATCH", abs(v1[2] - v2['spread']) < 1e-12)
+
+    # Price each basket to a target standard error of 0.5bp
+    testCases.header("NTD", "TIME", "TRIALS", "SPRD", "STDERR", "CONVERGED")
+
+    history = []
+
+    for ntd in range(1, numCredits + 1):
+
+        start = time.time()
+        v = basket.valueGaussianStream_MC(valuationDate, ntd, issuerCurves,
+                                          corrMatrix, liborCurve, seed,
+                                          0.00005, 1000000, 20000)
+        end = time.time()
+
+        testCases.print(ntd, end - start, v['num_trials'],
+                        v['spread'] * 10000.0,
+                        v['spread_stderr'] * 10000.0,
+                        v['converged'])
+
+        if ntd == 1:
+            history = v['history']
+
+    testCases.header("TRIALS", "FTD SPRD", "STDERR")
+    for row in history:
+        testCases.print(int(row[0]), row[1] * 10000.0, row[2] * 10000.0)
+
+###############################################################################
+
+
 testFinGBMProcess()
 test_FinCDSBasket()
+test_FinCDSBasketChunks()
+test_FinCDSBasketStream()
 testCases.compareTestCases()
@@ -9,6 +9,7 @@ from FinTestCases import FinTestCases, globalTestCaseMode
 from financepy.products.credit.FinCDS import FinCDS
 from financepy.products.libor.FinLiborSwap import FinLiborSwap
 from financepy.products.credit.FinCDSCurve import FinCDSCurve
+from financepy.products.credit.FinCDSCurve import survivalMatrixFromSpreads
 from financepy.products.libor.FinLiborCurve import FinLiborCurve
 from financepy.finutils.FinFrequency import FinFrequencyTypes
 from financepy.finutils.FinDayCount import FinDayCountTypes
@@ -92,6 +93,63 @@ def test_FinCDSCurve():
 
 ###############################################################################
 
+def test_FinCDSCurveBatch():
+
+    # Build many issuer curves from a matrix of spreads and check them
+    # against the same curves built one at a time
+    curveDate = FinDate(2018, 12, 20)
+
+    swaps = []
+    fixedDCC = FinDayCountTypes.ACT_365F
+    fixedFreq = FinFrequencyTypes.SEMI_ANNUAL
+
+    for i in range(1, 11):
+        maturityDate = curveDate.addMonths(12 * i)
+        swap = FinLiborSwap(curveDate, maturityDate, FinSwapTypes.PAYER,
+                            0.05, fixedFreq, fixedDCC)
+        swaps.append(swap)
+
+    liborCurve = FinLiborCurve(curveDate, [], [], swaps)
+
+    tenors = ["6M", "1Y", "2Y", "3Y", "5Y", "7Y", "10Y"]
+    cdsContracts = []
+    for tenor in tenors:
+        cds = FinCDS(curveDate, tenor, 0.01)
+        cdsContracts.append(cds)
+
+    numIssuers = 1000
+    baseSpreads = np.array([0.0050, 0.0060, 0.0070, 0.0080, 0.0100,
+                            0.0110, 0.0120])
+    scales = np.linspace(0.5, 3.0, numIssuers)
+    spreadMatrix = np.outer(scales, baseSpreads)
+
+    times, qMatrix = survivalMatrixFromSpreads(curveDate, cdsContracts,
+                                               liborCurve, spreadMatrix)
+
+    testCases.header("ISSUER", "Q5Y", "Q10Y", "MATCH", "MAXPV")
+
+    for iIssuer in [0, 250, 500, 999]:
+
+        issuerContracts = []
+        for tenor, spread in zip(tenors, spreadMatrix[iIssuer]):
+            cds = FinCDS(curveDate, tenor, spread)
+            issuerContracts.append(cds)
+
+        issuerCurve = FinCDSCurve(curveDate, issuerContracts, liborCurve)
+
+        maxDiff = np.max(np.abs(issuerCurve._values - qMatrix[iIssuer]))
+
+        maxPV = 0.0
+        for cds in issuerContracts:
+            v = cds.value(curveDate, issuerCurve)['clean_pv']
+            maxPV = max(maxPV, abs(v) / cds._notional)
+
+        testCases.print(iIssuer, qMatrix[iIssuer, 5], qMatrix[iIssuer, 7],
+                        maxDiff < 1e-14, maxPV < 1e-6)
+
+###############################################################################
+
 
 test_FinCDSCurve()
+test_FinCDSCurveBatch()
 testCases.compareTestCases()
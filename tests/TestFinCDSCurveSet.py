@@ -0,0 +1,198 @@
+###############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+###############################################################################
+
+import os
+import time
+import numpy as np
+
+from FinTestCases import FinTestCases, globalTestCaseMode
+
+from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDayCount import FinDayCountTypes
+from financepy.finutils.FinFrequency import FinFrequencyTypes
+from financepy.finutils.FinGlobalTypes import FinSwapTypes
+from financepy.products.libor.FinLiborSwap import FinLiborSwap
+from financepy.products.libor.FinLiborCurve import FinLiborCurve
+from financepy.products.credit.FinCDS import FinCDS
+from financepy.products.credit.FinCDSCurve import FinCDSCurve
+from financepy.products.credit.FinCDSCurveSet import FinCDSCurveSet
+from financepy.products.credit.FinCDSIndexPortfolio import FinCDSIndexPortfolio
+from financepy.products.credit.FinCDSTranche import FinCDSTranche
+from financepy.products.credit.FinCDSTranche import FinLossDistributionBuilder
+
+testCases = FinTestCases(__file__, globalTestCaseMode)
+
+###############################################################################
+
+
+def buildLiborCurve(valuationDate):
+
+    dcType = FinDayCountTypes.THIRTY_E_360_ISDA
+    fixedFreq = FinFrequencyTypes.SEMI_ANNUAL
+
+    swaps = []
+    for numYears, swapRate in zip([1, 2, 3, 4, 5, 7, 10],
+                                  [0.0502, 0.0502, 0.0501, 0.0502, 0.0501,
+                                   0.0505, 0.0510]):
+        maturityDate = valuationDate.addMonths(12 * numYears)
+        swap = FinLiborSwap(valuationDate, maturityDate, FinSwapTypes.PAYER,
+                            swapRate, fixedFreq, dcType)
+        swaps.append(swap)
+
+    liborCurve = FinLiborCurve(valuationDate, [], [], swaps)
+    return liborCurve
+
+###############################################################################
+
+
+def loadSpreads():
+
+    path = os.path.join(os.path.dirname(__file__),
+                        './/data//CDX_NA_IG_S7_SPREADS.csv')
+    f = open(path, 'r')
+    data = f.readlines()
+    f.close()
+
+    spreads = []
+    recoveryRates = []
+
+    for row in data[1:]:
+        splitRow = row.split(",")
+        spd3Y = float(splitRow[1]) / 10000.0
+        spd5Y = float(splitRow[2]) / 10000.0
+        spd7Y = float(splitRow[3]) / 10000.0
+        spd10Y = float(splitRow[4]) / 10000.0
+        spreads.append([spd3Y, spd5Y, spd7Y, spd10Y])
+        recoveryRates.append(float(splitRow[5]))
+
+    return np.array(spreads), np.array(recoveryRates)
+
+###############################################################################
+
+
+def test_FinCDSCurveSet():
+
+    tradeDate = FinDate(2007, 8, 1)
+    stepInDate = tradeDate.addDays(1)
+    valuationDate = stepInDate
+
+    liborCurve = buildLiborCurve(valuationDate)
+
+    maturity3Y = tradeDate.nextCDSDate(36)
+    maturity5Y = tradeDate.nextCDSDate(60)
+    maturity7Y = tradeDate.nextCDSDate(84)
+    maturity10Y = tradeDate.nextCDSDate(120)
+    maturityDates = [maturity3Y, maturity5Y, maturity7Y, maturity10Y]
+
+    spreads, recoveryRates = loadSpreads()
+    numIssuers = len(recoveryRates)
+
+    curveSet = FinCDSCurveSet.fromSpreadMatrix(valuationDate,
+                                               maturityDates,
+                                               spreads,
+                                               recoveryRates,
+                                               liborCurve)
+
+    issuerCurves = []
+    for iIssuer in range(0, numIssuers):
+
+        cdsContracts = []
+        for maturityDate, spread in zip(maturityDates, spreads[iIssuer]):
+            cds = FinCDS(stepInDate, maturityDate, spread)
+            cdsContracts.append(cds)
+
+        issuerCurve = FinCDSCurve(valuationDate, cdsContracts, liborCurve,
+                                  recoveryRates[iIssuer])
+        issuerCurves.append(issuerCurve)
+
+    setCurves = curveSet.issuerCurves()
+
+    ###########################################################################
+    # The curves must match the curves that are built one at a time
+    ###########################################################################
+
+    maxDiff = 0.0
+    for iIssuer in range(0, numIssuers):
+        diff = np.abs(setCurves[iIssuer]._values - issuerCurves[iIssuer]._values)
+        maxDiff = max(maxDiff, np.max(diff))
+
+    times = np.linspace(0.0, 10.0, 41)
+    qMatrix = curveSet.survProb(times)
+    maxQDiff = 0.0
+    for iIssuer in range(0, numIssuers):
+        diff = np.abs(qMatrix[iIssuer] - issuerCurves[iIssuer].survProb(times))
+        maxQDiff = max(maxQDiff, np.max(diff))
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("NUM ISSUERS", len(curveSet))
+    testCases.print("Q5Y ISSUER 0", curveSet.survProb(5.0)[0])
+    testCases.print("GRID MATCH", maxDiff < 1e-14)
+    testCases.print("SURV PROB MATCH", maxQDiff < 1e-14)
+
+    ###########################################################################
+    # The issuer curves can be used to value CDS and CDS portfolio products
+    ###########################################################################
+
+    cds = FinCDS(stepInDate, maturity5Y, 0.0050)
+    v1 = cds.value(valuationDate, issuerCurves[7])['full_pv']
+    v2 = cds.value(valuationDate, curveSet[7])['full_pv']
+    testCases.print("CDS VALUE", v2)
+    testCases.print("CDS VALUE MATCH", abs(v1 - v2) < 1e-8)
+
+    cdsIndex = FinCDSIndexPortfolio()
+    spd1 = cdsIndex.intrinsicSpread(valuationDate, stepInDate, maturity5Y,
+                                    issuerCurves)
+    spd2 = cdsIndex.intrinsicSpread(valuationDate, stepInDate, maturity5Y,
+                                    setCurves)
+    testCases.print("INTRINSIC SPD 5Y", spd2 * 10000.0)
+    testCases.print("INTRINSIC SPD MATCH", abs(spd1 - spd2) < 1e-12)
+
+    tranche = FinCDSTranche(valuationDate, maturity5Y, 0.03, 0.07)
+    model = FinLossDistributionBuilder.GAUSSIAN
+    v1 = tranche.valueBC(valuationDate, issuerCurves, 0.0, 0.0300,
+                         0.30, 0.30, 20, model)
+    v2 = tranche.valueBC(valuationDate, setCurves, 0.0, 0.0300,
+                         0.30, 0.30, 20, model)
+    testCases.print("TRANCHE PAR SPD", v2[3] * 10000.0)
+    testCases.print("TRANCHE VALUE MATCH", np.max(np.abs(v1 - v2)) < 1e-10)
+
+    # A risk calculation that rebuilds the curve does not change the set
+    q5Y = curveSet.survProb(5.0)[7]
+    creditDV01 = cds.creditDV01(valuationDate, curveSet[7])
+    testCases.print("CREDIT DV01", creditDV01)
+    testCases.print("SET UNCHANGED", curveSet.survProb(5.0)[7] == q5Y)
+
+###############################################################################
+
+
+def test_FinCDSCurveSetTiming():
+
+    valuationDate = FinDate(2020, 6, 22)
+    liborCurve = buildLiborCurve(valuationDate)
+
+    tenors = ["6M", "1Y", "2Y", "3Y", "4Y", "5Y", "7Y", "10Y"]
+    baseSpreads = np.array([0.0040, 0.0045, 0.0055, 0.0065, 0.0075, 0.0085,
+                            0.0095, 0.0105])
+
+    testCases.header("NUM ISSUERS", "TIME", "MIN Q10Y", "MAX Q10Y")
+
+    for numIssuers in [100, 1000, 5000]:
+
+        scales = np.linspace(0.2, 5.0, numIssuers)
+        spreads = np.outer(scales, baseSpreads)
+
+        start = time.time()
+        curveSet = FinCDSCurveSet.fromSpreadMatrix(valuationDate, tenors,
+                                                   spreads, 0.40, liborCurve)
+        end = time.time()
+
+        q10Y = curveSet.survProb(10.0)
+        testCases.print(numIssuers, end - start, np.min(q10Y), np.max(q10Y))
+
+###############################################################################
+
+
+test_FinCDSCurveSet()
+test_FinCDSCurveSetTiming()
+testCases.compareTestCases()
@@ -0,0 +1,234 @@
+###############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+###############################################################################
+
+import os
+import time
+import numpy as np
+
+from FinTestCases import FinTestCases, globalTestCaseMode
+
+from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDayCount import FinDayCountTypes
+from financepy.finutils.FinFrequency import FinFrequencyTypes
+from financepy.finutils.FinGlobalTypes import FinSwapTypes
+from financepy.products.libor.FinLiborSwap import FinLiborSwap
+from financepy.products.libor.FinLiborCurve import FinLiborCurve
+from financepy.products.credit.FinCDS import FinCDS
+from financepy.products.credit.FinCDSCurve import FinCDSCurve
+from financepy.products.credit.FinCDSCurveSet import FinCDSCurveSet
+from financepy.products.credit.FinCDSPortfolioPricer import FinCDSPortfolioPricer
+
+testCases = FinTestCases(__file__, globalTestCaseMode)
+
+###############################################################################
+
+
+def buildLiborCurve(valuationDate):
+
+    dcType = FinDayCountTypes.THIRTY_E_360_ISDA
+    fixedFreq = FinFrequencyTypes.SEMI_ANNUAL
+
+    swaps = []
+    for numYears, swapRate in zip([1, 2, 3, 4, 5, 7, 10],
+                                  [0.0502, 0.0502, 0.0501, 0.0502, 0.0501,
+                                   0.0505, 0.0510]):
+        maturityDate = valuationDate.addMonths(12 * numYears)
+        swap = FinLiborSwap(valuationDate, maturityDate, FinSwapTypes.PAYER,
+                            swapRate, fixedFreq, dcType)
+        swaps.append(swap)
+
+    liborCurve = FinLiborCurve(valuationDate, [], [], swaps)
+    return liborCurve
+
+###############################################################################
+
+
+def buildIssuerCurves(valuationDate, liborCurve):
+
+    path = os.path.join(os.path.dirname(__file__),
+                        './/data//CDX_NA_IG_S7_SPREADS.csv')
+    f = open(path, 'r')
+    data = f.readlines()
+    f.close()
+
+    maturityDates = [valuationDate.nextCDSDate(36),
+                     valuationDate.nextCDSDate(60),
+                     valuationDate.nextCDSDate(84),
+                     valuationDate.nextCDSDate(120)]
+
+    issuerCurves = []
+    for row in data[1:]:
+
+        splitRow = row.split(",")
+        recoveryRate = float(splitRow[5])
+
+        cdsContracts = []
+        for i, maturityDate in enumerate(maturityDates):
+            spread = float(splitRow[i + 1]) / 10000.0
+            cds = FinCDS(valuationDate, maturityDate, spread)
+            cdsContracts.append(cds)
+
+        issuerCurve = FinCDSCurve(valuationDate, cdsContracts, liborCurve,
+                                  recoveryRate)
+        issuerCurves.append(issuerCurve)
+
+    return issuerCurves
+
+###############################################################################
+
+
+def test_FinCDSPortfolioPricer():
+
+    valuationDate = FinDate(2007, 8, 2)
+    liborCurve = buildLiborCurve(valuationDate)
+    issuerCurves = buildIssuerCurves(valuationDate, liborCurve)
+    numIssuers = len(issuerCurves)
+
+    # A mix of seasoned and new trades in both directions
+    stepInDates = [valuationDate, valuationDate.addDays(30)]
+    tenors = ["1Y", "3Y", "5Y", "7Y", "10Y"]
+
+    trades = []
+    issuerIndices = []
+
+    for iTrade in range(0, 200):
+        stepInDate = stepInDates[iTrade % 2]
+        tenor = tenors[iTrade % 5]
+        coupon = 0.0010 + 0.0001 * (iTrade % 37)
+        notional = 1000000.0 * (1 + iTrade % 7)
+        longProtection = (iTrade % 3 != 0)
+        cds = FinCDS(stepInDate, tenor, coupon, notional, longProtection)
+        trades.append(cds)
+        issuerIndices.append((7 * iTrade) % numIssuers)
+
+    pricer = FinCDSPortfolioPricer(valuationDate, liborCurve)
+    pricer.addTrades(trades, issuerIndices)
+    results = pricer.value(issuerCurves)
+
+    maxPVDiff = 0.0
+    maxRPV01Diff = 0.0
+    maxProtDiff = 0.0
+    maxSpreadDiff = 0.0
+
+    for iTrade, cds in enumerate(trades):
+
+        issuerCurve = issuerCurves[issuerIndices[iTrade]]
+
+        v = cds.value(valuationDate, issuerCurve)
+        rpv01 = cds.riskyPV01(valuationDate, issuerCurve)
+        prot = cds.protectionLegPV(valuationDate, issuerCurve)
+        spd = cds.parSpread(valuationDate, issuerCurve)
+
+        maxPVDiff = max(maxPVDiff,
+                        abs(v['full_pv'] - results['full_pv'][iTrade]),
+                        abs(v['clean_pv'] - results['clean_pv'][iTrade]))
+        maxRPV01Diff = max(maxRPV01Diff,
+                           abs(rpv01['full_rpv01'] -
+                               results['full_rpv01'][iTrade]),
+                           abs(rpv01['clean_rpv01'] -
+                               results['clean_rpv01'][iTrade]))
+        maxProtDiff = max(maxProtDiff, abs(prot - results['prot_pv'][iTrade]))
+        maxSpreadDiff = max(maxSpreadDiff,
+                            abs(spd - results['par_spread'][iTrade]))
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("NUM POSITIONS", pricer.numPositions())
+    testCases.print("NUM SCHEDULES", pricer.numSchedules())
+    testCases.print("TOTAL FULL PV", round(np.sum(results['full_pv']), 6))
+    testCases.print("TOTAL CLEAN PV", round(np.sum(results['clean_pv']), 6))
+    testCases.print("PAR SPREAD 0", results['par_spread'][0] * 10000.0)
+    testCases.print("PV MATCH", maxPVDiff < 1e-6)
+    testCases.print("RPV01 MATCH", maxRPV01Diff < 1e-12)
+    testCases.print("PROT PV MATCH", maxProtDiff < 1e-6)
+    testCases.print("PAR SPREAD MATCH", maxSpreadDiff < 1e-12)
+
+    # The curves can also be passed as a curve set
+    spreads = np.array([[cds._runningCoupon for cds in curve._cdsContracts]
+                        for curve in issuerCurves])
+    recoveryRates = [curve._recoveryRate for curve in issuerCurves]
+    curveSet = FinCDSCurveSet(valuationDate, issuerCurves[0]._cdsContracts,
+                              spreads, recoveryRates, liborCurve)
+
+    setResults = pricer.value(curveSet)
+    maxSetDiff = np.max(np.abs(setResults['full_pv'] - results['full_pv']))
+    testCases.print("CURVE SET MATCH", maxSetDiff < 1e-6)
+
+###############################################################################
+
+
+def test_FinCDSPortfolioPricerTiming():
+
+    valuationDate = FinDate(2020, 6, 22)
+    liborCurve = buildLiborCurve(valuationDate)
+
+    tenors = ["6M", "1Y", "2Y", "3Y", "4Y", "5Y", "7Y", "10Y"]
+    baseSpreads = np.array([0.0040, 0.0045, 0.0055, 0.0065, 0.0075, 0.0085,
+                            0.0095, 0.0105])
+
+    numIssuers = 1000
+    scales = np.linspace(0.2, 5.0, numIssuers)
+    curveSet = FinCDSCurveSet.fromSpreadMatrix(valuationDate, tenors,
+                                               np.outer(scales, baseSpreads),
+                                               0.40, liborCurve)
+
+    np.random.seed(1919)
+
+    numPositions = 100000
+    tradeTenors = ["1Y", "2Y", "3Y", "5Y", "7Y", "10Y"]
+    stepInDates = [valuationDate, valuationDate.addDays(45)]
+    numBlocks = len(tradeTenors) * len(stepInDates)
+
+    pricer = FinCDSPortfolioPricer(valuationDate, liborCurve)
+
+    # Keep one position of each block to check against the CDS valuation
+    checkTrades = []
+    checkIssuers = []
+    checkPositions = []
+
+    iBlock = 0
+    for stepInDate in stepInDates:
+        for tenor in tradeTenors:
+            blockSize = numPositions // numBlocks
+            if iBlock < numPositions % numBlocks:
+                blockSize += 1
+            iBlock += 1
+
+            cds = FinCDS(stepInDate, tenor, 0.0)
+            issuerIndices = np.random.randint(0, numIssuers, blockSize)
+            coupons = np.where(np.random.uniform(size=blockSize) < 0.5,
+                               0.01, 0.05)
+            notionals = np.random.randint(1, 20, blockSize) * 1000000.0
+            longProtection = np.random.uniform(size=blockSize) < 0.5
+            positions = pricer.addPositions(cds, issuerIndices, coupons,
+                                            notionals, longProtection)
+
+            checkTrades.append(FinCDS(stepInDate, tenor, coupons[0],
+                                      notionals[0], bool(longProtection[0])))
+            checkIssuers.append(issuerIndices[0])
+            checkPositions.append(positions[0])
+
+    # The first valuation precomputes the schedule data
+    pricer.value(curveSet)
+
+    start = time.time()
+    results = pricer.value(curveSet)
+    end = time.time()
+
+    maxPVDiff = 0.0
+    for cds, iIssuer, iPosition in zip(checkTrades, checkIssuers,
+                                       checkPositions):
+        v = cds.value(valuationDate, curveSet[iIssuer])
+        maxPVDiff = max(maxPVDiff,
+                        abs(v['full_pv'] - results['full_pv'][iPosition]))
+
+    testCases.header("NUM POSITIONS", "TIME", "PV MATCH", "MEAN PAR SPD")
+    testCases.print(pricer.numPositions(), end - start, maxPVDiff < 1e-6,
+                    round(np.mean(results['par_spread']) * 10000.0, 6))
+
+###############################################################################
+
+
+test_FinCDSPortfolioPricer()
+test_FinCDSPortfolioPricerTiming()
+testCases.compareTestCases()
@@ -13,18 +13,19 @@ from financepy.products.credit.FinCDS import FinCDS
 from financepy.products.libor.FinLiborSwap import FinLiborSwap
 from financepy.products.libor.FinLiborCurve import FinLiborCurve
 from financepy.products.credit.FinCDSCurve import FinCDSCurve
+from financepy.products.credit.FinCDSCurveSet import FinCDSCurveSet
 from financepy.finutils.FinFrequency import FinFrequencyTypes
 from financepy.finutils.FinDayCount import FinDayCountTypes
 from financepy.finutils.FinDate import FinDate
 from financepy.finutils.FinGlobalTypes import FinSwapTypes
+from financepy.finutils.FinError import FinError
 
 import time
+from copy import deepcopy
 import sys
+import numpy as np
 sys.path.append("..//..")
 
-
-#import numpy as np
-
 testCases = FinTestCases(__file__, globalTestCaseMode)
 
 ##########################################################################
@@ -248,6 +249,11 @@ def test_FinCDSTranche():
     adjustedSpd = intrinsicSpd / 0.6
     testCases.print("ADJUSTED  SPD TRANCHE MATURITY", adjustedSpd)
 
+    # The first valuation with each method includes the Numba compilation
+    for method in FinLossDistributionBuilder:
+        tranche1.valueBC(valuationDate, issuerCurves, upfront, spd,
+                         corr1, corr2, 40, method)
+
     testCases.header("METHOD", "TIME", "NumPoints", "K1", "K2", "Sprd")
 
     for method in FinLossDistributionBuilder:
@@ -326,5 +332,243 @@ def test_FinCDSTranche():
 ##########################################################################
 
 
+def test_FinCDSTrancheLossSurface():
+
+    tradeDate = FinDate(2007, 3, 1)
+    valuationDate = tradeDate.addDays(1)
+    liborCurve = buildLiborCurve(tradeDate)
+    issuerCurves = loadHeterogeneousSpreadCurves(valuationDate, liborCurve)
+
+    trancheMaturity = FinDate(2011, 12, 20)
+    strikes = [0.00, 0.03, 0.07, 0.10, 0.15, 0.30]
+    baseCorrs = [0.0, 0.15, 0.25, 0.30, 0.40, 0.60]
+
+    tranches = []
+    for k1, k2 in zip(strikes[:-1], strikes[1:]):
+        tranches.append(FinCDSTranche(valuationDate, trancheMaturity, k1, k2))
+
+    upfront = 0.0
+    spd = 0.0
+    numPoints = 40
+
+    testCases.header("METHOD", "VALUATION", "TIME", "NUM CORRS", "MAX DIFF")
+
+    for method in FinLossDistributionBuilder:
+
+        start = time.time()
+        values = []
+        for i, tranche in enumerate(tranches):
+            v = tranche.valueBC(valuationDate, issuerCurves, upfront, spd,
+                                baseCorrs[i], baseCorrs[i + 1], numPoints,
+                                method)
+            values.append(v)
+        end = time.time()
+
+        testCases.print(method, "DIRECT", end - start, 0, 0.0)
+
+        # The loss distribution at each strike is built once and shared
+        start = time.time()
+        lossSurface = tranches[0].lossSurface(valuationDate, issuerCurves,
+                                              numPoints, method)
+        maxDiff = 0.0
+        for i, tranche in enumerate(tranches):
+            v = tranche.valueBC(valuationDate, issuerCurves, upfront, spd,
+                                baseCorrs[i], baseCorrs[i + 1],
+                                lossSurface=lossSurface)
+            maxDiff = max(maxDiff, np.max(np.abs(v - values[i])))
+        end = time.time()
+
+        testCases.print(method, "SURFACE", end - start,
+                        lossSurface.numCorrelations(), maxDiff)
+
+    # Only the loss data of the most recently used correlations is kept
+    lossSurface = tranches[0].lossSurface(valuationDate, issuerCurves,
+                                          numPoints)
+    for corr in np.linspace(0.05, 0.95, 50):
+        lossSurface.trancheSurvProbs(0.0, 0.03, corr)
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("NUM CORRS HELD", lossSurface.numCorrelations())
+
+    # A surface built from other issuers cannot be used
+    otherCurves = issuerCurves[1:] + issuerCurves[:1]
+
+    try:
+        tranches[0].valueBC(valuationDate, otherCurves, upfront, spd,
+                            0.0, 0.15, lossSurface=lossSurface)
+        testCases.print("OTHER ISSUERS REJECTED", False)
+    except FinError:
+        testCases.print("OTHER ISSUERS REJECTED", True)
+
+    # Equal curves which are not the same objects are accepted
+    copiedCurves = [deepcopy(curve) for curve in issuerCurves]
+    v1 = tranches[0].valueBC(valuationDate, issuerCurves, upfront, spd,
+                             0.0, 0.15, lossSurface=lossSurface)
+    v2 = tranches[0].valueBC(valuationDate, copiedCurves, upfront, spd,
+                             0.0, 0.15, lossSurface=lossSurface)
+    testCases.print("COPIED ISSUERS ACCEPTED", np.all(v1 == v2))
+
+##########################################################################
+
+
+def test_FinCDSTrancheFFT():
+
+    tradeDate = FinDate(2007, 3, 1)
+    valuationDate = tradeDate.addDays(1)
+    liborCurve = buildLiborCurve(tradeDate)
+    trancheMaturity = FinDate(2011, 12, 20)
+    tranche = FinCDSTranche(valuationDate, trancheMaturity, 0.03, 0.07)
+
+    maturityDates = [valuationDate.nextCDSDate(36),
+                     valuationDate.nextCDSDate(60),
+                     valuationDate.nextCDSDate(84),
+                     valuationDate.nextCDSDate(120)]
+
+    issuerCurves = loadHeterogeneousSpreadCurves(valuationDate, liborCurve)
+    spreads = np.array([[cds._runningCoupon for cds in curve._cdsContracts]
+                        for curve in issuerCurves])
+
+    # A portfolio of 1000 names with the CDX spreads scaled up and down
+    scales = np.linspace(0.5, 1.5, 8)
+    bigSpreads = np.vstack([spreads * scale for scale in scales])
+    curveSet = FinCDSCurveSet.fromSpreadMatrix(valuationDate, maturityDates,
+                                               bigSpreads, 0.40, liborCurve)
+
+    portfolios = [("HETEROGENEOUS", issuerCurves),
+                  ("HETEROGENEOUS", curveSet.issuerCurves()),
+                  ("HOMOGENEOUS", [issuerCurves[0]] * 1000)]
+
+    testCases.header("PORTFOLIO", "NUM CREDITS", "METHOD", "TIME", "SPRD",
+                     "MATCH")
+
+    methods = [FinLossDistributionBuilder.RECURSION,
+               FinLossDistributionBuilder.FFT]
+
+    for label, curves in portfolios:
+
+        values = []
+        for method in methods:
+
+            start = time.time()
+            v = tranche.valueBC(valuationDate, curves, 0.0, 0.0, 0.30, 0.35,
+                                40, method)
+            end = time.time()
+            values.append(v)
+
+            maxDiff = np.max(np.abs(v - values[0]))
+            testCases.print(label, len(curves), method, end - start,
+                            v[3] * 10000, maxDiff < 1e-8)
+
+##########################################################################
+
+
+def test_FinCDSTrancheQuadrature():
+
+    tradeDate = FinDate(2007, 3, 1)
+    valuationDate = tradeDate.addDays(1)
+    liborCurve = buildLiborCurve(tradeDate)
+    issuerCurves = loadHeterogeneousSpreadCurves(valuationDate, liborCurve)
+
+    trancheMaturity = FinDate(2011, 12, 20)
+    strikes = [0.00, 0.03, 0.07, 0.10, 0.15, 0.30]
+    baseCorrs = [0.10, 0.20, 0.30, 0.40, 0.55, 0.80]
+
+    tranches = []
+    for k1, k2 in zip(strikes[:-1], strikes[1:]):
+        tranches.append(FinCDSTranche(valuationDate, trancheMaturity, k1, k2))
+
+    def capitalStructureSpreads(numPoints, model, gaussHermite):
+        lossSurface = tranches[0].lossSurface(valuationDate, issuerCurves,
+                                              numPoints, model, gaussHermite)
+        spreads = np.zeros(len(tranches))
+        for i, tranche in enumerate(tranches):
+            v = tranche.valueBC(valuationDate, issuerCurves, 0.0, 0.0,
+                                baseCorrs[i], baseCorrs[i + 1],
+                                lossSurface=lossSurface)
+            spreads[i] = v[3] * 10000
+        return spreads
+
+    testCases.header("METHOD", "GAUSS HERMITE", "NumPoints", "TIME",
+                     "MAX SPRD ERROR")
+
+    for method in [FinLossDistributionBuilder.RECURSION,
+                   FinLossDistributionBuilder.ADJUSTED_BINOMIAL]:
+
+        exactSpreads = capitalStructureSpreads(400, method, False)
+
+        for gaussHermite in [False, True]:
+            for numPoints in [20, 40, 80]:
+                start = time.time()
+                spreads = capitalStructureSpreads(numPoints, method,
+                                                  gaussHermite)
+                end = time.time()
+                maxError = np.max(np.abs(spreads - exactSpreads))
+                testCases.print(method, gaussHermite, numPoints, end - start,
+                                maxError)
+
+def test_FinCDSTrancheSurvivalCurve():
+
+    tradeDate = FinDate(2007, 3, 1)
+    valuationDate = tradeDate.addDays(1)
+    liborCurve = buildLiborCurve(tradeDate)
+    issuerCurves = loadHeterogeneousSpreadCurves(valuationDate, liborCurve)
+
+    trancheMaturity = FinDate(2011, 12, 20)
+    tranche = FinCDSTranche(valuationDate, trancheMaturity, 0.03, 0.07)
+    corr1 = 0.20
+    corr2 = 0.30
+    numPoints = 40
+
+    testCases.header("METHOD", "TIME", "NUM TIMES", "Q(T)", "SPRD", "CHECK")
+
+    for method in FinLossDistributionBuilder:
+
+        start = time.time()
+        trancheCurve = tranche.survivalCurve(valuationDate, issuerCurves,
+                                             corr1, corr2, numPoints, method)
+        end = time.time()
+
+        v = tranche.valueBC(valuationDate, issuerCurves, 0.0, 0.0,
+                            corr1, corr2, numPoints, method)
+
+        protLegPV = tranche._cdsContract.protectionLegPV(valuationDate,
+                                                         trancheCurve, 0.0)
+        riskyPV01 = tranche._cdsContract.riskyPV01(valuationDate,
+                                                   trancheCurve)['clean_rpv01']
+        spd = protLegPV / riskyPV01
+
+        testCases.print(method, end - start, len(trancheCurve._times),
+                        trancheCurve._values[-1], spd * 10000,
+                        abs(spd - v[3]) < 1e-12)
+
+    lossSurface = tranche.lossSurface(valuationDate, issuerCurves, numPoints)
+    trancheCurve = tranche.survivalCurve(valuationDate, issuerCurves,
+                                         corr1, corr2,
+                                         lossSurface=lossSurface)
+
+    testCases.header("T", "Q(T)")
+    for t, q in zip(trancheCurve._times, trancheCurve._values):
+        testCases.print(t, q)
+
+    # A tranche with no width has no survival curve
+    thinTranche = FinCDSTranche(valuationDate, trancheMaturity, 0.03,
+                                0.03 + 1e-9)
+
+    testCases.header("LABEL", "VALUE")
+
+    try:
+        thinTranche.survivalCurve(valuationDate, issuerCurves, corr1, corr2,
+                                  lossSurface=lossSurface)
+        testCases.print("THIN TRANCHE REJECTED", False)
+    except FinError:
+        testCases.print("THIN TRANCHE REJECTED", True)
+
+##########################################################################
+
+
 test_FinCDSTranche()
+test_FinCDSTrancheLossSurface()
+test_FinCDSTrancheFFT()
+test_FinCDSTrancheQuadrature()
+test_FinCDSTrancheSurvivalCurve()
 testCases.compareTestCases()
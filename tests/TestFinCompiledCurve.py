@@ -0,0 +1,139 @@
+###############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+###############################################################################
+
+import numpy as np
+from numba import njit
+
+from FinTestCases import FinTestCases, globalTestCaseMode
+
+from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDayCount import FinDayCountTypes
+from financepy.finutils.FinFrequency import FinFrequencyTypes
+from financepy.finutils.FinGlobalTypes import FinSwapTypes
+from financepy.finutils.FinHelperFunctions import timesFromDates
+from financepy.market.curves.FinInterpolate import FinInterpTypes
+from financepy.market.curves.FinDiscountCurve import FinDiscountCurve
+from financepy.market.curves.FinDiscountCurveFlat import FinDiscountCurveFlat
+from financepy.market.curves.FinDiscountCurveNS import FinDiscountCurveNS
+from financepy.market.curves.FinDiscountCurveNSS import FinDiscountCurveNSS
+from financepy.market.curves.FinDiscountCurvePWF import FinDiscountCurvePWF
+from financepy.market.curves.FinDiscountCurvePWL import FinDiscountCurvePWL
+from financepy.market.curves.FinDiscountCurvePoly import FinDiscountCurvePoly
+from financepy.products.credit.FinCDS import FinCDS
+from financepy.products.credit.FinCDSCurve import FinCDSCurve
+from financepy.products.libor.FinLiborCurve import FinLiborCurve
+from financepy.products.libor.FinLiborSwap import FinLiborSwap
+
+testCases = FinTestCases(__file__, globalTestCaseMode)
+
+###############################################################################
+
+
+@njit(fastmath=True)
+def _riskyAnnuity(curve, paymentTimes):
+    ''' Sum of the risky discount factors at the payment times calculated
+    inside Numba using a compiled curve. '''
+
+    annuity = 0.0
+    prevTime = 0.0
+    for t in paymentTimes:
+        annuity += (t - prevTime) * curve.df(t) * curve.survProb(t)
+        prevTime = t
+    return annuity
+
+###############################################################################
+
+
+def test_FinCompiledDiscountCurves():
+
+    valuationDate = FinDate(2020, 1, 1)
+    zeroDates = valuationDate.addYears([1, 2, 5, 10, 30])
+    zeroRates = [0.010, 0.015, 0.020, 0.025, 0.027]
+    dfValues = np.exp(-np.array(zeroRates) * np.array([1, 2, 5, 10, 30]))
+
+    curves = []
+    curves.append(FinDiscountCurve(valuationDate, zeroDates, dfValues,
+                                   FinInterpTypes.FLAT_FORWARDS))
+    curves.append(FinDiscountCurve(valuationDate, zeroDates, dfValues,
+                                   FinInterpTypes.LINEAR_FORWARDS))
+    curves.append(FinDiscountCurveFlat(valuationDate, 0.03,
+                                       FinFrequencyTypes.SEMI_ANNUAL))
+    curves.append(FinDiscountCurveNS(valuationDate, 0.03, -0.02, 0.01, 2.0))
+    curves.append(FinDiscountCurveNSS(valuationDate, 0.03, -0.02, 0.01, 0.02,
+                                      2.0, 5.0))
+    curves.append(FinDiscountCurvePWF(valuationDate, zeroDates, zeroRates,
+                                      FinFrequencyTypes.ANNUAL))
+    curves.append(FinDiscountCurvePWL(valuationDate, zeroDates, zeroRates))
+    curves.append(FinDiscountCurvePoly(valuationDate, [0.01, 0.002, -0.0001]))
+
+    dates = valuationDate.addMonths(list(range(3, 363, 3)))
+
+    testCases.header("CURVE", "DF10Y", "ZERO10Y", "FWD7Y", "ANNUITY",
+                     "MAXDFDIFF")
+
+    for curve in curves:
+
+        compiledCurve = curve.compiled()
+
+        times = timesFromDates(dates, valuationDate, curve._dayCountType)
+        dfs = compiledCurve.dfs(times)
+        maxDiff = np.max(np.abs(dfs - curve.df(dates)))
+        annuity = _riskyAnnuity(compiledCurve, times)
+
+        testCases.print(type(curve).__name__,
+                        compiledCurve.df(10.0),
+                        compiledCurve.zero(10.0),
+                        compiledCurve.fwd(7.0),
+                        annuity,
+                        maxDiff < 1e-12)
+
+###############################################################################
+
+
+def test_FinCompiledCDSCurve():
+
+    curveDate = FinDate(2018, 12, 20)
+
+    swaps = []
+    fixedDCC = FinDayCountTypes.ACT_365F
+    fixedFreq = FinFrequencyTypes.SEMI_ANNUAL
+
+    for i in range(1, 11):
+        maturityDate = curveDate.addMonths(12 * i)
+        swap = FinLiborSwap(curveDate, maturityDate, FinSwapTypes.PAYER,
+                            0.05, fixedFreq, fixedDCC)
+        swaps.append(swap)
+
+    liborCurve = FinLiborCurve(curveDate, [], [], swaps)
+
+    cdsContracts = []
+    for i in range(1, 11):
+        maturityDate = curveDate.addMonths(12 * i)
+        cds = FinCDS(curveDate, maturityDate, 0.005 + 0.001 * (i - 1))
+        cdsContracts.append(cds)
+
+    issuerCurve = FinCDSCurve(curveDate, cdsContracts, liborCurve,
+                              recoveryRate=0.40)
+
+    compiledCurve = issuerCurve.compiled()
+
+    times = np.linspace(0.0, 12.0, 49)
+    maxDfDiff = np.max(np.abs(compiledCurve.dfs(times) -
+                              issuerCurve.df(times)))
+    maxQDiff = np.max(np.abs(compiledCurve.survProbs(times) -
+                             issuerCurve.survProb(times)))
+
+    testCases.header("LABEL", "VALUE")
+    testCases.print("Q5Y", compiledCurve.survProb(5.0))
+    testCases.print("DF5Y", compiledCurve.df(5.0))
+    testCases.print("RISKY ANNUITY", _riskyAnnuity(compiledCurve, times[1:]))
+    testCases.print("DFS MATCH", maxDfDiff < 1e-12)
+    testCases.print("QS MATCH", maxQDiff < 1e-12)
+
+###############################################################################
+
+
+test_FinCompiledDiscountCurves()
+test_FinCompiledCDSCurve()
+testCases.compareTestCases()
@@ -2,13 +2,15 @@
 # Copyright (C) 2018, 2019, 2020 Dominic O'Kane
 ###############################################################################
 
+import numpy as np
 
 from FinTestCases import FinTestCases, globalTestCaseMode
 
 from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDateArray import FinDateArray
 from financepy.finutils.FinSchedule import FinSchedule
 from financepy.finutils.FinFrequency import FinFrequencyTypes
-from financepy.finutils.FinCalendar import FinCalendarTypes
+from financepy.finutils.FinCalendar import FinCalendar, FinCalendarTypes
 from financepy.finutils.FinCalendar import FinBusDayAdjustTypes
 from financepy.finutils.FinCalendar import FinDateGenRuleTypes
 
@@ -99,5 +101,65 @@ def test_FinDateAdjust():
 ###############################################################################
 
 
+def test_FinCalendarAdjustDates():
+
+    startDate = FinDate(20, 12, 2019)
+    dates = []
+    for numDays in range(0, 20):
+        dates.append(startDate.addDays(numDays))
+
+    dateArray = FinDateArray(dates)
+
+    busDayAdjustType = FinBusDayAdjustTypes.MODIFIED_FOLLOWING
+
+    for calendarType in [FinCalendarTypes.TARGET,
+                         FinCalendarTypes.US,
+                         FinCalendarTypes.UK]:
+
+        calendar = FinCalendar(calendarType)
+        adjustedDates = calendar.adjustDates(dateArray, busDayAdjustType)
+
+        testCases.banner(str(calendarType))
+        testCases.header("DATE", "BUSDAY", "ADJUSTED", "PLUS_2_BD")
+
+        for i in range(0, len(dates)):
+            dt = dates[i]
+            assert adjustedDates[i] == calendar.adjust(dt, busDayAdjustType)
+            testCases.print(str(dt),
+                            calendar.isBusinessDay(dt),
+                            str(adjustedDates[i]),
+                            str(calendar.addBusinessDays(dt, 2)))
+
+###############################################################################
+
+
+def test_FinCalendarBusinessDays():
+
+    startDate = FinDate(20, 6, 2020)
+    dates = []
+    for numWeeks in range(0, 20):
+        dates.append(startDate.addDays(numWeeks * 9))
+
+    dateArray = FinDateArray(dates)
+    numDays = np.arange(0, len(dates)) * 7 - 60
+
+    calendar = FinCalendar(FinCalendarTypes.US)
+    newDates = calendar.addBusinessDaysToDates(dateArray, numDays)
+    counts = calendar.businessDaysBetweenDates(dateArray, newDates)
+
+    testCases.header("DATE", "NUMDAYS", "NEWDATE", "COUNT")
+
+    for i in range(0, len(dates)):
+        dt = dates[i]
+        n = int(numDays[i])
+        assert newDates[i] == calendar.addBusinessDays(dt, n)
+        assert counts[i] == calendar.businessDaysBetween(dt, newDates[i])
+        testCases.print(str(dt), n, str(newDates[i]), counts[i])
+
+###############################################################################
+
+
 test_FinDateAdjust()
+test_FinCalendarAdjustDates()
+test_FinCalendarBusinessDays()
 testCases.compareTestCases()
@@ -0,0 +1,86 @@
+###############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+###############################################################################
+
+import numpy as np
+import time
+
+from FinTestCases import FinTestCases, globalTestCaseMode
+
+from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDateArray import FinDateArray
+import sys
+sys.path.append("..//..")
+
+testCases = FinTestCases(__file__, globalTestCaseMode)
+
+###############################################################################
+
+
+def test_FinDateArray():
+
+    startDate = FinDate(31, 1, 2018)
+
+    dates = []
+    for numMonths in range(0, 24):
+        dates.append(startDate.addMonths(numMonths))
+
+    dateArray = FinDateArray(dates)
+
+    newDates1 = dateArray.addTenor("3M").toList()
+    newDates2 = dateArray.addDays(10).toList()
+    weekdays = dateArray.weekday()
+
+    testCases.header("DATE", "+3M", "+10D", "WEEKDAY")
+
+    for i in range(0, len(dates)):
+        assert newDates1[i] == dates[i].addTenor("3M")
+        assert newDates2[i] == dates[i].addDays(10)
+        assert weekdays[i] == dates[i]._weekday
+        testCases.print(str(dates[i]), str(newDates1[i]), str(newDates2[i]),
+                        weekdays[i])
+
+    dateArray2 = dateArray.addTenor("2Y")
+    diffs = dateArray2 - dateArray
+
+    testCases.header("DATE", "+2Y", "DAYS")
+
+    for i in range(0, len(dates)):
+        assert dateArray2[i] == dates[i].addTenor("2Y")
+        testCases.print(str(dateArray[i]), str(dateArray2[i]), diffs[i])
+
+    testCases.header("DATE", "BEFORE_2019", "WEEKEND")
+
+    before = dateArray < FinDate(1, 1, 2019)
+    weekends = dateArray.isWeekend()
+
+    for i in range(0, len(dates)):
+        testCases.print(str(dateArray[i]), before[i], weekends[i])
+
+###############################################################################
+
+
+def test_FinDateArraySpeed():
+
+    numDates = 100000
+    startDate = FinDate(1, 1, 2010)
+
+    serials = startDate._excelDate + np.arange(0, numDates) % 3650
+    dateArray = FinDateArray(serials)
+
+    start = time.time()
+    dateArray.addTenor("5Y")
+    dateArray.addMonths(3)
+    dateArray.weekday()
+    end = time.time()
+    elapsed = end - start
+
+    testCases.header("LABEL", "TIME")
+    testCases.print("TIMING", elapsed)
+
+###############################################################################
+
+
+test_FinDateArray()
+test_FinDateArraySpeed()
+testCases.compareTestCases()
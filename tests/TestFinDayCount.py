@@ -5,6 +5,8 @@
 from FinTestCases import FinTestCases, globalTestCaseMode
 
 from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDateArray import FinDateArray
+from financepy.finutils.FinFrequency import FinFrequencyTypes
 from financepy.finutils.FinDayCount import FinDayCount, FinDayCountTypes
 import sys
 sys.path.append("..//..")
@@ -35,5 +37,40 @@ def test_FinDayCount():
                 dcf[0])
 
 
+
+def test_FinDayCountYearFracs():
+
+    testCases.header("DAY_COUNT_METHOD", "START", "END", "ALPHA")
+
+    startDate = FinDate(31, 1, 2019)
+    startDates = []
+    endDates = []
+    for numMonths in range(0, 12):
+        startDates.append(startDate.addMonths(numMonths))
+        endDates.append(startDate.addMonths(numMonths + 3))
+
+    startArray = FinDateArray(startDates)
+    endArray = FinDateArray(endDates)
+    frequencyType = FinFrequencyTypes.QUARTERLY
+
+    for dayCountMethod in FinDayCountTypes:
+
+        dayCount = FinDayCount(dayCountMethod)
+        dcfs = dayCount.yearFracs(startArray, endArray, endArray,
+                                  frequencyType)
+
+        for i in range(0, len(startDates)):
+            dcf = dayCount.yearFrac(startDates[i], endDates[i], endDates[i],
+                                    frequencyType)
+            assert abs(dcfs[i] - dcf[0]) < 1e-12
+
+            testCases.print(
+                str(dayCountMethod),
+                str(startDates[i]),
+                str(endDates[i]),
+                dcfs[i])
+
+
 test_FinDayCount()
+test_FinDayCountYearFracs()
 testCases.compareTestCases()
@@ -5,15 +5,21 @@
 from FinTestCases import FinTestCases, globalTestCaseMode
 
 from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinDateArray import FinDateArray
 from financepy.finutils.FinFrequency import FinFrequencyTypes
 from financepy.market.curves.FinInterpolate import FinInterpTypes
 
 from financepy.market.curves.FinDiscountCurve import FinDiscountCurve
+from financepy.market.curves.FinDiscountCurvePWF import FinDiscountCurvePWF
+from financepy.market.curves.FinDiscountCurvePWL import FinDiscountCurvePWL
+
+from financepy.finutils.FinError import FinError
 
 from financepy.finutils.FinMath import scale
 
 import matplotlib.pyplot as plt
 import numpy as np
+import time
 import sys
 sys.path.append("..//..")
 
@@ -87,5 +93,112 @@ def test_FinDiscountCurve():
 ###############################################################################
 
 
+def test_FinDiscountCurveDateArray():
+
+    valuationDate = FinDate(1, 1, 2019)
+    dates = []
+    for years in range(1, 11):
+        dates.append(valuationDate.addYears(years))
+
+    dfValues = np.exp(-0.05 * np.arange(1, 11))
+
+    numFlows = 50000
+    flowSerials = valuationDate._excelDate + np.arange(0, numFlows) % 3600
+    flowDates = FinDateArray(flowSerials)
+
+    testCases.header("INTERP", "DATE", "DF")
+
+    for interp in FinInterpTypes:
+
+        curve = FinDiscountCurve(valuationDate, dates, dfValues, interp)
+        dfs = curve.df(flowDates)
+
+        for i in range(0, numFlows, 5000):
+            dt = flowDates[i]
+            assert abs(dfs[i] - curve.df(dt)) < 1e-12
+            testCases.print(str(interp), str(dt), dfs[i])
+
+    testCases.header("LABEL", "TIME")
+
+    start = time.time()
+    curve.df(flowDates)
+    end = time.time()
+    testCases.print("DF DATE ARRAY", end - start)
+
+    flowDateList = flowDates.toList()
+
+    start = time.time()
+    curve.df(flowDateList)
+    end = time.time()
+    testCases.print("DF DATE LIST", end - start)
+
+###############################################################################
+
+
+def test_FinDiscountCurveBumpMany():
+
+    valuationDate = FinDate(1, 1, 2019)
+    dates = []
+    for years in range(1, 11):
+        dates.append(valuationDate.addYears(years))
+
+    dfValues = np.exp(-0.05 * np.arange(1, 11))
+
+    # A bond paying a 5% annual coupon valued on every scenario at once
+    flowDates = valuationDate.addMonths(list(range(6, 102, 12)))
+    flows = np.full(8, 5.0)
+    flows[-1] += 100.0
+
+    bumpSizes = np.linspace(-0.01, 0.01, 201)
+    keyTimes = [1.0, 2.0, 5.0, 10.0]
+
+    testCases.header("INTERP", "PV", "PV_UP", "PV_DOWN", "DV01", "KEYDV01_1Y",
+                     "KEYDV01_2Y", "KEYDV01_5Y", "KEYDV01_10Y", "MATCH")
+
+    for interp in FinInterpTypes:
+
+        curve = FinDiscountCurve(valuationDate, dates, dfValues, interp)
+        pv = np.sum(flows * curve.df(flowDates))
+
+        curveSet = curve.bumpMany(bumpSizes)
+        pvs = np.dot(curveSet.df(flowDates), flows)
+
+        # Check a scenario against a curve built from the bumped grid
+        bumpedDfValues = dfValues * np.exp(-0.01 * curve._times[1:])
+        bumpedCurve = FinDiscountCurve(valuationDate, dates, bumpedDfValues,
+                                       interp)
+        pvUp = np.sum(flows * bumpedCurve.df(flowDates))
+        match = abs(pvUp - pvs[-1]) < 1e-10
+
+        dv01Set = curve.bumpMany(0.0001, keyTimes)
+        keyDV01s = np.dot(dv01Set.df(flowDates), flows) - pv
+        dv01 = np.dot(curve.bumpMany([0.0001]).df(flowDates), flows)[0] - pv
+
+        testCases.print(interp, pv, pvs[-1], pvs[0], dv01, keyDV01s[0],
+                        keyDV01s[1], keyDV01s[2], keyDV01s[3], match)
+
+    # Curves that do not interpolate a grid of discount factors cannot be
+    # bumped in this way
+    zeroRates = 0.05 * np.ones(10)
+
+    testCases.header("CURVE", "RAISES FINERROR")
+
+    for curveClass in [FinDiscountCurvePWF, FinDiscountCurvePWL]:
+
+        curve = curveClass(valuationDate, dates, zeroRates)
+
+        try:
+            curve.bumpMany([0.0001])
+            raisesError = False
+        except FinError:
+            raisesError = True
+
+        testCases.print(curveClass.__name__, raisesError)
+
+###############################################################################
+
+
 test_FinDiscountCurve()
+test_FinDiscountCurveDateArray()
+test_FinDiscountCurveBumpMany()
 testCases.compareTestCases()
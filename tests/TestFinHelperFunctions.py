@@ -0,0 +1,82 @@
+###############################################################################
+# Copyright (C) 2018, 2019, 2020 Dominic O'Kane
+###############################################################################
+
+import time
+
+from FinTestCases import FinTestCases, globalTestCaseMode
+
+from financepy.finutils.FinDate import FinDate
+from financepy.finutils.FinError import FinError
+from financepy.finutils.FinHelperFunctions import FinArgumentCheckTypes
+from financepy.finutils.FinHelperFunctions import setArgumentCheckType
+from financepy.products.equity.FinEquityVanillaOption import FinEquityVanillaOption
+from financepy.products.equity.FinEquityVanillaOption import FinOptionTypes
+from financepy.products.credit.FinCDS import FinCDS
+import sys
+sys.path.append("..//..")
+
+testCases = FinTestCases(__file__, globalTestCaseMode)
+
+###############################################################################
+
+
+def test_FinArgumentCheckTypes():
+
+    expiryDate = FinDate(1, 7, 2021)
+    optionType = FinOptionTypes.EUROPEAN_CALL
+
+    testCases.header("MODE", "FIRST_CALL_ERROR", "SECOND_CALL_ERROR")
+
+    for argumentCheckType in FinArgumentCheckTypes:
+
+        setArgumentCheckType(argumentCheckType)
+
+        errors = []
+
+        # The first call is valid and the second has a string strike
+        for strikePrice in [100.0, "100.0"]:
+            try:
+                FinEquityVanillaOption(expiryDate, strikePrice, optionType)
+                errors.append(False)
+            except FinError:
+                errors.append(True)
+
+        testCases.print(str(argumentCheckType), errors[0], errors[1])
+
+    setArgumentCheckType(FinArgumentCheckTypes.STRICT)
+
+###############################################################################
+
+
+def test_FinArgumentCheckTypesSpeed():
+
+    numTrades = 2000
+    stepInDate = FinDate(20, 6, 2020)
+    expiryDate = FinDate(1, 7, 2021)
+    optionType = FinOptionTypes.EUROPEAN_CALL
+
+    testCases.header("MODE", "TIME")
+
+    for argumentCheckType in FinArgumentCheckTypes:
+
+        setArgumentCheckType(argumentCheckType)
+
+        start = time.time()
+
+        for i in range(0, numTrades):
+            FinEquityVanillaOption(expiryDate, 100.0 + i, optionType)
+            FinCDS(stepInDate, "5Y", 0.01)
+
+        end = time.time()
+
+        testCases.print(str(argumentCheckType), end - start)
+
+    setArgumentCheckType(FinArgumentCheckTypes.STRICT)
+
+###############################################################################
+
+
+test_FinArgumentCheckTypes()
+test_FinArgumentCheckTypesSpeed()
+testCases.compareTestCases()
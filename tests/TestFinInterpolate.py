@@ -4,6 +4,8 @@
 
 from FinTestCases import FinTestCases, globalTestCaseMode
 from financepy.market.curves.FinInterpolate import interpolate, FinInterpTypes
+from financepy.market.curves.FinInterpolate import _interpolationCoeffs
+from financepy.market.curves.FinInterpolate import _vinterpolateCoeffs
 import numpy as np
 import math
 import sys
@@ -71,5 +73,71 @@ def test_FinInterpolate():
 ###############################################################################
 
 
+def test_FinInterpolateLongCurve():
+
+    import time
+
+    # A daily grid of ten years of discount factors queried at a large
+    # vector of sorted times and then at the same times in random order
+    numPoints = 3650
+    xValues = np.linspace(0.0, 10.0, numPoints)
+    yValues = np.exp(-0.02 * xValues - 0.001 * np.sin(xValues) * xValues)
+
+    numValues = 100000
+    np.random.seed(1919)
+    xRandomValues = np.random.uniform(0.0, 12.0, numValues)
+    xSortedValues = np.sort(xRandomValues)
+
+    testCases.header("METHOD", "ORDER", "TIME", "SUMY", "MAXCOEFFSDIFF")
+
+    for method in FinInterpTypes:
+
+        coeffs = _interpolationCoeffs(xValues, yValues, method.value)
+
+        for label, xs in [("SORTED", xSortedValues),
+                          ("RANDOM", xRandomValues)]:
+
+            start = time.time()
+            ys = interpolate(xs, xValues, yValues, method.value)
+            end = time.time()
+
+            ysCoeffs = _vinterpolateCoeffs(xs, xValues, coeffs)
+            maxDiff = np.max(np.abs(ys - ysCoeffs))
+
+            testCases.print(method, label, end - start, np.sum(ys),
+                            maxDiff < 1e-12)
+
+###############################################################################
+
+
+def test_FinInterpolateBeforeFirstPoint():
+
+    # Times before the first grid time must give the same value whether they
+    # are interpolated one at a time, as a vector or using the coefficients
+    xValues = np.array([0.25, 0.5, 0.75, 1.0, 2.0, 3.0, 5.0, 10.0])
+    yValues = np.exp(-0.1 * xValues + 0.002 * xValues * xValues)
+
+    xs = np.array([0.0, 0.1, 0.2, 0.25])
+
+    testCases.header("METHOD", "X", "Y_SCALAR", "VECTOR MATCH",
+                     "COEFFS MATCH")
+
+    for method in FinInterpTypes:
+
+        coeffs = _interpolationCoeffs(xValues, yValues, method.value)
+        ysVector = interpolate(xs, xValues, yValues, method.value)
+        ysCoeffs = _vinterpolateCoeffs(xs, xValues, coeffs)
+
+        for k in range(0, len(xs)):
+            y = interpolate(xs[k], xValues, yValues, method.value)
+            testCases.print(method, xs[k], y,
+                            abs(y - ysVector[k]) < 1e-12,
+                            abs(y - ysCoeffs[k]) < 1e-12)
+
+###############################################################################
+
+
 test_FinInterpolate()
+test_FinInterpolateLongCurve()
+test_FinInterpolateBeforeFirstPoint()
 testCases.compareTestCases()
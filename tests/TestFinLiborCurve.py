@@ -703,11 +703,223 @@ def test_bloombergPricingExample():
 ###############################################################################
 
 
+def test_FinLiborCurveBootstrapInterpTypes():
+
+    # Bootstrap a long curve with each interpolation scheme and check that
+    # the swaps reprice to par on the resulting curve
+    valuationDate = FinDate(2019, 9, 18)
+    settlementDate = valuationDate
+
+    dccType = FinDayCountTypes.ACT_360
+    depos = []
+    for tenor in ["1M", "3M", "6M"]:
+        depo = FinLiborDeposit(settlementDate, tenor, 0.0200, dccType)
+        depos.append(depo)
+
+    swapType = FinSwapTypes.PAYER
+    fixedFreqType = FinFrequencyTypes.SEMI_ANNUAL
+    fixedDCCType = FinDayCountTypes.THIRTY_E_360_ISDA
+
+    swaps = []
+    for numYears in range(1, 31):
+        swapRate = 0.0200 + 0.0005 * numYears
+        swap = FinLiborSwap(settlementDate, str(numYears) + "Y", swapType,
+                            swapRate, fixedFreqType, fixedDCCType)
+        swaps.append(swap)
+
+    testCases.header("INTERP", "TIME", "NUMPOINTS", "DF10Y", "DF30Y",
+                     "MAXSWAPPV")
+
+    for interpType in FinInterpTypes:
+
+        start = time.time()
+        liborCurve = FinLiborCurve(valuationDate, depos, [], swaps,
+                                   interpType)
+        end = time.time()
+
+        maxSwapPV = 0.0
+        for swap in swaps:
+            v = swap.value(valuationDate, liborCurve, liborCurve, None, 1.0)
+            maxSwapPV = max(maxSwapPV, abs(v / swap._notional))
+
+        df10Y = liborCurve.df(settlementDate.addYears(10))
+        df30Y = liborCurve.df(settlementDate.addYears(30))
+
+        testCases.print(interpType, end - start, len(liborCurve._times),
+                        df10Y, df30Y, maxSwapPV < 1e-8)
+
+###############################################################################
+
+
+def test_FinLiborCurveAnalyticJacobian():
+
+    # Compare the Newton search using the analytical derivative of the swap
+    # value with the secant search for each interpolation scheme that needs
+    # a solver
+    valuationDate = FinDate(2019, 9, 18)
+    settlementDate = valuationDate
+
+    dccType = FinDayCountTypes.ACT_360
+    depos = []
+    for tenor in ["1M", "3M", "6M"]:
+        depo = FinLiborDeposit(settlementDate, tenor, 0.0200, dccType)
+        depos.append(depo)
+
+    swapType = FinSwapTypes.PAYER
+    fixedFreqType = FinFrequencyTypes.SEMI_ANNUAL
+    fixedDCCType = FinDayCountTypes.THIRTY_E_360_ISDA
+
+    swaps = []
+    for numYears in range(1, 31):
+        swapRate = 0.0200 + 0.0005 * numYears
+        swap = FinLiborSwap(settlementDate, str(numYears) + "Y", swapType,
+                            swapRate, fixedFreqType, fixedDCCType)
+        swaps.append(swap)
+
+    interpTypes = [FinInterpTypes.LINEAR_ZERO_RATES,
+                   FinInterpTypes.FLAT_FORWARDS,
+                   FinInterpTypes.LINEAR_FORWARDS]
+
+    numRepeats = 10
+
+    testCases.header("INTERP", "ANALYTIC", "TIME", "NUMVALUATIONS",
+                     "DF30Y", "MAXSWAPPV")
+
+    for interpType in interpTypes:
+        for analyticJacobian in [False, True]:
+
+            start = time.time()
+            for _ in range(0, numRepeats):
+                liborCurve = FinLiborCurve(valuationDate, depos, [], swaps,
+                                           interpType, False,
+                                           analyticJacobian)
+            end = time.time()
+
+            maxSwapPV = 0.0
+            for swap in swaps:
+                v = swap.value(valuationDate, liborCurve, liborCurve, None,
+                               1.0)
+                maxSwapPV = max(maxSwapPV, abs(v / swap._notional))
+
+            df30Y = liborCurve.df(settlementDate.addYears(30))
+
+            testCases.print(interpType, analyticJacobian,
+                            (end - start) / numRepeats,
+                            liborCurve._numSwapValuations, df30Y,
+                            maxSwapPV < 1e-8)
+
+###############################################################################
+
+
+def test_FinLiborCurveUpdateQuote():
+
+    # Update the quote of one instrument at a time and check that the curve
+    # matches a curve that is built from scratch using the new quotes
+    valuationDate = FinDate(2019, 9, 18)
+    settlementDate = valuationDate
+
+    dccType = FinDayCountTypes.ACT_360
+    swapType = FinSwapTypes.PAYER
+    fixedFreqType = FinFrequencyTypes.SEMI_ANNUAL
+    fixedDCCType = FinDayCountTypes.THIRTY_E_360_ISDA
+
+    depoTenors = ["1M", "3M"]
+    fraMonths = [3, 6, 9]
+    swapYears = list(range(2, 21))
+
+    def buildInstruments(rates):
+
+        depos = []
+        for tenor, rate in zip(depoTenors, rates):
+            depo = FinLiborDeposit(settlementDate, tenor, rate, dccType)
+            depos.append(depo)
+
+        rates = rates[len(depos):]
+
+        fras = []
+        for numMonths, rate in zip(fraMonths, rates):
+            fraStartDate = settlementDate.addMonths(numMonths)
+            fra = FinLiborFRA(fraStartDate, "3M", rate, dccType)
+            fras.append(fra)
+
+        rates = rates[len(fras):]
+
+        swaps = []
+        for numYears, rate in zip(swapYears, rates):
+            swap = FinLiborSwap(settlementDate, str(numYears) + "Y",
+                                swapType, rate, fixedFreqType, fixedDCCType)
+            swaps.append(swap)
+
+        return depos, fras, swaps
+
+    quotes = [0.0200] * len(depoTenors) + [0.0210] * len(fraMonths)
+    for numYears in swapYears:
+        quotes.append(0.0200 + 0.0005 * numYears)
+
+    depos, fras, swaps = buildInstruments(quotes)
+
+    interpTypes = [FinInterpTypes.LINEAR_ZERO_RATES,
+                   FinInterpTypes.FLAT_FORWARDS,
+                   FinInterpTypes.LINEAR_FORWARDS,
+                   FinInterpTypes.LINEAR_SWAP_RATES]
+
+    numInstruments = len(quotes)
+    instrumentIndices = [0, 3, 5, 12, numInstruments - 1]
+
+    testCases.header("INTERP", "INDEX", "NEWRATE", "DF20Y", "MATCH",
+                     "NUMUPDATES", "INPUTS UNCHANGED")
+
+    for interpType in interpTypes:
+
+        liborCurve = FinLiborCurve(valuationDate, depos, fras, swaps,
+                                   interpType)
+
+        numUpdates = [0]
+
+        def countUpdates(curve):
+            numUpdates[0] += 1
+
+        liborCurve.addListener(countUpdates)
+
+        newQuotes = list(quotes)
+
+        for instrumentIndex in instrumentIndices:
+
+            newRate = 0.0250 + 0.0001 * instrumentIndex
+            liborCurve.updateQuote(instrumentIndex, newRate)
+
+            newQuotes[instrumentIndex] = newRate
+            newDepos, newFRAs, newSwaps = buildInstruments(newQuotes)
+            newCurve = FinLiborCurve(valuationDate, newDepos, newFRAs,
+                                     newSwaps, interpType)
+
+            maxDiff = np.max(np.abs(liborCurve._dfValues -
+                                    newCurve._dfValues))
+
+            df20Y = liborCurve.df(settlementDate.addYears(20))
+
+            # The instruments passed in to the curve keep their quotes
+            inputQuotes = [depo._depositRate for depo in depos] + \
+                [fra._fraRate for fra in fras] + \
+                [swap._fixedCoupon for swap in swaps]
+
+            testCases.print(interpType, instrumentIndex, newRate, df20Y,
+                            maxDiff < 1e-12, numUpdates[0],
+                            inputQuotes == quotes)
+
+        liborCurve.removeListener(countUpdates)
+
+###############################################################################
+
+
 test_bloombergPricingExample()
 test_derivativePricingExample()
 test_FinLiborDepositsOnly()
 test_FinLiborFRAsOnly()
 test_FinLiborDepositsFRAsSwaps()
 test_FinLiborDepositsFuturesSwaps()
+test_FinLiborCurveBootstrapInterpTypes()
+test_FinLiborCurveAnalyticJacobian()
+test_FinLiborCurveUpdateQuote()
 
 testCases.compareTestCases()
@@ -6,7 +6,7 @@
 from FinTestCases import FinTestCases, globalTestCaseMode
 from financepy.finutils.FinCalendar import FinBusDayAdjustTypes
 from financepy.finutils.FinCalendar import FinDateGenRuleTypes
-from financepy.finutils.FinSchedule import FinSchedule
+from financepy.finutils.FinSchedule import FinSchedule, gScheduleCache
 from financepy.finutils.FinFrequency import FinFrequencyTypes
 from financepy.finutils.FinCalendar import FinCalendarTypes
 from financepy.finutils.FinDate import FinDate
@@ -175,5 +175,41 @@ def test_FinSchedule():
 ###############################################################################
 
 
+def test_FinScheduleCache():
+
+    d1 = FinDate(20, 6, 2018)
+    frequencyType = FinFrequencyTypes.QUARTERLY
+    calendarType = FinCalendarTypes.TARGET
+    busDayAdjustType = FinBusDayAdjustTypes.MODIFIED_FOLLOWING
+    dateGenRuleType = FinDateGenRuleTypes.BACKWARD
+
+    gScheduleCache.clear()
+
+    testCases.header("MATURITY", "NUMDATES", "HITS", "MISSES", "SHARED")
+
+    for years in [5, 10, 5, 10, 5]:
+
+        d2 = d1.addYears(years)
+
+        schedule1 = FinSchedule(d1, d2, frequencyType, calendarType,
+                                busDayAdjustType, dateGenRuleType)
+
+        schedule2 = FinSchedule(d1, d2, frequencyType, calendarType,
+                                busDayAdjustType, dateGenRuleType)
+
+        assert schedule1.scheduleDates() == schedule2.scheduleDates()
+
+        shared = schedule1.scheduleSerials() is schedule2.scheduleSerials()
+
+        testCases.print(str(d2),
+                        len(schedule1.scheduleDates()),
+                        gScheduleCache._hits,
+                        gScheduleCache._misses,
+                        shared)
+
+###############################################################################
+
+
 test_FinSchedule()
+test_FinScheduleCache()
 testCases.compareTestCases()